@@ -27,15 +27,15 @@ def get_most_recent_entry(search_dir):
 
 
 def glob_result_files(folder_name):
-    """ Glob result spreadsheets from specified folder.
+    """ Glob result files from specified folder.
 
     Args:
         folder_name: an absolute or relative path to a directory
 
     Returns:
-        list of filenames that match the pattern 'scenario_*.xlsx'
+        list of filenames that match the pattern 'scenario_*.h5'
     """
-    glob_pattern = os.path.join(folder_name, 'scenario_*.xlsx')
+    glob_pattern = os.path.join(folder_name, 'scenario_*.h5')
     result_files = sorted(glob.glob(glob_pattern))
     return result_files
 
@@ -88,26 +88,25 @@ def group_hbar_plots(ax, group_size, inner_sep=None):
 
 
 def compare_scenarios(result_files, output_filename):
-    """ Create report sheet and plots for given report spreadsheets.
+    """ Create report sheet and plots for given result files.
+
+    Each result file is opened lazily and closed right after its costs and
+    created commodity sums are read, so that many (large) results can be
+    compared without holding them in memory.
 
     Args:
-        result_files: a list of spreadsheet filenames generated by urbs.report
+        result_files: a list of HDF5 result filenames generated by urbs.save
         output_filename: a spreadsheet filename that the comparison is to be
                          written to
 
      Returns:
         Nothing
-
-    To do:
-        Don't use report spreadsheets, instead load pickled problem
-        instances. This would make this function less fragile and dependent
-        on the output format of urbs.report().
     """
 
     # derive list of scenario names for column labels/figure captions
     scenario_names = [os.path.basename(rf)  # drop folder names, keep filename
                       .replace('_', ' ')  # replace _ with spaces
-                      .replace('.xlsx', '')  # drop file extension
+                      .replace('.h5', '')  # drop file extension
                       .replace('scenario ', '')  # drop 'scenario ' prefix
                       for rf in result_files]
 
@@ -125,30 +124,23 @@ def compare_scenarios(result_files, output_filename):
     # READ
 
     for rf in result_files:
-        with pd.ExcelFile(rf) as xls:
-            cost = xls.parse('Costs', index_col=[0])
-            esum = xls.parse('Commodity sums')
-
-            # repair broken MultiIndex in the first column
-            esum.reset_index(inplace=True)
-            esum.fillna(method='ffill', inplace=True)
-            esum.set_index(['level_0', 'level_1'], inplace=True)
+        with urbs.load(rf, lazy=True) as prob:
+            # get_timeseries needs the mode of a model instance
+            prob.mode = urbs.identify_mode(prob._data)
 
+            cost = urbs.get_entity(prob, 'costs').to_frame()
             costs.append(cost)
 
-            # extract sites and commodities from scenario
-            sitcom = [value.split('.') for value
-                      in esum.columns.get_level_values(0)]
-            coms = set([com for sit, com in sitcom])
-            com_sums = pd.DataFrame()
-            # get site.commodity names
-            sit_com = esum.columns.get_level_values(0)
-            # sum each commodity (e.g. Elec, CO2)
-            for com in coms:
-                com_sum = pd.DataFrame(esum.loc[:, sit_com.str.contains(com)]
-                                       .sum(axis=1), columns=[com])
-                com_sums = pd.concat([com_sums, com_sum], axis=1)
-            esums.append(com_sums)
+            # sum the created timeseries of all demand sites per commodity
+            demand = urbs.get_input(prob, 'demand')
+            com_sums = {}
+            for stf in demand.index.get_level_values(0).unique():
+                for sit, com in demand.columns:
+                    created = urbs.get_timeseries(prob, stf, com, sit)[0]
+                    com_sums[com] = created.sum().add(
+                        com_sums.get(com, 0), fill_value=0)
+            coms = set(com_sums)
+            esums.append(pd.DataFrame(com_sums).fillna(0))
 
     # merge everything into one DataFrame each
     costs = pd.concat(costs, axis=1, keys=scenario_names)
@@ -167,12 +159,10 @@ def compare_scenarios(result_files, output_filename):
     spent = costs.loc[:, costs.sum() > 0]
     earnt = costs.loc[:, costs.sum() < 0]
 
-    # extract created
-    # per commodity (e.g. 'Elec', 'CO2', 'Heat'...)
+    # created per commodity (e.g. 'Elec', 'CO2', 'Heat'...)
     # make index name 'Commodity' nicer for plot
     # drop all unused commodities and sort/transpose
     # convert MWh to GWh
-    esums = esums.loc['Created']
     esums.index.name = 'Commodity'
     used_commodities = (esums.sum(axis=1) > 0)
     esums = esums[used_commodities].sort_index().transpose()
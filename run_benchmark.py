@@ -0,0 +1,30 @@
+import json
+import os
+import urbs
+
+
+# problem sizes to run (c.f. urbs.BENCHMARK_GRID)
+sizes = ['tiny', 'small', 'medium']
+
+# Choose Solver (cplex, glpk, gurobi, ...) or None to skip solve and report
+solver = None
+
+# number of runs per size, the fastest is kept
+repeat = 3
+
+result_dir = urbs.prepare_result_directory('Benchmark')  # name + time stamp
+result_file = os.path.join(result_dir, 'benchmark.json')
+
+# optional: earlier benchmark.json to compare against
+baseline_file = None
+
+benchmark = urbs.run_benchmark(sizes, solver=solver, repeat=repeat,
+                               filename=result_file)
+print(urbs.benchmark_table(benchmark).to_string())
+
+if baseline_file is not None:
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    comparison = urbs.compare_benchmark(benchmark, baseline)
+    print(comparison[['wall', 'wall_baseline', 'wall_ratio',
+                      'rss_peak_ratio']].to_string())
@@ -0,0 +1,65 @@
+"""Performance regression check of model build, solve and reporting.
+
+Runs the fixed workloads of urbs.REGRESSION_WORKLOADS, each run in a fresh
+Python process, and compares their wall times and memory increase per phase
+against the committed baseline file regression_baseline.json. Exits with
+status 1 if any median regressed beyond its tolerance.
+
+The solve workloads use the CBC solver (package coincbc of urbs-env.yml),
+not GLPK like the run scripts: the baseline was measured with CBC, and the
+solve times of different solvers cannot be compared.
+
+Usage:
+    python run_regression.py                    # compare against baseline
+    python run_regression.py --update-baseline  # (re)write the baseline
+
+The committed baseline was measured in the environment of urbs-env.yml on a
+Linux machine. The tolerances are tight enough to catch slowdowns of a
+quarter, so on other hardware, or after an intended change of the
+workloads, first write a local baseline with --update-baseline from a known
+good revision.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+baseline_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'regression_baseline.json')
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--update-baseline', action='store_true',
+                    help='write the measurements as new baseline')
+parser.add_argument('--baseline', default=baseline_file,
+                    help='baseline file (default: %(default)s)')
+parser.add_argument('--repeat', type=int, default=5,
+                    help='runs per workload, the median is compared')
+args = parser.parse_args()
+
+# fixed hash seed, so that set iteration (and thus model order) is the same
+# in every run; restart the interpreter if it is not set
+if os.environ.get('PYTHONHASHSEED') != '0':
+    env = dict(os.environ, PYTHONHASHSEED='0')
+    sys.exit(subprocess.call([sys.executable] + sys.argv, env=env))
+
+import urbs
+
+result = urbs.run_regression(repeat=args.repeat)
+
+if args.update_baseline:
+    urbs.write_regression(result, args.baseline)
+    print('Baseline written to {}'.format(args.baseline))
+    sys.exit(0)
+
+if not os.path.exists(args.baseline):
+    print('No baseline file {}; create it with --update-baseline.'.format(
+        args.baseline))
+    sys.exit(2)
+
+with open(args.baseline) as f:
+    baseline = json.load(f)
+comparison = urbs.compare_regression(result, baseline)
+print(urbs.format_regression(comparison))
+sys.exit(1 if (comparison['status'] == 'REGRESSION').any() else 0)
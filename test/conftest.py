@@ -0,0 +1,38 @@
+import copy
+import os
+import pytest
+import urbs
+from pyomo.opt.base import SolverFactory
+
+INPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'Input')
+SINGLE_YEAR = os.path.join(INPUT_DIR, 'single_year_example.xlsx')
+INTERTEMPORAL = os.path.join(INPUT_DIR, 'Intertemporal_example')
+YEAR = 2020
+
+
+@pytest.fixture(scope='module')
+def data():
+    """Input of the bundled single year example."""
+    return urbs.read_input(SINGLE_YEAR, YEAR)
+
+
+@pytest.fixture(scope='module')
+def intertemporal_data():
+    """Input of the bundled intertemporal example."""
+    return urbs.read_input(INTERTEMPORAL, YEAR)
+
+
+@pytest.fixture(scope='module')
+def model(data):
+    """Unsolved model of the single year example with 6 timesteps."""
+    # create_model adds derived columns to the input tables
+    return urbs.create_model(copy.deepcopy(data), 1, range(0, 7), 'cost')
+
+
+@pytest.fixture(scope='session')
+def cbc():
+    """Name of the CBC solver; skips the test if it is not installed."""
+    if not SolverFactory('cbc').available(exception_flag=False):
+        pytest.skip('solver cbc not available')
+    return 'cbc'
@@ -0,0 +1,47 @@
+import copy
+import math
+import os
+import pytest
+import urbs
+import urbs.admm
+
+
+def test_check_regions(data):
+    urbs.check_regions(data, [['North'], ['Mid', 'South']])
+    with pytest.raises(ValueError, match='several'):
+        urbs.check_regions(data, [['North', 'Mid'], ['Mid', 'South']])
+    with pytest.raises(ValueError, match='no ADMM region'):
+        urbs.check_regions(data, [['North'], ['Mid']])
+    with pytest.raises(ValueError, match='unknown'):
+        urbs.check_regions(data, [['North'], ['Mid', 'South', 'East']])
+    with pytest.raises(ValueError, match='no sites'):
+        urbs.check_regions(data, [['North', 'Mid', 'South'], []])
+
+
+def _dying_worker(region, *args):
+    os._exit(3)
+
+
+def _failing_worker(region, *args):
+    results = args[-1]
+    results.put((region, ValueError('region model broken')))
+
+
+@pytest.fixture
+def uncoupled_data(data):
+    """Input without CO2 limit, so sites are only coupled by transmission."""
+    data = copy.deepcopy(data)
+    global_prop = data['global_prop']
+    co2_limit = global_prop.index.get_level_values(1) == 'CO2 limit'
+    global_prop.loc[co2_limit, 'value'] = math.inf
+    return data
+
+
+@pytest.mark.parametrize('worker, message', [
+    (_dying_worker, 'exit code 3'),
+    (_failing_worker, 'region model broken')])
+def test_region_failure_raises(uncoupled_data, monkeypatch, worker, message):
+    monkeypatch.setattr(urbs.admm, '_region_worker', worker)
+    with pytest.raises(RuntimeError, match=message):
+        urbs.solve_admm(uncoupled_data, [['North'], ['Mid', 'South']], 1,
+                        range(0, 7), 'cost', 'gurobi')
@@ -0,0 +1,40 @@
+import copy
+import math
+import pytest
+import urbs
+
+
+@pytest.fixture
+def island_data(data):
+    """Input without transmission and CO2 limit, so each site is an
+    island."""
+    data = copy.deepcopy(data)
+    data['transmission'] = data['transmission'].iloc[0:0]
+    global_prop = data['global_prop']
+    co2_limit = global_prop.index.get_level_values(1) == 'CO2 limit'
+    global_prop.loc[co2_limit, 'value'] = math.inf
+    return data
+
+
+def test_find_site_islands(data, island_data):
+    assert urbs.find_site_islands(data) == [['Mid', 'North', 'South']]
+    assert urbs.find_site_islands(island_data) == [
+        ['Mid'], ['North'], ['South']]
+    assert urbs.is_decomposable(island_data)
+    assert not urbs.is_decomposable(data)
+
+
+def test_islands_keep_duals_and_profile(island_data, cbc):
+    prob = urbs.solve_islands(island_data, 1, range(0, 7), 'cost', cbc,
+                              processes=1, duals=['res_vertex'],
+                              result_profile='full')
+    assert 'res_vertex' in prob._result
+    assert 'res_process_capacity' not in prob._result
+    sites = prob._result['res_vertex'].index.get_level_values('sit')
+    assert sorted(sites.unique()) == ['Mid', 'North', 'South']
+
+    prob = urbs.solve_islands(island_data, 1, range(0, 7), 'cost', cbc,
+                              processes=1, result_profile='capacities')
+    # without transmission, the islands have no cap_tra entities
+    assert 'cap_pro' in prob._result
+    assert set(prob._result) <= set(urbs.profile_entities('capacities'))
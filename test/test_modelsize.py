@@ -0,0 +1,27 @@
+import copy
+import pyomo.core as pyomo
+import pytest
+import urbs
+
+
+@pytest.mark.parametrize('example', ['data', 'intertemporal_data'])
+def test_estimate_matches_model_size_report(request, example):
+    data = request.getfixturevalue(example)
+    timesteps = range(0, 7)
+    estimate = urbs.estimate_model_size(copy.deepcopy(data), timesteps)
+    prob = urbs.create_model(copy.deepcopy(data), 1, timesteps, 'cost')
+    report = urbs.model_size_report(prob, estimate)
+
+    # every component is estimated, and nothing else
+    assert not report.isnull()[['rows', 'rows_estimate']].any().any()
+    variables = report[report['type'] == 'var']
+    assert (variables['rows'] == variables['rows_estimate']).all()
+
+    # constraint estimates are the size of the declared index; rules that
+    # skip members make the built constraint smaller
+    constraints = report[report['type'] == 'con']
+    assert (constraints['rows'] <= constraints['rows_estimate']).all()
+    for con in prob.component_objects(pyomo.Constraint, active=True):
+        assert estimate.loc[con.name, 'rows'] == len(con.index_set())
+
+    assert urbs.estimate_memory(estimate) > 0
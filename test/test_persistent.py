@@ -0,0 +1,38 @@
+import copy
+import pytest
+import pyomo.core as pyomo
+import urbs
+from pyomo.opt.base import SolverFactory
+
+
+def test_diff_input(data):
+    changed = urbs.scenario_all_together(copy.deepcopy(data))
+    updates = urbs.diff_input(data, changed)
+    assert sorted(updates) == ['def_costs', 'res_global_co2_limit',
+                               'res_process_capacity']
+    assert updates['def_costs'] is None
+    assert updates['res_process_capacity'] == {
+        (2020, 'North', 'Hydro plant'), (2020, 'North', 'Biomass plant')}
+
+    with pytest.raises(ValueError, match='must be rebuilt'):
+        urbs.diff_input(data, urbs.scenario_no_dsm(copy.deepcopy(data)))
+
+
+def test_session_matches_rebuilt_model(data, cbc, tmpdir):
+    timesteps = range(0, 7)
+    changed = urbs.scenario_all_together(copy.deepcopy(data))
+    # create_model adds derived columns to the input tables
+    session = urbs.ScenarioSession(copy.deepcopy(data), 1, timesteps, 'cost',
+                                   cbc, logfile=str(tmpdir.join('s.log')))
+    session.solve()
+
+    assert session.update(changed) == ['def_costs', 'res_global_co2_limit',
+                                       'res_process_capacity']
+    result = session.solve()
+    assert str(result.solver.termination_condition) == 'optimal'
+
+    rebuilt = urbs.create_model(copy.deepcopy(changed), 1, timesteps,
+                                'cost')
+    SolverFactory(cbc).solve(rebuilt)
+    assert pyomo.value(session.prob.objective_function) == pytest.approx(
+        pyomo.value(rebuilt.objective_function), rel=1e-6)
@@ -0,0 +1,154 @@
+import pandas as pd
+import pyomo.core as pyomo
+import urbs
+from urbs.pyomoio import _get_onset_names
+
+
+def legacy_constraint_duals(instance, name):
+    """Constraint branch of get_entity before the bulk extraction."""
+    entity = getattr(instance, name)
+    labels = _get_onset_names(entity)
+    if entity.dim() > 1:
+        results = pd.DataFrame(
+            [key + (instance.dual[entity[key]],)
+             for (id_, key) in entity.id_index_map().items()
+             if id_ in instance.dual._dict.keys()])
+    else:
+        results = pd.DataFrame(
+            [(key, instance.dual[con]) for key, con in entity.iteritems()])
+        if entity.dim() == 0:
+            labels = ['None']
+    for k, label in enumerate(labels):
+        if label in labels[:k] or label == name:
+            labels[k] = labels[k] + "_"
+    if results.empty:
+        return pd.Series(name=name)
+    results.columns = labels + [name]
+    return results.set_index(labels)[name]
+
+
+def set_fake_duals(instance):
+    """Give distinct duals to all constraint members, except every third
+    member of multi-dimensional constraints (which the legacy code skips)."""
+    instance.dual.clear_all_values()
+    k = 0
+    for con in instance.component_data_objects(pyomo.Constraint):
+        k += 1
+        if k % 3 or con.parent_component().dim() < 2:
+            instance.dual[con] = k / 7.0
+
+
+def test_duals_match_legacy_get_entity(model):
+    set_fake_duals(model)
+    names = urbs.list_entities(model, 'con').index.tolist()
+    duals = urbs.get_duals(model)
+    assert list(duals) == names
+    for name in names:
+        expected = legacy_constraint_duals(model, name)
+        pd.testing.assert_series_equal(duals[name], expected,
+                                       check_index_type=False)
+        pd.testing.assert_series_equal(urbs.get_entity(model, name),
+                                       expected, check_index_type=False)
+
+
+def test_selected_duals(model):
+    set_fake_duals(model)
+    duals = urbs.get_duals(model, ['res_vertex', 'def_costs', 'missing'])
+    assert list(duals) == ['res_vertex', 'def_costs', 'missing']
+    pd.testing.assert_series_equal(
+        duals['res_vertex'], legacy_constraint_duals(model, 'res_vertex'),
+        check_index_type=False)
+    assert duals['missing'].empty
+
+    cache = urbs.create_result_cache(model, duals=['res_vertex'])
+    assert 'res_vertex' in cache and 'def_costs' not in cache
+
+
+def set_fake_values(instance):
+    """Give all variables distinct values."""
+    for k, var in enumerate(instance.component_data_objects(pyomo.Var)):
+        var.value = (k % 11) + 0.5
+
+
+def test_expressions_match_member_values(model):
+    set_fake_values(model)
+    for name in ['cap_pro', 'cap_sto_c', 'cap_sto_p', 'cap_tra']:
+        entity = getattr(model, name)
+        values = urbs.get_entity(model, name)
+        assert values.tolist() == [expr() for expr in entity.values()]
+
+
+def test_expression_cache_follows_params_and_fixed_vars():
+    m = pyomo.ConcreteModel()
+    m.i = pyomo.Set(initialize=[1, 2], ordered=True)
+    m.p = pyomo.Param(m.i, initialize={1: 2.0, 2: 3.0}, mutable=True)
+    m.x = pyomo.Var(m.i, initialize=1.0)
+    m.y = pyomo.Var(initialize=4.0)
+    m.e = pyomo.Expression(m.i, rule=lambda m, i: m.p[i] * m.x[i] + m.y)
+    assert urbs.get_entity(m, 'e').tolist() == [6.0, 7.0]
+
+    m.p[2] = 10.0
+    m.y.fix(1.0)
+    m.x[1].value = 5.0
+    assert urbs.get_entity(m, 'e').tolist() == [11.0, 11.0]
+
+
+def legacy_get_entity(instance, name):
+    """get_entity for sets, params, variables and expressions before the
+    bulk extraction."""
+    entity = getattr(instance, name)
+    labels = _get_onset_names(entity)
+    if isinstance(entity, pyomo.Set):
+        if entity.dimen > 1:
+            results = pd.DataFrame([v + (1,) for v in entity.value])
+        else:
+            results = pd.DataFrame([(v, 1) for v in entity.value])
+        if not labels:
+            labels = [name]
+            name = name + '_'
+    elif isinstance(entity, pyomo.Param):
+        if entity.dim() > 1:
+            results = pd.DataFrame(
+                [v[0] + (v[1],) for v in entity.iteritems()])
+        elif entity.dim() == 1:
+            results = pd.DataFrame(
+                [(v[0], v[1]) for v in entity.iteritems()])
+        else:
+            results = pd.DataFrame(
+                [(v[0], v[1].value) for v in entity.iteritems()])
+            labels = ['None']
+    elif isinstance(entity, pyomo.Expression):
+        results = pd.DataFrame(
+            [(k if entity.dim() > 1 else (k,)) + (v(),)
+             for k, v in entity.iteritems()])
+        if entity.dim() == 0:
+            labels = ['None']
+    else:
+        results = pd.DataFrame(
+            [(k if entity.dim() > 1 else (k,)) + (v.value,)
+             for k, v in entity.iteritems()])
+        if entity.dim() == 0:
+            labels = ['None']
+    for k, label in enumerate(labels):
+        if label in labels[:k] or label == name:
+            labels[k] = labels[k] + "_"
+    if results.empty:
+        return pd.Series(name=name)
+    results.columns = labels + [name]
+    return results.set_index(labels)[name]
+
+
+def test_entities_match_legacy_get_entity(model):
+    set_fake_values(model)
+    names = [name for entity_type in ['set', 'par', 'var']
+             for name in urbs.list_entities(model, entity_type).index]
+    names += ['cap_pro', 'cap_sto_c', 'cap_sto_p', 'cap_tra']
+    for name in names:
+        result = urbs.get_entity(model, name)
+        expected = legacy_get_entity(model, name)
+        if isinstance(getattr(model, name), pyomo.Set):
+            # the legacy code iterated unordered set values
+            result, expected = result.sort_index(), expected.sort_index()
+        pd.testing.assert_series_equal(result, expected,
+                                       check_index_type=False)
+        assert result.index.names == expected.index.names
@@ -0,0 +1,175 @@
+import copy
+import os
+import pandas as pd
+import pyomo.core as pyomo
+import pytest
+import urbs
+from urbs.saveload import ResultContainer
+
+
+@pytest.fixture(scope='module')
+def prob(data):
+    """Single year example model with distinct fake results."""
+    prob = urbs.create_model(copy.deepcopy(data), 1, range(0, 7), 'cost')
+    for k, var in enumerate(prob.component_data_objects(pyomo.Var)):
+        var.value = (k % 11) + 0.5
+    k = 0
+    for con in prob.component_data_objects(pyomo.Constraint):
+        k += 1
+        prob.dual[con] = k / 7.0
+    prob._result = urbs.create_result_cache(prob)
+    return prob
+
+
+@pytest.fixture(scope='module')
+def store(prob, tmpdir_factory):
+    """Result store of prob in fixed format."""
+    filename = str(tmpdir_factory.mktemp('store').join('prob.h5'))
+    urbs.save(prob, filename)
+    return filename
+
+
+def assert_cache_equal(cache, expected):
+    assert sorted(cache) == sorted(expected)
+    for name in expected:
+        if isinstance(expected[name], pd.DataFrame):
+            pd.testing.assert_frame_equal(cache[name], expected[name])
+        else:
+            pd.testing.assert_series_equal(cache[name], expected[name],
+                                           check_index_type=False)
+
+
+def test_load_round_trips_save(prob, store):
+    eager = urbs.load(store)
+    assert_cache_equal(eager._data, prob._data)
+    assert_cache_equal(eager._result, prob._result)
+
+    with urbs.load(store, lazy=True) as lazy:
+        assert_cache_equal(lazy._data, prob._data)
+        assert_cache_equal(lazy._result, prob._result)
+        pd.testing.assert_series_equal(lazy.select('tau_pro'),
+                                       prob._result['tau_pro'])
+
+
+def test_lazy_load_reads_on_demand(prob, store):
+    with urbs.load(store, lazy=True, cache_size=2) as lazy:
+        assert len(lazy._result) == len(prob._result)
+        assert not lazy._result._cache
+        for name in ['cap_pro_new', 'tau_pro', 'e_pro_out']:
+            lazy._result[name]
+        assert list(lazy._result._cache) == ['tau_pro', 'e_pro_out']
+        with pytest.raises(KeyError):
+            lazy._result['missing']
+
+    # entities cached before closing stay readable, others fail
+    pd.testing.assert_series_equal(lazy._result['e_pro_out'],
+                                   prob._result['e_pro_out'])
+    with pytest.raises(ValueError):
+        lazy._result['cap_pro_new']
+    with pytest.raises(ValueError):
+        lazy.select('cap_pro_new')
+
+
+def test_lazy_load_reports_like_eager_load(prob, tmpdir):
+    # the full result cache has no capacity expressions
+    store = str(tmpdir.join('capacities.h5'))
+    urbs.save(ResultContainer(prob._data, urbs.create_result_cache(
+        prob, profile='capacities')), store)
+    eager = urbs.load(store)
+    with urbs.load(store, lazy=True) as lazy:
+        for expected, result in zip(urbs.get_constants(eager),
+                                    urbs.get_constants(lazy)):
+            assert result.equals(expected)
+
+
+@pytest.fixture(scope='module')
+def table_store(prob, tmpdir_factory):
+    """Compressed result store of prob in table format."""
+    filename = str(tmpdir_factory.mktemp('table').join('prob.h5'))
+    urbs.save(prob, filename, format='table', complevel=9, complib='blosc')
+    return filename
+
+
+def test_table_store_round_trips_save(prob, table_store):
+    assert_cache_equal(urbs.load(table_store)._result, prob._result)
+
+
+def test_read_entity_where(prob, store, table_store):
+    e_pro_out = prob._result['e_pro_out']
+    sit = e_pro_out.index.get_level_values('sit')
+    com = e_pro_out.index.get_level_values('com')
+    t = e_pro_out.index.get_level_values('t')
+    expected = e_pro_out[(sit == 'Mid') & (com == 'Elec') & (t < 4)]
+    assert not expected.empty
+
+    where = "sit == 'Mid' & com == 'Elec' & t < 4"
+    pd.testing.assert_series_equal(
+        urbs.read_entity(table_store, 'e_pro_out', where), expected)
+    with urbs.load(table_store, lazy=True) as lazy:
+        pd.testing.assert_series_equal(lazy.select('e_pro_out', where),
+                                       expected)
+
+    pd.testing.assert_series_equal(urbs.read_entity(store, 'e_pro_out'),
+                                   e_pro_out)
+    with pytest.raises(ValueError, match='migrate_store'):
+        urbs.read_entity(store, 'e_pro_out', where)
+
+
+def test_migrate_store(prob, store, tmpdir):
+    table = str(tmpdir.join('table.h5'))
+    urbs.migrate_store(store, table)
+    assert_cache_equal(urbs.load(table)._data, prob._data)
+    assert_cache_equal(urbs.load(table)._result, prob._result)
+    assert not urbs.read_entity(table, 'e_pro_out', "t == 1").empty
+
+    fixed = str(tmpdir.join('fixed.h5'))
+    urbs.migrate_store(table, fixed, format='fixed')
+    assert_cache_equal(urbs.load(fixed)._result, prob._result)
+    with pytest.raises(ValueError):
+        urbs.read_entity(fixed, 'e_pro_out', "t == 1")
+
+
+def test_consolidated_store(prob, tmpdir):
+    filename = str(tmpdir.join('scenarios.h5'))
+    commodity = prob._data['commodity'].copy()
+    commodity['price'] *= 2
+    costs = prob._result['costs'] * 2
+    expensive = ResultContainer(dict(prob._data, commodity=commodity),
+                                dict(prob._result, costs=costs))
+
+    urbs.save_scenario(prob, filename, 'base', format='table')
+    urbs.save_scenario(expensive, filename, 'expensive', format='table')
+    # replacing a scenario keeps a single copy of it
+    urbs.save_scenario(expensive, filename, 'expensive', format='table')
+    assert sorted(urbs.list_scenarios(filename)) == ['base', 'expensive']
+
+    # identical input tables are stored once
+    with pd.HDFStore(filename, mode='r') as store:
+        assert len(store.get_node('input/commodity')._v_children) == 2
+        assert len(store.get_node('input/site')._v_children) == 1
+
+    base = urbs.load_scenario(filename, 'base')
+    assert_cache_equal(base._data, prob._data)
+    # capacity expressions are added to the result cache
+    capacities = {name: urbs.get_entity(prob, name)
+                  for name in urbs.output.CONSTANT_ENTITIES}
+    assert_cache_equal(base._result, dict(prob._result, **capacities))
+    pd.testing.assert_frame_equal(
+        urbs.load_scenario(filename, 'expensive')._data['commodity'],
+        commodity)
+    with pytest.raises(KeyError):
+        urbs.load_scenario(filename, 'missing')
+
+    pd.testing.assert_series_equal(
+        urbs.get_scenario_entity(filename, 'costs', ['base', 'expensive']),
+        pd.concat([prob._result['costs'], costs],
+                  keys=['base', 'expensive'], names=['scenario']))
+    assert urbs.get_scenario_costs(filename).loc['expensive'].tolist() == \
+        costs.tolist()
+
+    e_pro_out = urbs.get_scenario_entity(filename, 'e_pro_out',
+                                         where="sit == 'Mid' & t < 4")
+    assert set(e_pro_out.index.get_level_values('scenario')) == \
+        {'base', 'expensive'}
+    assert set(e_pro_out.index.get_level_values('sit')) == {'Mid'}
+    assert e_pro_out.index.get_level_values('t').max() < 4
@@ -0,0 +1,55 @@
+import copy
+import pytest
+import pyomo.core as pyomo
+import urbs
+from pyomo.opt.base import SolverFactory
+from urbs.persistent import diff_input
+
+
+def test_serpentine_grid():
+    assert urbs.serpentine_grid([[1, 2], ['a', 'b', 'c']]) == [
+        (1, 'a'), (1, 'b'), (1, 'c'), (2, 'c'), (2, 'b'), (2, 'a')]
+    assert urbs.serpentine_grid([]) == [()]
+
+
+def test_set_co2_limit_keeps_structure(data):
+    changed = urbs.set_co2_limit(copy.deepcopy(data), 1e6)
+    assert diff_input(data, changed) == {
+        'res_global_co2_limit': {(2020,)}}
+
+
+def test_missing_global_prop_raises(data):
+    with pytest.raises(ValueError, match="'CO2 budget' is missing"):
+        urbs.set_co2_budget(copy.deepcopy(data), 1e6)
+
+
+def _set_area(data, value):
+    data['site']['area'] = value
+    return data
+
+
+def test_sweep_checks_points_before_solving(data):
+    # the solver is never created, as the check fails first
+    with pytest.raises(ValueError, match="'CO2 budget' is missing"):
+        urbs.sweep(data, {'CO2 budget': (urbs.set_co2_budget, [1e6])},
+                   1, range(0, 7), 'cost', 'no_such_solver')
+    with pytest.raises(ValueError, match="cannot be updated"):
+        urbs.sweep(data, {'area': (_set_area, [1e3])},
+                   1, range(0, 7), 'cost', 'no_such_solver')
+
+
+def test_sweep_matches_separate_solves(data, cbc, tmpdir):
+    timesteps = range(0, 7)
+    limits = [1.5e8, 2e6]
+    table = urbs.sweep(copy.deepcopy(data),
+                       {'CO2 limit': (urbs.set_co2_limit, limits)},
+                       1, timesteps, 'cost', cbc,
+                       logfile=str(tmpdir.join('sweep.log')))
+    costs = table[table['category'] == 'cost'].groupby('CO2 limit')['value']
+    for limit in limits:
+        point = urbs.set_co2_limit(copy.deepcopy(data), limit)
+        prob = urbs.create_model(point, 1, timesteps, 'cost')
+        SolverFactory(cbc).solve(prob)
+        assert costs.sum()[limit] == pytest.approx(
+            pyomo.value(prob.objective_function), rel=1e-6)
+    assert costs.sum()[limits[1]] > costs.sum()[limits[0]]
@@ -0,0 +1,117 @@
+import collections
+import copy
+import pandas as pd
+import pytest
+import urbs
+from urbs.validation import _missing_process_commodities
+
+
+def legacy_missing_process_commodities(data):
+    """Vertex rule check of validate_input before the vectorization; yields
+    the offending (stf, sit, com) tuples in the order they were found."""
+    for (stf, sit, pro) in data['process'].index:
+        for com in data['commodity'].index.get_level_values('Commodity'):
+            simplified_pro_com_index = ([(st, p, c) for st, p, c, d in
+                                         data['process_commodity'].index
+                                         .tolist()])
+            simplified_com_index = ([(st, s, c) for st, s, c, t in
+                                     data['commodity'].index.tolist()])
+            if ((stf, pro, com) in simplified_pro_com_index and
+                    (stf, sit, com) not in simplified_com_index):
+                yield (stf, sit, com)
+
+
+def set_value(df, column, value, row=0):
+    df.iloc[row, df.columns.get_loc(column)] = value
+
+
+def dcpf(tra, **values):
+    """Make the first transmission line a valid DCPF line, then apply
+    values."""
+    values = dict({'reactance': 0.1, 'eff': 1, 'base_voltage': 380,
+                   'difflimit': 45}, **values)
+    for column, value in values.items():
+        set_value(tra, column, value)
+
+
+def rename_site(df, site='Atlantis'):
+    return df.rename(index={'Mid': site}, level=1)
+
+
+CASES = [
+    ('process', lambda pro: set_value(pro, 'cap-lo', 6000), ValueError,
+     'Ensure cap_lo <= cap_up and inst_cap <= cap_up for all processes.'),
+    ('process', lambda pro: set_value(pro, 'inst-cap', 6000), ValueError,
+     'Ensure cap_lo <= cap_up and inst_cap <= cap_up for all processes.'),
+    ('transmission', lambda tra: set_value(tra, 'cap-up', -1), ValueError,
+     'Ensure cap_lo <= cap_up andinst_cap <= cap_up for all '
+     'transmissions.'),
+    ('transmission', lambda tra: dcpf(tra, reactance=-1), ValueError,
+     'Ensure for DCPF transmission lines: reactance > 0 '),
+    ('transmission', lambda tra: dcpf(tra, eff=0.9), ValueError,
+     'Ensure efficiency of DCPF Transmission Lines are 1'),
+    ('transmission', lambda tra: dcpf(tra, base_voltage=0), ValueError,
+     'Ensure base voltage of DCPF transmission lines are greater than 0'),
+    ('transmission', lambda tra: dcpf(tra, difflimit=91), ValueError,
+     'Ensure angle difference of DCPF transmission lines are between 90 '
+     'and 0 degrees'),
+    ('storage', lambda sto: set_value(sto, 'cap-up-p', -1), ValueError,
+     'Ensure cap_lo <= cap_up andinst_cap <= cap_up for all storage '
+     'powers.'),
+    ('storage', lambda sto: set_value(sto, 'cap-up-c', -1), ValueError,
+     'Ensure cap_lo <= cap_up and inst_cap <= cap_up for all storage '
+     'capacities.'),
+]
+
+
+@pytest.mark.parametrize('key, change, error, message', CASES)
+def test_validation_errors(data, key, change, error, message):
+    data = copy.deepcopy(data)
+    urbs.validate_input(data)
+    change(data[key])
+    with pytest.raises(error) as excinfo:
+        urbs.validate_input(data)
+    assert str(excinfo.value).startswith(message)
+    # the offending row is listed
+    assert str(data[key].index[0]) in str(excinfo.value)
+
+
+@pytest.mark.parametrize('key, sheet', [
+    ('commodity', 'Commodity'), ('storage', 'Storage'), ('dsm', 'DSM')])
+def test_unknown_sites(data, key, sheet):
+    data = copy.deepcopy(data)
+    if key == 'commodity':
+        # keep the Mid commodities, so that the vertex rule still holds
+        mid = data[key].xs('Mid', level=1, drop_level=False)
+        data[key] = pd.concat([data[key], rename_site(mid)])
+    else:
+        data[key] = rename_site(data[key])
+    with pytest.raises(KeyError) as excinfo:
+        urbs.validate_input(data)
+    message = ("All names in the column 'Site' in input worksheet '{}' "
+               "must be from the list of site names specified in the "
+               "worksheet 'Site'.".format(sheet))
+    assert excinfo.value.args[0] == message + ' Unknown: Atlantis'
+
+
+@pytest.mark.parametrize('removed', [
+    [], [(2020, 'Mid', 'Gas', 'Stock')],
+    [(2020, 'North', 'Gas', 'Stock'), (2020, 'South', 'CO2', 'Env')],
+    [(2020, 'Mid', 'Elec', 'Demand')]])
+def test_vertex_rule_matches_legacy_check(data, removed):
+    data = copy.deepcopy(data)
+    data['commodity'] = data['commodity'].drop(removed)
+    legacy = list(collections.OrderedDict.fromkeys(
+        legacy_missing_process_commodities(data)))
+    assert _missing_process_commodities(data) == legacy
+    assert bool(legacy) == bool(removed)
+
+    if legacy:
+        stf, sit, com = legacy[0]
+        with pytest.raises(ValueError) as excinfo:
+            urbs.validate_input(data)
+        assert str(excinfo.value).startswith(
+            'Commodities used in a process at a site must be specified in '
+            'the commodity input sheet! The tuple (' + str(stf) + ',' + sit +
+            ',' + com + ') is not in commodity input sheet.! The pair (' +
+            sit + ',' + com + ') is not in commodity input sheet.')
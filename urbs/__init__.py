@@ -16,9 +16,28 @@ from .input import *
 from .validation import validate_input
 from .output import get_constants, get_timeseries
 from .plot import plot, result_figures, to_color
-from .pyomoio import get_entity, get_entities, list_entities
-from .report import report
+from .pyomoio import get_duals, get_entity, get_entities, list_entities
+from .report import report, report_tables
 from .runfunctions import *
-from .saveload import load, save
+from .saveload import create_result_cache, load, migrate_store, \
+                       read_entity, save, save_scenario, list_scenarios, \
+                       load_scenario, get_scenario_entity, \
+                       get_scenario_costs, get_scenario_capacities
 from .scenarios import *
 from .identify import identify_mode, identify_expansion
+from .decomposition import find_site_islands, global_coupling, \
+                           is_decomposable, solve_islands
+from .admm import check_regions, solve_admm
+from .highs import HighsSolver, lp_matrices
+from .persistent import ScenarioSession, diff_input
+from .modelsize import estimate_memory, estimate_model_size, \
+                       model_size_report
+from .profiling import RuleProfiler, Telemetry
+from .synthetic import synthetic_input, write_input
+from .benchmark import BENCHMARK_GRID, benchmark_case, benchmark_table, \
+                        compare_benchmark, run_benchmark
+from .regression import REGRESSION_WORKLOADS, compare_regression, \
+                         format_regression, run_regression, \
+                         write_regression
+from .sweep import sweep, sweep_results, serpentine_grid, set_co2_limit, \
+                   set_co2_budget, scale_stock_prices
@@ -0,0 +1,387 @@
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import warnings
+import pandas as pd
+import pyomo.core as pyomo
+from pyomo.opt.base import SolverFactory
+from .decomposition import global_coupling, merge_result_caches, split_data
+from .identify import identify_mode
+from .model import create_model
+from .saveload import ResultContainer, create_result_cache
+
+logger = logging.getLogger(__name__)
+
+# solvers without support for the quadratic consensus penalty
+LP_SOLVERS = ['glpk', 'highs', 'cbc', 'clp']
+
+# seconds to wait for region results before checking that the region
+# processes are still alive
+WORKER_POLL_INTERVAL = 1.0
+
+
+def check_regions(data, regions):
+    """Check that ADMM regions partition the sites of a model.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - regions: list of site name lists
+
+    Raises:
+        ValueError if a region is empty, contains unknown sites, or if a
+        site belongs to no or several regions
+    """
+    sites = data['site'].index.get_level_values('Name').unique()
+    assigned = pd.Series([site for group in regions for site in group])
+
+    empty = [r for r, group in enumerate(regions) if not len(group)]
+    if empty:
+        raise ValueError('ADMM regions {} contain no sites.'.format(empty))
+    unknown = sorted(set(assigned) - set(sites))
+    if unknown:
+        raise ValueError('ADMM regions contain unknown sites {}.'.format(
+            unknown))
+    counts = assigned.value_counts()
+    overlapping = sorted(counts.index[counts > 1])
+    if overlapping:
+        raise ValueError('Sites {} belong to several ADMM regions.'.format(
+            overlapping))
+    missing = sorted(set(sites) - set(assigned))
+    if missing:
+        raise ValueError('Sites {} belong to no ADMM region.'.format(
+            missing))
+
+
+def region_data(data, sites):
+    """Input data for one ADMM region.
+
+    Contains the region's own sites plus all transmission lines with at
+    least one end in the region. Sites at the far end of border lines are
+    added as "ghost" sites, which only carry the site row and the commodity
+    rows of the transported commodities. Their commodity balance is
+    deactivated in the region model, so they act as free boundary nodes.
+
+    To count each line only once in the total costs, a directed line only
+    keeps its costs in the region of its 'Site In'.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - sites: list of site names in the region
+
+    Returns:
+        (region data dict, list of ghost site names) tuple
+    """
+    sub = split_data(data, sites)
+    transmission = data['transmission']
+    if transmission.empty:
+        return sub, []
+
+    sin = transmission.index.get_level_values('Site In')
+    sout = transmission.index.get_level_values('Site Out')
+    lines = transmission[sin.isin(sites) | sout.isin(sites)].copy()
+
+    line_sites = (set(lines.index.get_level_values('Site In')) |
+                  set(lines.index.get_level_values('Site Out')))
+    ghosts = sorted(line_sites - set(sites))
+    transported = set(lines.index.get_level_values('Commodity'))
+
+    site = data['site']
+    ghost_site = site[site.index.get_level_values('Name').isin(ghosts)]
+    sub['site'] = pd.concat([sub['site'], ghost_site]).sort_index()
+
+    commodity = data['commodity']
+    ghost_commodity = commodity[
+        commodity.index.get_level_values('Site').isin(ghosts) &
+        commodity.index.get_level_values('Commodity').isin(transported)]
+    sub['commodity'] = pd.concat(
+        [sub['commodity'], ghost_commodity]).sort_index()
+
+    foreign = ~lines.index.get_level_values('Site In').isin(sites)
+    for cost in ['inv-cost', 'fix-cost', 'var-cost']:
+        lines.loc[foreign, cost] = 0
+    sub['transmission'] = lines
+
+    return sub, ghosts
+
+
+def border_variables(data, sites, timesteps):
+    """List the transmission variables a region shares with its neighbours.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - sites: list of site names in the region
+        - timesteps: a list of timesteps, e.g. range(0,8761)
+
+    Returns:
+        list of (variable name, index) tuples for e_tra_in, e_tra_out (per
+        modelled timestep) and cap_tra_new of all border lines
+    """
+    if data['transmission'].empty:
+        return []
+
+    shared = []
+    for line in data['transmission'].index:
+        stf, sin, sout, tra, com = line
+        if (sin in sites) == (sout in sites):
+            # internal (or unrelated) line
+            continue
+        shared.append(('cap_tra_new', line))
+        for tm in list(timesteps)[1:]:
+            shared.append(('e_tra_in', (tm,) + line))
+            shared.append(('e_tra_out', (tm,) + line))
+    return shared
+
+
+def _restrict_cache(cache, sites):
+    """Drop result entries of ghost sites from a region result cache."""
+    restricted = {}
+    for name, entity in cache.items():
+        if 'sit' in entity.index.names and not entity.empty:
+            entity = entity[
+                entity.index.get_level_values('sit').isin(sites)]
+        restricted[name] = entity
+    return restricted
+
+
+def _region_worker(region, data, ghosts, shared, dt, timesteps, objective,
+                   solver, logfile, rho, duals, result_profile, tasks,
+                   results):
+    """Region subproblem process for solve_admm.
+
+    Builds the region model once and then solves it for every (z, lambda)
+    task received on the task queue, returning the local values of the
+    shared variables. A None task ends the loop; the worker then returns
+    its result cache (c.f. create_result_cache for duals and
+    result_profile).
+    """
+    # imported here, as runfunctions itself imports this module
+    from .runfunctions import setup_solver
+
+    try:
+        prob = create_model(data, dt, timesteps, objective,
+                            dual=bool(duals))
+
+        # ghost sites are boundary nodes without commodity balance
+        for (tm, stf, sit, com, com_type), con in prob.res_vertex.items():
+            if sit in ghosts:
+                con.deactivate()
+
+        # augmented Lagrangian:
+        # objective + lambda * (x - z) + rho / 2 * (x - z)^2
+        variables = [getattr(prob, name)[index] for name, index in shared]
+        prob.admm_keys = pyomo.Set(
+            initialize=range(len(shared)),
+            ordered=True,
+            doc='Indices of variables shared with neighbouring regions')
+        prob.admm_z = pyomo.Param(
+            prob.admm_keys, initialize=0, mutable=True,
+            doc='Consensus value of shared variables')
+        prob.admm_lambda = pyomo.Param(
+            prob.admm_keys, initialize=0, mutable=True,
+            doc='Dual price of shared variables')
+        prob.admm_rho = pyomo.Param(
+            initialize=rho, mutable=True,
+            doc='ADMM penalty parameter')
+
+        prob.objective_function.deactivate()
+        prob.admm_objective = pyomo.Objective(
+            expr=prob.objective_function.expr + pyomo.quicksum(
+                prob.admm_lambda[k] * (variables[k] - prob.admm_z[k]) +
+                prob.admm_rho / 2 * (variables[k] - prob.admm_z[k]) ** 2
+                for k in prob.admm_keys),
+            sense=pyomo.minimize,
+            doc='objective + ADMM consensus penalty')
+
+        optim = setup_solver(SolverFactory(solver), logfile=logfile)
+
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            z, lam = task
+            for k in prob.admm_keys:
+                prob.admm_z[k] = z[k]
+                prob.admm_lambda[k] = lam[k]
+            result = optim.solve(prob, tee=False)
+            assert str(result.solver.termination_condition) == 'optimal'
+            results.put((region, [pyomo.value(v) for v in variables]))
+
+        cache = create_result_cache(prob, duals=duals,
+                                    profile=result_profile)
+        results.put((region, {name: entity
+                              for name, entity in cache.items()
+                              if not name.startswith('admm_')}))
+    except Exception as err:
+        results.put((region, err))
+
+
+def solve_admm(data, regions, dt, timesteps, objective, solver, rho=1.0,
+               tolerance=1e-2, max_iter=200, logfile='solver.log',
+               duals=True, result_profile='full'):
+    """Solve a model by ADMM spatial decomposition across site regions.
+
+    The model is split into one subproblem per region. The transmission
+    flows (e_tra_in, e_tra_out) and capacities (cap_tra_new) of lines
+    crossing region borders are duplicated in both adjacent regions and
+    driven to consensus by the alternating direction method of multipliers.
+    Every region subproblem runs in its own process and stays built for all
+    iterations; the coordinator communicates with it through plain
+    multiprocessing queues, which may be replaced by queues of a
+    multiprocessing manager to spread the regions across nodes.
+
+    As the consensus penalty is quadratic, the solver must support QPs
+    (e.g. gurobi or cplex); LP solvers (c.f. LP_SOLVERS) are rejected. Global
+    CO2 or cost constraints couple all sites and are not decomposed; DC
+    power flow is not supported. The residuals of each iteration are logged
+    (logger urbs.admm, level INFO) and kept in the result.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - regions: list of site name lists, or dict of region name: site
+          name list; every site must belong to exactly one region, else a
+          ValueError is raised (c.f. check_regions)
+        - dt: length of each time step (unit: hours)
+        - timesteps: a list of timesteps, e.g. range(0,8761)
+        - objective: objective function chosen (either "cost" or "CO2")
+        - solver: the user specified (QP capable) solver
+        - rho: (optional) ADMM penalty parameter, default: 1.0
+        - tolerance: (optional) convergence threshold for the primal and
+          dual residual, default: 1e-2
+        - max_iter: (optional) maximum number of iterations, default: 200
+        - logfile: solver log filename; region number is appended
+        - duals: (optional) True, False or a list of constraint names whose
+          duals are kept (c.f. create_result_cache); at convergence, the
+          region duals are those of the complete model, default: True
+        - result_profile: (optional) result cache profile of the regions
+          (c.f. create_result_cache), default: 'full'
+
+    Returns:
+        a ResultContainer with the input data and the merged result cache;
+        its attributes admm_iterations and admm_residuals hold the number
+        of iterations and the (primal, dual) residuals of each
+    """
+    if solver in LP_SOLVERS:
+        raise ValueError("ADMM needs a solver for quadratic programs (e.g. "
+                         "'gurobi' or 'cplex'); '{}' only solves linear "
+                         "programs.".format(solver))
+    if global_coupling(data, objective):
+        raise ValueError('Global constraints ({}) couple all sites and '
+                         'cannot be decomposed by ADMM.'.format(
+                             ', '.join(global_coupling(data, objective))))
+    if identify_mode(data)['dpf']:
+        raise NotImplementedError('ADMM decomposition does not support DC '
+                                  'power flow transmission lines.')
+
+    if isinstance(regions, dict):
+        regions = list(regions.values())
+    check_regions(data, regions)
+    timesteps = list(timesteps)
+
+    # local copies of shared variables per region and the regions holding
+    # each shared variable
+    shared = [border_variables(data, sites, timesteps) for sites in regions]
+    holders = {}
+    for r, keys in enumerate(shared):
+        for key in keys:
+            holders.setdefault(key, []).append(r)
+
+    log_base, log_ext = os.path.splitext(logfile)
+    results = multiprocessing.Queue()
+    tasks = []
+    workers = []
+    for r, sites in enumerate(regions):
+        sub, ghosts = region_data(data, sites)
+        tasks.append(multiprocessing.Queue())
+        worker = multiprocessing.Process(
+            target=_region_worker,
+            args=(r, sub, ghosts, shared[r], dt, timesteps, objective,
+                  solver, '{}-region{}{}'.format(log_base, r, log_ext),
+                  rho, duals, result_profile, tasks[r], results))
+        worker.start()
+        workers.append(worker)
+
+    def stop_workers():
+        for worker in workers:
+            worker.terminate()
+
+    def collect():
+        answers = {}
+        dead = []
+        while len(answers) < len(regions):
+            try:
+                r, answer = results.get(timeout=WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                # a region process that ended without answering has died;
+                # give it one more interval, as its last answer may still
+                # be on its way
+                lost = [r for r, worker in enumerate(workers)
+                        if r not in answers and not worker.is_alive()]
+                if dead and lost:
+                    stop_workers()
+                    raise RuntimeError(
+                        'ADMM region {} process died (exit code {}).'.format(
+                            lost[0], workers[lost[0]].exitcode))
+                dead = lost
+                continue
+            if isinstance(answer, Exception):
+                stop_workers()
+                raise RuntimeError('ADMM region {} failed: {!r}'.format(
+                    r, answer)) from answer
+            answers[r] = answer
+        return answers
+
+    residuals = []
+    z = {key: 0.0 for key in holders}
+    lam = {(r, key): 0.0 for r, keys in enumerate(shared) for key in keys}
+
+    for iteration in range(1, max_iter + 1):
+        for r, keys in enumerate(shared):
+            tasks[r].put(([z[key] for key in keys],
+                          [lam[r, key] for key in keys]))
+        x = {r: dict(zip(shared[r], values))
+             for r, values in collect().items()}
+
+        # consensus update: average of the local copies (scaled form)
+        z_old = z
+        z = {key: sum(x[r][key] + lam[r, key] / rho for r in owners) /
+             len(owners)
+             for key, owners in holders.items()}
+
+        # dual update and residuals
+        primal = dual = 0.0
+        for key, owners in holders.items():
+            for r in owners:
+                lam[r, key] += rho * (x[r][key] - z[key])
+                primal += (x[r][key] - z[key]) ** 2
+            dual += len(owners) * (rho * (z[key] - z_old[key])) ** 2
+        primal, dual = math.sqrt(primal), math.sqrt(dual)
+
+        residuals.append((primal, dual))
+        logger.info('ADMM iteration %d: primal residual %.3g, dual residual '
+                    '%.3g', iteration, primal, dual)
+        if primal <= tolerance and dual <= tolerance:
+            break
+    else:
+        warnings.warn('solve_admm: no convergence after {} iterations '
+                      '(primal residual {:.3g}, dual residual {:.3g}).'
+                      .format(max_iter, primal, dual))
+
+    for task in tasks:
+        task.put(None)
+    caches = collect()
+    for worker in workers:
+        worker.join()
+
+    caches = [_restrict_cache(caches[r], sites)
+              for r, sites in enumerate(regions)]
+
+    # mode and demand_dict mimic the attributes of a model instance that
+    # the reporting functions (get_timeseries) rely on
+    prob = ResultContainer(data, merge_result_caches(caches))
+    prob.mode = identify_mode(data)
+    prob.demand_dict = data['demand'].to_dict()
+    prob.admm_iterations = iteration
+    prob.admm_residuals = residuals
+    return prob
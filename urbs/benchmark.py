@@ -0,0 +1,198 @@
+import copy
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+from .input import pyomo_model_prep, read_input
+from .model import create_model
+from .plot import sort_plot_elements
+from .profiling import Telemetry
+from .report import report
+from .saveload import create_result_cache
+from .synthetic import synthetic_input, write_input
+
+# named problem sizes (keyword arguments of synthetic_input)
+BENCHMARK_GRID = {
+    'tiny': dict(sites=2, processes=2, commodities=1, storages=1,
+                 transmissions=1, dsm=0, timesteps=24),
+    'small': dict(sites=3, processes=4, commodities=2, storages=1,
+                  transmissions=2, dsm=1, timesteps=168),
+    'medium': dict(sites=10, processes=8, commodities=3, storages=2,
+                   transmissions=15, dsm=3, timesteps=672),
+    'large': dict(sites=30, processes=12, commodities=4, storages=2,
+                  transmissions=60, dsm=10, timesteps=2190),
+    'intertemporal': dict(sites=5, processes=6, commodities=2, storages=1,
+                          transmissions=6, dsm=0, support_timeframes=3,
+                          timesteps=168),
+}
+
+
+def benchmark_case(size, solver=None, workdir=None):
+    """Time the stages of one urbs run on synthetic input.
+
+    Stages: writing and reading the input spreadsheets (read_input),
+    pyomo_model_prep, create_model, (optionally) solve, create_result_cache
+    and, if solved, report.
+
+    Args:
+        - size: dict of keyword arguments of synthetic_input
+        - solver: (optional) solver name; if None, the model is not solved
+          and report is skipped
+        - workdir: (optional) directory for the input and report files,
+          default: a temporary directory that is removed afterwards
+
+    Returns:
+        dict with the size, model statistics and the phases recorded by
+        Telemetry (wall, cpu, rss_start, rss_peak, rss_end)
+    """
+    # imported here, as runfunctions imports most other modules
+    from .runfunctions import create_solver, setup_solver
+
+    cleanup = workdir is None
+    if cleanup:
+        workdir = tempfile.mkdtemp(prefix='urbs-benchmark-')
+    telemetry = Telemetry()
+    try:
+        data = synthetic_input(**size)
+        input_dir = os.path.join(workdir, 'input')
+        write_input(data, input_dir)
+
+        with telemetry.phase('read_input'):
+            data = read_input(input_dir, date.today().year)
+        timesteps = range(size.get('timesteps', 168) + 1)
+        stfs = data['global_prop'].index.get_level_values(0).unique()
+
+        with telemetry.phase('pyomo_model_prep'):
+            pyomo_model_prep(copy.deepcopy(data), list(timesteps))
+        with telemetry.phase('create_model'):
+            prob = create_model(data, 1, timesteps, 'cost', dual=False,
+                                telemetry=telemetry)
+
+        solved = False
+        if solver is not None:
+            optim = setup_solver(create_solver(solver),
+                                 logfile=os.path.join(workdir, 'solver.log'))
+            with telemetry.phase('solve'):
+                result = optim.solve(prob, tee=False)
+            solved = (str(result.solver.termination_condition) ==
+                      'optimal')
+
+        with telemetry.phase('create_result_cache'):
+            prob._result = create_result_cache(prob)
+        if solved:
+            report_tuples = [(stf, sit, com) for stf in stfs
+                             for (sit, com) in data['demand'].columns]
+            with telemetry.phase('report'):
+                report(prob, os.path.join(workdir, 'report.xlsx'),
+                       report_tuples=report_tuples)
+
+        return {'size': size,
+                'solved': solved,
+                'variables': prob.nvariables(),
+                'constraints': prob.nconstraints(),
+                'phases': telemetry.phases}
+    finally:
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def benchmark_sort_plot_elements(rows=8760, columns=100, repeat=5, seed=0):
+    """Time sort_plot_elements on a random timeseries frame.
+
+    Returns:
+        dict with the frame shape and the best wall time of repeat runs
+    """
+    rng = np.random.RandomState(seed)
+    elements = pd.DataFrame(rng.rand(rows, columns),
+                            columns=['c{}'.format(k) for k in range(columns)])
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sort_plot_elements(elements)
+        times.append(time.perf_counter() - start)
+    return {'rows': rows, 'columns': columns, 'wall': min(times)}
+
+
+def run_benchmark(sizes=None, solver=None, repeat=1, filename=None):
+    """Run benchmark_case for a grid of problem sizes.
+
+    Args:
+        - sizes: (optional) list of names of BENCHMARK_GRID or dict of
+          name: synthetic_input keyword arguments, default: tiny and small
+        - solver: (optional) solver name, c.f. benchmark_case
+        - repeat: (optional) number of runs per size; the run with the
+          smallest total wall time is kept
+        - filename: (optional) JSON file the results are written to
+
+    Returns:
+        dict with machine information and one result per size name
+    """
+    if sizes is None:
+        sizes = ['tiny', 'small']
+    if not isinstance(sizes, dict):
+        sizes = {name: BENCHMARK_GRID[name] for name in sizes}
+
+    results = {}
+    for name, size in sizes.items():
+        runs = [benchmark_case(size, solver=solver) for _ in range(repeat)]
+        results[name] = min(runs, key=lambda run: sum(
+            phase['wall'] for phase in run['phases']))
+
+    benchmark = {
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'results': results,
+        'sort_plot_elements': benchmark_sort_plot_elements(),
+    }
+    if filename is not None:
+        with open(filename, 'w') as f:
+            json.dump(benchmark, f, indent=2, default=str)
+    return benchmark
+
+
+def benchmark_table(benchmark):
+    """Return the phase timings of a benchmark result as a DataFrame.
+
+    Args:
+        - benchmark: dict as returned by run_benchmark (or loaded from its
+          JSON file)
+
+    Returns:
+        a DataFrame indexed by (size, phase) with the columns wall, cpu and
+        rss_peak
+    """
+    rows = []
+    for name, result in benchmark['results'].items():
+        for phase in result['phases']:
+            rows.append((name, phase['name'], phase['wall'], phase['cpu'],
+                         phase['rss_peak']))
+    return pd.DataFrame(rows, columns=['size', 'phase', 'wall', 'cpu',
+                                       'rss_peak']).set_index(['size',
+                                                               'phase'])
+
+
+def compare_benchmark(benchmark, baseline):
+    """Compare the phase timings of two benchmark results.
+
+    Args:
+        - benchmark: dict as returned by run_benchmark
+        - baseline: dict as returned by run_benchmark, e.g. loaded from an
+          earlier JSON file
+
+    Returns:
+        a DataFrame indexed by (size, phase) with the wall time, CPU time
+        and peak RSS of both results and their ratios (current / baseline)
+    """
+    current = benchmark_table(benchmark)
+    base = benchmark_table(baseline)
+    table = current.join(base, rsuffix='_baseline', how='outer')
+    for column in ['wall', 'cpu', 'rss_peak']:
+        table[column + '_ratio'] = table[column] / table[column + '_baseline']
+    return table
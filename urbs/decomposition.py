@@ -0,0 +1,258 @@
+import math
+import multiprocessing
+import os
+import pandas as pd
+from .identify import identify_mode
+from .model import create_model
+from .saveload import ResultContainer, create_result_cache
+
+
+def find_site_islands(data):
+    """Find groups of sites that are connected by transmission lines.
+
+    Builds the (undirected) site connectivity graph from the index of the
+    transmission table and returns its connected components. Sites without
+    any transmission line form an island of their own.
+
+    Args:
+        - data: input data dict as returned by read_input
+
+    Returns:
+        a list of site name lists, one per connected component, in order of
+        first appearance in the site table
+    """
+    sites = data['site'].index.get_level_values('Name').unique().tolist()
+
+    # union-find forest over all site names
+    parent = {site: site for site in sites}
+
+    def find(site):
+        while parent[site] != site:
+            parent[site] = parent[parent[site]]
+            site = parent[site]
+        return site
+
+    if not data['transmission'].empty:
+        index = data['transmission'].index
+        for sin, sout in zip(index.get_level_values('Site In'),
+                             index.get_level_values('Site Out')):
+            parent.setdefault(sin, sin)
+            parent.setdefault(sout, sout)
+            if sin not in sites:
+                sites.append(sin)
+            if sout not in sites:
+                sites.append(sout)
+            parent[find(sin)] = find(sout)
+
+    islands = {}
+    for site in sites:
+        islands.setdefault(find(site), []).append(site)
+    return list(islands.values())
+
+
+def global_coupling(data, objective='cost'):
+    """List the global properties that couple all sites of a model.
+
+    Apart from transmission, sites only interact through the global
+    constraints of create_model. A property couples the sites if the
+    corresponding constraint is not skipped, i.e. its value is finite and
+    non-negative.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - objective: either "cost" or "CO2", as passed to create_model
+
+    Returns:
+        list of coupling property names from the global_prop table, e.g.
+        ['CO2 limit']; an empty list if the sites are independent
+    """
+    intertemporal = identify_mode(data)['int']
+    if objective == 'cost':
+        properties = ['CO2 limit']
+        if intertemporal:
+            properties.append('CO2 budget')
+    else:
+        properties = ['Cost limit']
+        if intertemporal:
+            properties.append('CO2 limit')
+
+    global_prop = data['global_prop']['value']
+    stf_min = global_prop.index.get_level_values(0).min()
+
+    coupling = []
+    for prop in properties:
+        try:
+            values = global_prop.xs(prop, level=1)
+        except KeyError:
+            continue
+        if prop in ('CO2 budget', 'Cost limit'):
+            # these constraints only read the value of the first stf
+            values = values.loc[[stf_min]]
+        values = pd.to_numeric(values, errors='coerce')
+        if any(value >= 0 and not math.isinf(value) for value in values):
+            coupling.append(prop)
+    return coupling
+
+
+def is_decomposable(data, objective='cost'):
+    """Check whether a model splits into independently solvable islands.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - objective: either "cost" or "CO2", as passed to create_model
+
+    Returns:
+        True if there is more than one site island and no global constraint
+        couples them
+    """
+    return (len(find_site_islands(data)) > 1 and
+            not global_coupling(data, objective))
+
+
+def split_data(data, sites):
+    """Restrict an input data dict to a subset of sites.
+
+    Rows and timeseries columns of other sites are dropped. Tables without
+    a site dimension (global_prop, process_commodity, buy_sell_price) are
+    shared unchanged.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - sites: list of site names to keep
+
+    Returns:
+        a new data dict with copies of the restricted DataFrames
+    """
+    # site level names of the row-indexed input tables
+    site_levels = {
+        'site': ['Name'],
+        'commodity': ['Site'],
+        'process': ['Site'],
+        'transmission': ['Site In', 'Site Out'],
+        'storage': ['Site'],
+        'dsm': ['Site'],
+    }
+    # timeseries tables with (site, ...) column MultiIndex
+    site_columns = ['demand', 'supim', 'eff_factor']
+
+    sub = {}
+    for key, df in data.items():
+        if df.empty:
+            sub[key] = df.copy()
+        elif key in site_levels:
+            mask = True
+            for level in site_levels[key]:
+                mask = mask & df.index.get_level_values(level).isin(sites)
+            sub[key] = df[mask].copy()
+        elif key in site_columns:
+            sub[key] = df.loc[:, df.columns.get_level_values(0).isin(sites)]
+        else:
+            sub[key] = df.copy()
+    return sub
+
+
+def merge_result_caches(caches, summed=('costs',)):
+    """Merge result caches of independent submodels into one cache.
+
+    Entities are concatenated along their index. Entries that occur in
+    several caches (e.g. global sets or scalar parameters) are kept once,
+    except for the entities listed in summed, whose values are added up.
+
+    Args:
+        - caches: list of result cache dicts (c.f. create_result_cache)
+        - summed: names of entities to sum over all caches, default: costs
+
+    Returns:
+        the merged result cache dict
+    """
+    names = []
+    for cache in caches:
+        names.extend(name for name in cache if name not in names)
+
+    merged = {}
+    for name in names:
+        parts = [cache[name] for cache in caches if name in cache]
+        filled = [part for part in parts if not part.empty]
+        if not filled:
+            merged[name] = parts[0]
+            continue
+
+        result = pd.concat(filled)
+        if name in summed:
+            result = result.groupby(
+                level=list(range(result.index.nlevels)), sort=False).sum()
+        else:
+            result = result[~result.index.duplicated(keep='first')]
+        merged[name] = result
+    return merged
+
+
+def _solve_island(args):
+    """Build and solve one island model; worker function for solve_islands.
+
+    Returns:
+        the result cache of the solved island model
+    """
+    # imported here, as runfunctions itself imports this module
+    from .runfunctions import create_solver, setup_solver
+
+    (data, dt, timesteps, objective, solver, logfile,
+     duals, result_profile) = args
+    prob = create_model(data, dt, timesteps, objective, dual=bool(duals))
+    optim = create_solver(solver)
+    optim = setup_solver(optim, logfile=logfile)
+    result = optim.solve(prob, tee=False)
+    assert str(result.solver.termination_condition) == 'optimal'
+    return create_result_cache(prob, duals=duals, profile=result_profile)
+
+
+def solve_islands(data, dt, timesteps, objective, solver,
+                  logfile='solver.log', processes=None, duals=True,
+                  result_profile='full'):
+    """Solve each site island as an independent model in parallel.
+
+    Only valid if is_decomposable(data, objective) holds; the sum of the
+    island optima then equals the optimum of the complete model.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - dt: length of each time step (unit: hours)
+        - timesteps: a list of timesteps, e.g. range(0,8761)
+        - objective: objective function chosen (either "cost" or "CO2")
+        - solver: the user specified solver
+        - logfile: solver log filename; island number is appended
+        - processes: (optional) number of worker processes, default: one per
+          island, at most the number of CPUs
+        - duals: (optional) True, False or a list of constraint names whose
+          duals are kept (c.f. create_result_cache), default: True
+        - result_profile: (optional) result cache profile of the islands
+          (c.f. create_result_cache), default: 'full'
+
+    Returns:
+        a ResultContainer with the input data and the merged result cache
+    """
+    islands = [sites for sites in find_site_islands(data)
+               if not split_data(data, sites)['commodity'].empty]
+
+    log_base, log_ext = os.path.splitext(logfile)
+    jobs = [(split_data(data, sites), dt, list(timesteps), objective, solver,
+             '{}-island{}{}'.format(log_base, k, log_ext), duals,
+             result_profile)
+            for k, sites in enumerate(islands)]
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(jobs))
+
+    if processes > 1:
+        with multiprocessing.Pool(processes) as pool:
+            caches = pool.map(_solve_island, jobs)
+    else:
+        caches = [_solve_island(job) for job in jobs]
+
+    # mode and demand_dict mimic the attributes of a model instance that
+    # the reporting functions (get_timeseries) rely on
+    prob = ResultContainer(data, merge_result_caches(caches))
+    prob.mode = identify_mode(data)
+    prob.demand_dict = data['demand'].to_dict()
+    return prob
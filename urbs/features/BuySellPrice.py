@@ -9,10 +9,12 @@ def add_buy_sell_price(m):
     m.com_sell = pyomo.Set(
         within=m.com,
         initialize=commodity_subset(m.com_tuples, 'Sell'),
+        ordered=True,
         doc='Commodities that can be sold')
     m.com_buy = pyomo.Set(
         within=m.com,
         initialize=commodity_subset(m.com_tuples, 'Buy'),
+        ordered=True,
         doc='Commodities that can be purchased')
 
     # Variables
@@ -130,8 +132,9 @@ def search_sell_buy_tuple(m, stf, sit_in, pro_in, coin):
     Returns:
         a process
     """
-    pro_output_tuples = list(m.pro_output_tuples.value)
-    pro_input_tuples = list(m.pro_input_tuples.value)
+    # iterate the ordered sets themselves; their .value is an unordered set
+    pro_output_tuples = list(m.pro_output_tuples)
+    pro_input_tuples = list(m.pro_input_tuples)
     # search the output commodities for the "buy" process
     # buy_out = (stf, site, output_commodity)
     buy_out = set([(x[0], x[1], x[3])
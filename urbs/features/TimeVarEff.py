@@ -12,11 +12,12 @@ def add_time_variable_efficiency(m):
     m.pro_timevar_output_tuples = pyomo.Set(
         within=m.stf * m.sit * m.pro * m.com,
         initialize=[(stf, site, process, commodity)
-                    for stf in tve_stflist
+                    for stf in sorted(tve_stflist)
                     for (site, process) in tuple(m.eff_factor_dict.keys())
                     for (st, pro, commodity) in tuple(m.r_out_dict.keys())
                     if process == pro and st == stf and commodity not in
                     m.com_env],
+        ordered=True,
         doc='Outputs of processes with time dependent efficiency')
 
     # time variable efficiency rules
@@ -16,6 +16,7 @@ def add_dsm(m):
     m.dsm_site_tuples = pyomo.Set(
         within=m.stf*m.sit*m.com,
         initialize=tuple(m.dsm_dict["delay"].keys()),
+        ordered=True,
         doc='Combinations of possible dsm by site, e.g. '
             '(2020, Mid, Elec)')
     m.dsm_down_tuples = pyomo.Set(
@@ -25,6 +26,7 @@ def add_dsm(m):
                     in dsm_down_time_tuples(m.timesteps[1:],
                                             m.dsm_site_tuples,
                                             m)],
+        ordered=True,
         doc='Combinations of possible dsm_down combinations, e.g. '
             '(5001,5003,2020,Mid,Elec)')
 
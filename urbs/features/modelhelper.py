@@ -151,17 +151,18 @@ def commodity_subset(com_tuples, type_name):
         com_tuples: a list of (site, commodity, commodity type) tuples
         type_name: a commodity type or a list of a commodity types
     Returns:
-        The set (unique elements/list) of commodity names of the desired type
+        The sorted list of unique commodity names of the desired type
     """
     if type(type_name) is str:
         # type_name: ('Stock', 'SupIm', 'Env' or 'Demand')
-        return set(com for stf, sit, com, com_type in com_tuples
-                   if com_type == type_name)
+        return sorted(set(com for stf, sit, com, com_type in com_tuples
+                          if com_type == type_name))
     else:
         # type(type_name) is a class 'pyomo.base.sets.SimpleSet'
         # type_name: ('Buy')=>('Elec buy', 'Heat buy')
-        return set((stf, sit, com, com_type) for stf, sit, com, com_type
-                   in com_tuples if com in type_name)
+        return sorted(set((stf, sit, com, com_type)
+                          for stf, sit, com, com_type in com_tuples
+                          if com in type_name))
 
 
 def op_pro_tuples(pro_tuple, m):
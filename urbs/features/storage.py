@@ -9,13 +9,15 @@ def add_storage(m):
     for key in m.storage_dict["eff-in"]:
         indexlist.add(tuple(key)[2])
     m.sto = pyomo.Set(
-        initialize=indexlist,
+        initialize=sorted(indexlist),
+        ordered=True,
         doc='Set of storage technologies')
 
     # storage tuples
     m.sto_tuples = pyomo.Set(
         within=m.stf * m.sit * m.sto * m.com,
         initialize=tuple(m.storage_dict["eff-in"].keys()),
+        ordered=True,
         doc='Combinations of possible storage by site,'
             'e.g. (2020,Mid,Bat,Elec)')
 
@@ -26,6 +28,7 @@ def add_storage(m):
             initialize=[(sit, sto, com, stf, stf_later)
                         for (sit, sto, com, stf, stf_later)
                         in op_sto_tuples(m.sto_tuples, m)],
+            ordered=True,
             doc='Processes that are still operational through stf_later'
                 '(and the relevant years following), if built in stf'
                 'in stf.')
@@ -34,18 +37,21 @@ def add_storage(m):
             initialize=[(sit, sto, com, stf)
                         for (sit, sto, com, stf)
                         in inst_sto_tuples(m)],
+            ordered=True,
             doc='Installed storages that are still operational through stf')
 
     # storage tuples for storages with fixed initial state
     m.sto_init_bound_tuples = pyomo.Set(
         within=m.stf * m.sit * m.sto * m.com,
         initialize=tuple(m.stor_init_bound_dict.keys()),
+        ordered=True,
         doc='storages with fixed initial state')
 
     # storage tuples for storages with given energy to power ratio
     m.sto_ep_ratio_tuples = pyomo.Set(
         within=m.stf * m.sit * m.sto * m.com,
         initialize=tuple(m.sto_ep_ratio_dict.keys()),
+        ordered=True,
         doc='storages with given energy to power ratio')
 
     # Variables
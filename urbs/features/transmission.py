@@ -10,8 +10,9 @@ def e_tra_domain_rule(m, tm, stf, sin, sout, tra, com):
 
 
 def remove_duplicate_transmission(transmission_keys):
-    # removing duplicate transmissions for DCPF
-    tra_tuple_list = list(transmission_keys)
+    # removing duplicate transmissions for DCPF; sorted, so that the kept
+    # direction does not depend on the set iteration order
+    tra_tuple_list = sorted(transmission_keys)
     i = 0
     while i < len(tra_tuple_list):
         for k in range(len(tra_tuple_list)):
@@ -33,13 +34,15 @@ def add_transmission(m):
     for key in m.transmission_dict["eff"]:
         indexlist.add(tuple(key)[3])
     m.tra = pyomo.Set(
-        initialize=indexlist,
+        initialize=sorted(indexlist),
+        ordered=True,
         doc='Set of transmission technologies')
 
     # transmission tuples
     m.tra_tuples = pyomo.Set(
         within=m.stf * m.sit * m.sit * m.tra * m.com,
         initialize=tuple(m.transmission_dict["eff"].keys()),
+        ordered=True,
         doc='Combinations of possible transmissions, e.g. '
             '(2020,South,Mid,hvac,Elec)')
 
@@ -49,6 +52,7 @@ def add_transmission(m):
             initialize=[(sit, sit_, tra, com, stf, stf_later)
                         for (sit, sit_, tra, com, stf, stf_later)
                         in op_tra_tuples(m.tra_tuples, m)],
+            ordered=True,
             doc='Transmissions that are still operational through stf_later'
                 '(and the relevant years following), if built in stf'
                 'in stf.')
@@ -57,6 +61,7 @@ def add_transmission(m):
             initialize=[(sit, sit_, tra, com, stf)
                         for (sit, sit_, tra, com, stf)
                         in inst_tra_tuples(m)],
+            ordered=True,
             doc='Installed transmissions that are still operational'
                 'through stf')
 
@@ -120,13 +125,15 @@ def add_transmission_dc(m):
     for key in m.transmission_dict["eff"]:
         indexlist.add(tuple(key)[3])
     m.tra = pyomo.Set(
-        initialize=indexlist,
+        initialize=sorted(indexlist),
+        ordered=True,
         doc='Set of transmission technologies')
 
     # Transport and DCPF transmission tuples
     m.tra_tuples = pyomo.Set(
         within=m.stf * m.sit * m.sit * m.tra * m.com,
-        initialize=tuple(tra_tuples),
+        initialize=sorted(tra_tuples),
+        ordered=True,
         doc='Combinations of possible transmissions,'
             'without duplicate dc transmissions'
             ' e.g. (2020,South,Mid,hvac,Elec)')
@@ -134,14 +141,16 @@ def add_transmission_dc(m):
     # DCPF transmission tuples
     m.tra_tuples_dc = pyomo.Set(
         within=m.stf * m.sit * m.sit * m.tra * m.com,
-        initialize=tuple(tra_tuples_dc),
+        initialize=sorted(tra_tuples_dc),
+        ordered=True,
         doc='Combinations of possible bidirectional dc'
             'transmissions, e.g. (2020,South,Mid,hvac,Elec)')
 
     # Transport transmission tuples
     m.tra_tuples_tp = pyomo.Set(
         within=m.stf * m.sit * m.sit * m.tra * m.com,
-        initialize=tuple(tra_tuples_tp),
+        initialize=sorted(tra_tuples_tp),
+        ordered=True,
         doc='Combinations of possible transport transmissions,'
             'e.g. (2020,South,Mid,hvac,Elec)')
 
@@ -151,6 +160,7 @@ def add_transmission_dc(m):
             initialize=[(sit, sit_, tra, com, stf, stf_later)
                         for (sit, sit_, tra, com, stf, stf_later)
                         in op_tra_tuples(m.tra_tuples, m)],
+            ordered=True,
             doc='Transmissions that are still operational through stf_later'
                 '(and the relevant years following), if built in stf'
                 'in stf.')
@@ -159,6 +169,7 @@ def add_transmission_dc(m):
             initialize=[(sit, sit_, tra, com, stf)
                         for (sit, sit_, tra, com, stf)
                         in inst_tra_tuples(m)],
+            ordered=True,
             doc='Installed transmissions that are still operational'
                 'through stf')
 
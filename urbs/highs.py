@@ -0,0 +1,224 @@
+import collections
+import re
+import numpy as np
+import pyomo.core as pyomo
+from pyomo.opt import SolverResults, SolverStatus, TerminationCondition
+from pyomo.repn import generate_standard_repn
+
+
+# linprog(method='highs') and its dual marginals need SciPy 1.7
+MIN_SCIPY_VERSION = (1, 7)
+
+LinearProgram = collections.namedtuple(
+    'LinearProgram',
+    ['c', 'c0', 'A_ub', 'b_ub', 'A_eq', 'b_eq', 'bounds', 'variables',
+     'rows', 'sense'])
+LinearProgram.__doc__ = """Matrix form of a linear model: min c*x + c0
+    s.t. A_ub*x <= b_ub, A_eq*x == b_eq, bounds[:, 0] <= x <= bounds[:, 1].
+
+    variables holds the Pyomo variable of each column, rows a list of
+    (constraint, 'ub' or 'eq', row number, sign) tuples that map constraint
+    duals back onto the model, sense is the original objective sense."""
+
+
+def lp_matrices(model):
+    """Extract the active linear part of a Pyomo model in matrix form.
+
+    Args:
+        - model: a Pyomo ConcreteModel with one active linear objective
+
+    Returns:
+        a LinearProgram namedtuple
+    """
+    import scipy.sparse as sp
+
+    columns = {}
+    variables = []
+
+    def column(var):
+        try:
+            return columns[id(var)]
+        except KeyError:
+            columns[id(var)] = len(variables)
+            variables.append(var)
+            return columns[id(var)]
+
+    # objective
+    objectives = list(model.component_data_objects(
+        pyomo.Objective, active=True, descend_into=True))
+    if len(objectives) != 1:
+        raise ValueError('Model must have exactly one active objective.')
+    objective = objectives[0]
+    repn = generate_standard_repn(objective.expr)
+    if not repn.is_linear():
+        raise ValueError('Objective is not linear.')
+    sense = objective.sense
+    obj_cols = [column(v) for v in repn.linear_vars]
+    obj_coefs = list(repn.linear_coefs)
+    c0 = repn.constant
+
+    # constraints; ranged and one-sided inequalities become <= rows
+    rows = []
+    ub = ([], [], [], [])  # row, col, coefficient, right-hand side
+    eq = ([], [], [], [])
+    for con in model.component_data_objects(
+            pyomo.Constraint, active=True, descend_into=True):
+        repn = generate_standard_repn(con.body)
+        if not repn.is_linear():
+            raise ValueError('Constraint {} is not linear.'.format(con.name))
+        if not repn.linear_vars:
+            # trivial constraint after fixing variables
+            continue
+        cols = [column(v) for v in repn.linear_vars]
+        coefs = list(repn.linear_coefs)
+        lower = None if con.lower is None else \
+            pyomo.value(con.lower) - repn.constant
+        upper = None if con.upper is None else \
+            pyomo.value(con.upper) - repn.constant
+
+        if con.equality:
+            parts = [(eq, 'eq', 1, upper)]
+        else:
+            parts = []
+            if upper is not None:
+                parts.append((ub, 'ub', 1, upper))
+            if lower is not None:
+                parts.append((ub, 'ub', -1, -lower))
+
+        for target, kind, sign, rhs in parts:
+            row = len(target[3])
+            target[0].extend([row] * len(cols))
+            target[1].extend(cols)
+            target[2].extend(sign * coef for coef in coefs)
+            target[3].append(rhs)
+            rows.append((con, kind, row, sign))
+
+    n = len(variables)
+    c = np.zeros(n)
+    np.add.at(c, obj_cols, obj_coefs)
+    if sense == pyomo.maximize:
+        c = -c
+        c0 = -c0
+
+    def matrix(triplets):
+        if not triplets[3]:
+            return None, None
+        A = sp.coo_matrix((triplets[2], (triplets[0], triplets[1])),
+                          shape=(len(triplets[3]), n)).tocsr()
+        return A, np.array(triplets[3], dtype=float)
+
+    A_ub, b_ub = matrix(ub)
+    A_eq, b_eq = matrix(eq)
+
+    bounds = np.empty((n, 2))
+    for j, var in enumerate(variables):
+        bounds[j, 0] = -np.inf if var.lb is None else var.lb
+        bounds[j, 1] = np.inf if var.ub is None else var.ub
+
+    return LinearProgram(c, c0, A_ub, b_ub, A_eq, b_eq, bounds, variables,
+                         rows, sense)
+
+
+def check_scipy():
+    """Raise a ValueError if no SciPy with the HiGHS solver is installed."""
+    required = '.'.join(str(part) for part in MIN_SCIPY_VERSION)
+    try:
+        import scipy
+    except ImportError:
+        raise ValueError("Solver 'highs' requires SciPy >= {}, which is not "
+                         "installed. Choose another solver, e.g. 'glpk'."
+                         .format(required))
+    version = tuple(int(part) for part in
+                    re.findall(r'\d+', scipy.__version__)[:2])
+    if version < MIN_SCIPY_VERSION:
+        raise ValueError("Solver 'highs' requires SciPy >= {} (installed: "
+                         "{}), which needs Python >= 3.7. Choose another "
+                         "solver, e.g. 'glpk'."
+                         .format(required, scipy.__version__))
+
+
+class HighsSolver(object):
+    """In-memory LP solver using the HiGHS solver bundled with SciPy.
+
+    Mimics the part of the Pyomo solver interface used by run_scenario:
+    set_options and solve. The model is passed to HiGHS in matrix form,
+    without writing an LP file; primal values and (if the model has a dual
+    suffix) constraint duals are loaded back onto the model.
+
+    Requires SciPy >= 1.7 (and thus Python >= 3.7), which is not part of the
+    default environment; creating a HighsSolver without it raises a
+    ValueError (c.f. check_scipy).
+    """
+    name = 'highs'
+
+    def __init__(self):
+        check_scipy()
+        self.options = {}
+
+    def set_options(self, options):
+        """Set solver options from a 'name=value name=value' string."""
+        for option in options.split():
+            key, value = option.split('=', 1)
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+            self.options[key] = value
+
+    def solve(self, model, tee=False):
+        """Solve model and load the solution.
+
+        Args:
+            - model: a Pyomo ConcreteModel with linear objective/constraints
+            - tee: if True, print the HiGHS log
+
+        Returns:
+            a Pyomo SolverResults object
+        """
+        from scipy.optimize import linprog
+
+        lp = lp_matrices(model)
+        options = dict(self.options)
+        options['disp'] = tee
+
+        res = linprog(lp.c, A_ub=lp.A_ub, b_ub=lp.b_ub,
+                      A_eq=lp.A_eq, b_eq=lp.b_eq, bounds=lp.bounds,
+                      method='highs', options=options)
+
+        results = SolverResults()
+        results.solver.name = self.name
+        results.solver.message = res.message
+        conditions = {0: TerminationCondition.optimal,
+                      1: TerminationCondition.maxIterations,
+                      2: TerminationCondition.infeasible,
+                      3: TerminationCondition.unbounded}
+        results.solver.termination_condition = conditions.get(
+            res.status, TerminationCondition.error)
+        if res.status != 0:
+            results.solver.status = SolverStatus.warning
+            return results
+        results.solver.status = SolverStatus.ok
+
+        # primal values
+        for var, value in zip(lp.variables, res.x):
+            var.value = value
+            var.stale = False
+
+        # duals (marginals are the sensitivities of the minimised objective
+        # with respect to the right-hand sides)
+        dual = getattr(model, 'dual', None)
+        if isinstance(dual, pyomo.Suffix) and dual.import_enabled():
+            dual.clear()
+            marginals = {'ub': res.ineqlin.marginals,
+                         'eq': res.eqlin.marginals}
+            flip = -1 if lp.sense == pyomo.maximize else 1
+            for con, kind, row, sign in lp.rows:
+                dual[con] = (dual.get(con, 0) +
+                             flip * sign * marginals[kind][row])
+
+        objective_value = res.fun + lp.c0
+        if lp.sense == pyomo.maximize:
+            objective_value = -objective_value
+        results.problem.lower_bound = objective_value
+        results.problem.upper_bound = objective_value
+        return results
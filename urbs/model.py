@@ -3,10 +3,11 @@ import pyomo.core as pyomo
 from datetime import datetime
 from .features import *
 from .input import *
+from .profiling import phase
 
 
 def create_model(data, dt=1, timesteps=None, objective='cost',
-                 dual=True):
+                 dual=True, telemetry=None):
     """Create a pyomo ConcreteModel urbs object from given input data.
 
     Args:
@@ -17,6 +18,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
           default: "cost"
         - dual: set True to add dual variables to model output
           (marginally slower), default: True
+        - telemetry: (optional) a Telemetry object recording the time and
+          memory used per model part (c.f. urbs.profiling)
 
     Returns:
         a pyomo ConcreteModel object
@@ -25,7 +28,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
     # Optional
     if not timesteps:
         timesteps = data['demand'].index.tolist()
-    m = pyomo_model_prep(data, timesteps)  # preparing pyomo model
+    with phase(telemetry, 'create_model.prep'):
+        m = pyomo_model_prep(data, timesteps)  # preparing pyomo model
     m.name = 'urbs'
     m.created = datetime.now().strftime('%Y%m%dT%H%M')
     m._data = data
@@ -78,7 +82,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
     for key in m.commodity_dict["price"]:
         indexlist.add(tuple(key)[0])
     m.stf = pyomo.Set(
-        initialize=indexlist,
+        initialize=sorted(indexlist),
+        ordered=True,
         doc='Set of modeled support timeframes (e.g. years)')
 
     # site (e.g. north, middle, south...)
@@ -86,7 +91,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
     for key in m.commodity_dict["price"]:
         indexlist.add(tuple(key)[1])
     m.sit = pyomo.Set(
-        initialize=indexlist,
+        initialize=sorted(indexlist),
+        ordered=True,
         doc='Set of sites')
 
     # commodity (e.g. solar, wind, coal...)
@@ -94,7 +100,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
     for key in m.commodity_dict["price"]:
         indexlist.add(tuple(key)[2])
     m.com = pyomo.Set(
-        initialize=indexlist,
+        initialize=sorted(indexlist),
+        ordered=True,
         doc='Set of commodities')
 
     # commodity type (i.e. SupIm, Demand, Stock, Env)
@@ -102,7 +109,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
     for key in m.commodity_dict["price"]:
         indexlist.add(tuple(key)[3])
     m.com_type = pyomo.Set(
-        initialize=indexlist,
+        initialize=sorted(indexlist),
+        ordered=True,
         doc='Set of commodity types')
 
     # process (e.g. Wind turbine, Gas plant, Photovoltaics...)
@@ -110,30 +118,36 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
     for key in m.process_dict["inv-cost"]:
         indexlist.add(tuple(key)[2])
     m.pro = pyomo.Set(
-        initialize=indexlist,
+        initialize=sorted(indexlist),
+        ordered=True,
         doc='Set of conversion processes')
 
     # cost_type
     m.cost_type = pyomo.Set(
         initialize=m.cost_type_list,
+        ordered=True,
         doc='Set of cost types (hard-coded)')
 
     # tuple sets
     m.sit_tuples = pyomo.Set(
         within=m.stf * m.sit,
         initialize=tuple(m.site_dict["area"].keys()),
+        ordered=True,
         doc='Combinations of support timeframes and sites')
     m.com_tuples = pyomo.Set(
         within=m.stf * m.sit * m.com * m.com_type,
         initialize=tuple(m.commodity_dict["price"].keys()),
+        ordered=True,
         doc='Combinations of defined commodities, e.g. (2018,Mid,Elec,Demand)')
     m.pro_tuples = pyomo.Set(
         within=m.stf * m.sit * m.pro,
         initialize=tuple(m.process_dict["inv-cost"].keys()),
+        ordered=True,
         doc='Combinations of possible processes, e.g. (2018,North,Coal plant)')
     m.com_stock = pyomo.Set(
         within=m.com,
         initialize=commodity_subset(m.com_tuples, 'Stock'),
+        ordered=True,
         doc='Commodities that can be purchased at some site(s)')
 
     if m.mode['int']:
@@ -143,6 +157,7 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
             initialize=[(sit, pro, stf, stf_later)
                         for (sit, pro, stf, stf_later)
                         in op_pro_tuples(m.pro_tuples, m)],
+            ordered=True,
             doc='Processes that are still operational through stf_later'
                 '(and the relevant years following), if built in stf'
                 'in stf.')
@@ -153,26 +168,31 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
             initialize=[(sit, pro, stf)
                         for (sit, pro, stf)
                         in inst_pro_tuples(m)],
+            ordered=True,
             doc='Installed processes that are still operational through stf')
 
     # commodity type subsets
     m.com_supim = pyomo.Set(
         within=m.com,
         initialize=commodity_subset(m.com_tuples, 'SupIm'),
+        ordered=True,
         doc='Commodities that have intermittent (timeseries) input')
     m.com_demand = pyomo.Set(
         within=m.com,
         initialize=commodity_subset(m.com_tuples, 'Demand'),
+        ordered=True,
         doc='Commodities that have a demand (implies timeseries)')
     m.com_env = pyomo.Set(
         within=m.com,
         initialize=commodity_subset(m.com_tuples, 'Env'),
+        ordered=True,
         doc='Commodities that (might) have a maximum creation limit')
 
     # process tuples for area rule
     m.pro_area_tuples = pyomo.Set(
         within=m.stf * m.sit * m.pro,
         initialize=tuple(m.proc_area_dict.keys()),
+        ordered=True,
         doc='Processes and Sites with area Restriction')
 
     # process input/output
@@ -182,6 +202,7 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
                     for (stf, site, process) in m.pro_tuples
                     for (s, pro, commodity) in tuple(m.r_in_dict.keys())
                     if process == pro and s == stf],
+        ordered=True,
         doc='Commodities consumed by process by site,'
             'e.g. (2020,Mid,PV,Solar)')
     m.pro_output_tuples = pyomo.Set(
@@ -190,6 +211,7 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
                     for (stf, site, process) in m.pro_tuples
                     for (s, pro, commodity) in tuple(m.r_out_dict.keys())
                     if process == pro and s == stf],
+        ordered=True,
         doc='Commodities produced by process by site, e.g. (2020,Mid,PV,Elec)')
 
     # process tuples for maximum gradient feature
@@ -198,15 +220,18 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
         initialize=[(stf, sit, pro)
                     for (stf, sit, pro) in m.pro_tuples
                     if m.process_dict['max-grad'][stf, sit, pro] < 1.0 / dt],
+        ordered=True,
         doc='Processes with maximum gradient smaller than timestep length')
 
     # process tuples for partial feature
+    partial_processes = set((stf, pro) for (stf, pro, _)
+                            in m.r_in_min_fraction_dict.keys())
     m.pro_partial_tuples = pyomo.Set(
         within=m.stf * m.sit * m.pro,
         initialize=[(stf, site, process)
                     for (stf, site, process) in m.pro_tuples
-                    for (s, pro, _) in tuple(m.r_in_min_fraction_dict.keys())
-                    if process == pro and s == stf],
+                    if (stf, process) in partial_processes],
+        ordered=True,
         doc='Processes with partial input')
 
     m.pro_partial_input_tuples = pyomo.Set(
@@ -216,6 +241,7 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
                     for (s, pro, commodity) in tuple(m.r_in_min_fraction_dict
                                                      .keys())
                     if process == pro and s == stf],
+        ordered=True,
         doc='Commodities with partial input ratio,'
             'e.g. (2020,Mid,Coal PP,Coal)')
 
@@ -226,6 +252,7 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
                     for (s, pro, commodity) in tuple(m.r_out_min_fraction_dict
                                                      .keys())
                     if process == pro and s == stf],
+        ordered=True,
         doc='Commodities with partial input ratio, e.g. (Mid,Coal PP,CO2)')
 
     # Variables
@@ -271,23 +298,46 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
     # Add additional features
     # called features are declared in distinct files in features folder
     if m.mode['tra']:
-        if m.mode['dpf']:
-            m = add_transmission_dc(m)
-        else:
-            m = add_transmission(m)
+        with phase(telemetry, 'create_model.transmission'):
+            if m.mode['dpf']:
+                m = add_transmission_dc(m)
+            else:
+                m = add_transmission(m)
     if m.mode['sto']:
-        m = add_storage(m)
+        with phase(telemetry, 'create_model.storage'):
+            m = add_storage(m)
     if m.mode['dsm']:
-        m = add_dsm(m)
+        with phase(telemetry, 'create_model.dsm'):
+            m = add_dsm(m)
     if m.mode['bsp']:
-        m = add_buy_sell_price(m)
+        with phase(telemetry, 'create_model.bsp'):
+            m = add_buy_sell_price(m)
     if m.mode['tve']:
-        m = add_time_variable_efficiency(m)
+        with phase(telemetry, 'create_model.tve'):
+            m = add_time_variable_efficiency(m)
     else:
         m.pro_timevar_output_tuples = pyomo.Set(
             within=m.stf * m.sit * m.pro * m.com,
+            ordered=True,
             doc='empty set needed for (partial) process output')
 
+    with phase(telemetry, 'create_model.equations'):
+        m = add_equations(m, dual)
+
+    return m
+
+
+def add_equations(m, dual=True):
+    """Declare the constraints and the objective of the base model.
+
+    Args:
+        - m: a pyomo ConcreteModel with the sets, params and variables of
+          create_model and its features
+        - dual: set True to add dual variables to model output
+
+    Returns:
+        the model m
+    """
     # Equation declarations
     # equation bodies are defined in separate functions, referred to here by
     # their name in the "rule" keyword.
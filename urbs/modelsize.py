@@ -0,0 +1,314 @@
+import collections
+import copy
+import numpy as np
+import pandas as pd
+import pyomo.core as pyomo
+from pyomo.repn import generate_standard_repn
+from .features.transmission import remove_duplicate_transmission
+from .input import pyomo_model_prep
+
+# rough memory use (bytes) of one Pyomo 5.6 variable, constraint row and
+# nonzero term on 64 bit Python; calibrate with Telemetry if needed
+BYTES_PER_VARIABLE = 400
+BYTES_PER_ROW = 1000
+BYTES_PER_NONZERO = 150
+
+
+def _commodities_by_process(keys):
+    """Group (stf, pro, com) keys to a dict (stf, pro): list of com."""
+    groups = collections.defaultdict(list)
+    for stf, pro, com in keys:
+        groups[stf, pro].append(com)
+    return groups
+
+
+def _dsm_down_count(timesteps, steps):
+    """Number of (t, tt) pairs of a DSM tuple with a delay of steps."""
+    time = np.asarray(timesteps)
+    lb, ub = time.min(), time.max()
+    return int((np.minimum(ub, time + steps) -
+                np.maximum(lb, time - steps) + 1).sum())
+
+
+def estimate_model_size(data, timesteps, dt=1, objective='cost'):
+    """Predict the size of the model create_model would build.
+
+    Uses the same tuple sets as create_model and the feature modules, but
+    derives their sizes from the prepared input data without building any
+    Pyomo sets, variables or constraints. Rows are the size of the declared
+    constraint index; rules that return Constraint.Skip make the built model
+    smaller. Nonzeros are approximate, from typical terms per row.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - timesteps: a list of timesteps, e.g. range(0,8761)
+        - dt: length of each time step (unit: hours)
+        - objective: objective function chosen (either "cost" or "CO2")
+
+    Returns:
+        a DataFrame indexed by component name with the columns type ('var'
+        or 'con'), rows and nonzeros
+    """
+    # pyomo_model_prep adds derived columns to the tables in place
+    m = pyomo_model_prep(copy.deepcopy(data), list(timesteps))
+    mode = m.mode
+    T = len(m.timesteps)
+    TM = T - 1
+
+    com_tuples = list(m.commodity_dict['price'].keys())
+    pro_tuples = list(m.process_dict['inv-cost'].keys())
+    stfs = set(key[0] for key in com_tuples)
+    sites = set(key[1] for key in com_tuples)
+    com_env = set(key[2] for key in com_tuples if key[3] == 'Env')
+    C, P = len(com_tuples), len(pro_tuples)
+
+    # process input/output tuples, as pro_input_tuples/pro_output_tuples
+    r_in = _commodities_by_process(m.r_in_dict.keys())
+    r_out = _commodities_by_process(m.r_out_dict.keys())
+    r_in_part = _commodities_by_process(m.r_in_min_fraction_dict.keys())
+    r_out_part = _commodities_by_process(m.r_out_min_fraction_dict.keys())
+    P_in = sum(len(r_in[stf, pro]) for stf, sit, pro in pro_tuples)
+    P_out = sum(len(r_out[stf, pro]) for stf, sit, pro in pro_tuples)
+    partial = [(stf, sit, pro) for stf, sit, pro in pro_tuples
+               if r_in_part[stf, pro]]
+    P_part = len(partial)
+    P_part_in = sum(len(r_in_part[stf, pro]) for stf, sit, pro in partial)
+    partial_out = set((stf, sit, pro, com)
+                      for stf, sit, pro in partial
+                      for com in r_out_part[stf, pro])
+    P_grad = sum(1 for key in pro_tuples
+                 if m.process_dict['max-grad'][key] < 1.0 / dt)
+
+    timevar_out = set()
+    if mode['tve']:
+        tve_stfs = set(tuple(key)[0] for key in m.eff_factor_dict[
+            tuple(m.eff_factor_dict.keys())[0]])
+        timevar_out = set((stf, sit, pro, com)
+                          for stf in tve_stfs
+                          for (sit, pro) in m.eff_factor_dict.keys()
+                          for (s, p, com) in m.r_out_dict.keys()
+                          if p == pro and s == stf and com not in com_env)
+
+    # terms of the commodity balance (res_vertex) per (stf, sit, com)
+    vertex_terms = collections.Counter()
+    for stf, sit, pro in pro_tuples:
+        for com in r_in[stf, pro] + r_out[stf, pro]:
+            vertex_terms[stf, sit, com] += 1
+
+    rows = []
+
+    def add(name, kind, count, terms=1):
+        rows.append((name, kind, int(count), int(round(count * terms))))
+
+    # variables of create_model
+    add('costs', 'var', len(m.cost_type_list))
+    add('e_co_stock', 'var', TM * C)
+    add('cap_pro_new', 'var', P)
+    add('tau_pro', 'var', T * P)
+    add('e_pro_in', 'var', TM * P_in)
+    add('e_pro_out', 'var', TM * P_out)
+
+    S = S_init = S_ep = R = R_dc = D = D_down = 0
+    if mode['sto']:
+        sto_tuples = list(m.storage_dict['eff-in'].keys())
+        S = len(sto_tuples)
+        S_init = len(m.stor_init_bound_dict)
+        S_ep = len(m.sto_ep_ratio_dict)
+        for stf, sit, sto, com in sto_tuples:
+            vertex_terms[stf, sit, com] += 2
+        add('cap_sto_c_new', 'var', S)
+        add('cap_sto_p_new', 'var', S)
+        add('e_sto_in', 'var', TM * S)
+        add('e_sto_out', 'var', TM * S)
+        add('e_sto_con', 'var', T * S)
+
+    if mode['tra']:
+        tra_tuples = set(m.transmission_dict['eff'].keys())
+        if mode['dpf']:
+            tra_dc = set(m.transmission_dc_dict['reactance'].keys())
+            tra_tp = set(m.transmission_dict['reactance'].keys()) - tra_dc
+            tra_dc = remove_duplicate_transmission(tra_dc)
+            tra_tuples = tra_dc | tra_tp
+            R_dc = len(tra_dc)
+        R = len(tra_tuples)
+        for stf, sin, sout, tra, com in tra_tuples:
+            vertex_terms[stf, sin, com] += 1
+            vertex_terms[stf, sout, com] += 1
+        add('cap_tra_new', 'var', R)
+        add('e_tra_in', 'var', TM * R)
+        add('e_tra_out', 'var', TM * R)
+        if mode['dpf']:
+            add('e_tra_abs', 'var', TM * R_dc)
+            add('voltage_angle', 'var', TM * len(stfs) * len(sites))
+
+    if mode['dsm']:
+        dsm_tuples = list(m.dsm_dict['delay'].keys())
+        D = len(dsm_tuples)
+        D_down = sum(_dsm_down_count(m.timesteps[1:],
+                                     max(int(m.dsm_dict['delay'][key] / dt),
+                                         1))
+                     for key in dsm_tuples)
+        for stf, sit, com in dsm_tuples:
+            vertex_terms[stf, sit, com] += 2
+        add('dsm_up', 'var', TM * D)
+        add('dsm_down', 'var', D_down)
+
+    if mode['bsp']:
+        for stf, sit, com, com_type in com_tuples:
+            vertex_terms[stf, sit, com] += 2
+        add('e_co_sell', 'var', TM * C)
+        add('e_co_buy', 'var', TM * C)
+
+    variables = sum(row[2] for row in rows)
+
+    # constraints of create_model
+    vertex = sum(1 + vertex_terms[stf, sit, com]
+                 for stf, sit, com, com_type in com_tuples)
+    add('res_vertex', 'con', TM * C, float(vertex) / max(C, 1))
+    add('res_stock_step', 'con', TM * C)
+    add('res_stock_total', 'con', C, TM)
+    add('res_env_step', 'con', TM * C, float(P_out) / max(C, 1))
+    add('res_env_total', 'con', C, TM * float(P_out) / max(C, 1))
+    add('def_process_input', 'con', TM * (P_in - P_part_in), 2)
+    add('def_process_output', 'con',
+        TM * (P_out - len(partial_out | timevar_out)), 2)
+    add('def_intermittent_supply', 'con', TM * P_in, 2)
+    add('res_process_throughput_by_capacity', 'con', TM * P, 2)
+    add('res_process_maxgrad_lower', 'con', TM * P_grad, 3)
+    add('res_process_maxgrad_upper', 'con', TM * P_grad, 3)
+    add('res_process_capacity', 'con', P)
+    add('res_area', 'con', len(m.site_dict['area']),
+        float(P) / max(len(m.site_dict['area']), 1))
+    add('res_throughput_by_capacity_min', 'con', TM * P_part, 2)
+    add('def_partial_process_input', 'con', TM * P_part_in, 3)
+    add('def_partial_process_output', 'con',
+        TM * len(partial_out - timevar_out), 3)
+    add('def_costs', 'con', len(m.cost_type_list),
+        float(variables) / max(len(m.cost_type_list), 1))
+    env_terms = TM * float(P_out) / max(len(stfs), 1)
+    if mode['int']:
+        add('res_global_co2_limit', 'con', len(stfs), env_terms)
+    if objective == 'cost':
+        if mode['int']:
+            add('res_global_co2_budget', 'con', 1, env_terms * len(stfs))
+        else:
+            add('res_global_co2_limit', 'con', len(stfs), env_terms)
+    else:
+        add('res_global_cost_limit', 'con', 1, variables)
+
+    if mode['sto']:
+        add('def_storage_state', 'con', TM * S, 4)
+        add('res_storage_input_by_power', 'con', TM * S, 2)
+        add('res_storage_output_by_power', 'con', TM * S, 2)
+        add('res_storage_state_by_capacity', 'con', T * S, 2)
+        add('res_storage_power', 'con', S)
+        add('res_storage_capacity', 'con', S)
+        add('def_initial_storage_state', 'con', S_init, 2)
+        add('res_storage_state_cyclicity', 'con', S, 2)
+        add('def_storage_energy_power_ratio', 'con', S_ep, 2)
+
+    if mode['tra']:
+        add('def_transmission_output', 'con', TM * R, 2)
+        add('res_transmission_input_by_capacity', 'con', TM * R, 2)
+        add('res_transmission_capacity', 'con', R)
+        add('res_transmission_symmetry', 'con', R - R_dc, 2)
+        if mode['dpf']:
+            add('def_dc_power_flow', 'con', TM * R_dc, 3)
+            add('def_angle_limit', 'con', TM * R_dc, 2)
+            add('e_tra_abs1', 'con', TM * R_dc, 2)
+            add('e_tra_abs2', 'con', TM * R_dc, 2)
+            add('res_transmission_dc_input_by_capacity', 'con',
+                TM * R_dc, 2)
+
+    if mode['dsm']:
+        downs = float(D_down) / max(TM * D, 1)
+        add('def_dsm_variables', 'con', TM * D, 1 + downs)
+        add('res_dsm_upward', 'con', TM * D)
+        add('res_dsm_downward', 'con', TM * D, downs)
+        add('res_dsm_maximum', 'con', TM * D, 1 + downs)
+        add('res_dsm_recovery', 'con', TM * D, 1 + downs)
+
+    if mode['bsp']:
+        add('res_sell_step', 'con', TM * C)
+        add('res_sell_total', 'con', C, TM)
+        add('res_buy_step', 'con', TM * C)
+        add('res_buy_total', 'con', C, TM)
+        add('res_sell_buy_symmetry', 'con', P_in, 2)
+
+    if mode['tve']:
+        add('def_process_timevar_output', 'con',
+            TM * len(timevar_out - partial_out), 2)
+        add('def_process_partial_timevar_output', 'con',
+            TM * len(timevar_out & partial_out), 3)
+
+    sizes = pd.DataFrame(rows, columns=['component', 'type', 'rows',
+                                        'nonzeros']).set_index('component')
+    sizes.loc[sizes['type'] == 'var', 'nonzeros'] = 0
+    return sizes
+
+
+def estimate_memory(sizes):
+    """Estimate the memory (bytes) of a built model from its sizes.
+
+    Args:
+        - sizes: DataFrame as returned by estimate_model_size or
+          model_size_report
+
+    Returns:
+        estimated memory use in bytes
+    """
+    variables = sizes.loc[sizes['type'] == 'var', 'rows'].sum()
+    constraints = sizes.loc[sizes['type'] == 'con', 'rows'].sum()
+    nonzeros = sizes['nonzeros'].sum()
+    return int(variables * BYTES_PER_VARIABLE +
+               constraints * BYTES_PER_ROW +
+               nonzeros * BYTES_PER_NONZERO)
+
+
+def model_size_report(prob, estimate=None):
+    """List the actual size and coefficient ranges of a built model.
+
+    Args:
+        - prob: a urbs model instance as returned by create_model
+        - estimate: (optional) DataFrame as returned by estimate_model_size;
+          if given, its rows and nonzeros are joined as rows_estimate and
+          nonzeros_estimate for comparison
+
+    Returns:
+        a DataFrame indexed by component name with the columns type ('var'
+        or 'con'), rows, nonzeros and, for constraints, the smallest and
+        largest absolute coefficient (coef_min, coef_max) and right-hand
+        side (rhs_min, rhs_max)
+    """
+    rows = []
+    for var in prob.component_objects(pyomo.Var, active=True):
+        rows.append((var.name, 'var', len(var), 0,
+                     np.nan, np.nan, np.nan, np.nan))
+
+    for con in prob.component_objects(pyomo.Constraint, active=True):
+        nonzeros = 0
+        coefs = []
+        rhs = []
+        for data in con.values():
+            repn = generate_standard_repn(data.body)
+            nonzeros += len(repn.linear_vars) + len(repn.quadratic_vars)
+            coefs.extend(abs(pyomo.value(c)) for c in repn.linear_coefs
+                         if pyomo.value(c) != 0)
+            for bound in (data.lower, data.upper):
+                if bound is not None:
+                    value = abs(pyomo.value(bound) - repn.constant)
+                    if value != 0:
+                        rhs.append(value)
+        rows.append((con.name, 'con', len(con), nonzeros,
+                     min(coefs) if coefs else np.nan,
+                     max(coefs) if coefs else np.nan,
+                     min(rhs) if rhs else np.nan,
+                     max(rhs) if rhs else np.nan))
+
+    report = pd.DataFrame(rows, columns=[
+        'component', 'type', 'rows', 'nonzeros', 'coef_min', 'coef_max',
+        'rhs_min', 'rhs_max']).set_index('component')
+    if estimate is not None:
+        report = report.join(estimate[['rows', 'nonzeros']],
+                             rsuffix='_estimate', how='outer')
+    return report
@@ -3,6 +3,14 @@ from .input import get_input
 from .pyomoio import get_entity, get_entities
 from .util import is_string
 
+# result entities read by get_constants and get_timeseries
+CONSTANT_ENTITIES = ['costs', 'cap_pro', 'cap_pro_new', 'cap_tra',
+                     'cap_tra_new', 'cap_sto_c', 'cap_sto_c_new', 'cap_sto_p',
+                     'cap_sto_p_new']
+TIMESERIES_ENTITIES = ['tm', 'e_co_stock', 'e_pro_in', 'e_pro_out',
+                       'e_tra_in', 'e_tra_out', 'e_sto_con', 'e_sto_in',
+                       'e_sto_out', 'dsm_up', 'dsm_down', 'voltage_angle']
+
 
 def get_constants(instance):
     """Return summary DataFrames for important variables
@@ -55,7 +63,62 @@ def get_constants(instance):
     return costs, cpro, ctra, csto
 
 
-def get_timeseries(instance, stf, com, sites, timesteps=None):
+class TimeseriesCube(object):
+    """Timeseries entities of a solved model, split once by (stf, com).
+
+    Every flow entity read by get_timeseries is retrieved once and grouped
+    by its support timeframe and commodity levels on first use. Passed as
+    cube to get_timeseries, each call then only works on the (small) slice
+    of its (stf, com) pair instead of the complete entity, so reporting or
+    plotting many tuples costs little more than a single one.
+    """
+    def __init__(self, instance):
+        self.instance = instance
+        self.timesteps = sorted(get_entity(instance, 'tm', copy=False).index)
+        self.demand = get_input(instance, 'demand')
+        self._entities = {}
+        self._parts = {}
+
+    def entity(self, name):
+        """Return a complete entity ('storage' for all storage flows)."""
+        if name not in self._entities:
+            if name == 'storage':
+                self._entities[name] = get_entities(
+                    self.instance, ['e_sto_con', 'e_sto_in', 'e_sto_out'],
+                    copy=False)
+            else:
+                self._entities[name] = get_entity(self.instance, name,
+                                                  copy=False)
+        return self._entities[name]
+
+    def part(self, name, stf, com):
+        """Return the rows of an entity with given stf and commodity.
+
+        Raises:
+            KeyError if the entity has no such rows
+        """
+        if name not in self._parts:
+            entity = self.entity(name)
+            if entity.empty:
+                self._parts[name] = {}
+            else:
+                self._parts[name] = dict(
+                    list(entity.groupby(level=['stf', 'com'])))
+        return self._parts[name][(stf, com)]
+
+
+def _timeseries_entity(instance, cube, name, stf, com):
+    """Return an entity for get_timeseries, restricted to (stf, com) rows
+    if a TimeseriesCube is given, complete otherwise."""
+    if cube is not None:
+        return cube.part(name, stf, com)
+    if name == 'storage':
+        return get_entities(instance, ['e_sto_con', 'e_sto_in', 'e_sto_out'],
+                            copy=False)
+    return get_entity(instance, name, copy=False)
+
+
+def get_timeseries(instance, stf, com, sites, timesteps=None, cube=None):
     """Return DataFrames of all timeseries referring to given commodity
 
     Usage:
@@ -68,6 +131,8 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
         - sites: a site name or list of site names
         - timesteps: optional list of timesteps, default: all modelled
           timesteps
+        - cube: optional TimeseriesCube of instance, to be shared among
+          many calls
 
     Returns:
         a tuple of (created, consumed, storage, imported, exported, dsm) with
@@ -80,9 +145,13 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
         - exported: timeseries of commodity export
         - dsm: timeseries of demand-side management
     """
-    if timesteps is None:
+    # entities are read without copying them from the result cache; all
+    # operations below return new objects
+    if timesteps is None and cube is not None:
+        timesteps = cube.timesteps
+    elif timesteps is None:
         # default to all simulated timesteps
-        timesteps = sorted(get_entity(instance, 'tm').index)
+        timesteps = sorted(get_entity(instance, 'tm', copy=False).index)
     else:
         timesteps = sorted(timesteps)  # implicit: convert range to list
 
@@ -96,22 +165,19 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
         # select relevant timesteps (=rows)
         # select commodity (xs), then the sites from remaining simple columns
         # and sum all together to form a Series
-        demand = (
-            pd.DataFrame.from_dict(
-                get_input(
-                    instance,
-                    'demand_dict')).loc[stf] .loc[timesteps].xs(
-                com,
-                axis=1,
-                level=1)[sites].sum(
-                    axis=1))
+        if cube is not None:
+            demand = cube.demand
+        else:
+            demand = get_input(instance, 'demand')
+        demand = (demand.loc[stf].loc[timesteps]
+                  .xs(com, axis=1, level=1)[sites].sum(axis=1))
     except KeyError:
         demand = pd.Series(0, index=timesteps)
     demand.name = 'Demand'
 
     # STOCK
-    eco = get_entity(instance, 'e_co_stock')
     try:
+        eco = _timeseries_entity(instance, cube, 'e_co_stock', stf, com)
         eco = eco.xs([stf, com, 'Stock'], level=['stf', 'com', 'com_type'])
         stock = eco.unstack()[sites].sum(axis=1)
     except KeyError:
@@ -119,8 +185,8 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
     stock.name = 'Stock'
 
     # PROCESS
-    created = get_entity(instance, 'e_pro_out')
     try:
+        created = _timeseries_entity(instance, cube, 'e_pro_out', stf, com)
         created = created.xs([stf, com], level=['stf', 'com']).loc[timesteps]
         created = created.unstack(level='sit')[sites].fillna(0).sum(axis=1)
         created = created.unstack(level='pro')
@@ -128,8 +194,8 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
     except KeyError:
         created = pd.DataFrame(index=timesteps[1:])
 
-    consumed = get_entity(instance, 'e_pro_in')
     try:
+        consumed = _timeseries_entity(instance, cube, 'e_pro_in', stf, com)
         consumed = consumed.xs([stf, com], level=['stf', 'com']).loc[timesteps]
         consumed = consumed.unstack(level='sit')[sites].fillna(0).sum(axis=1)
         consumed = consumed.unstack(level='pro')
@@ -145,7 +211,8 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
     try:
         df_transmission = get_input(instance, 'transmission')
         if com in set(df_transmission.index.get_level_values('Commodity')):
-            imported = get_entity(instance, 'e_tra_out')
+            imported = _timeseries_entity(instance, cube, 'e_tra_out',
+                                          stf, com)
             # avoid negative value import for DCPF transmissions
             if instance.mode['dpf']:
                 # -0.01 to avoid numerical errors such as -0
@@ -168,7 +235,8 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
                 imported = imported[other_sites]  # ...from other_sites
             imported = drop_all_zero_columns(imported.fillna(0))
 
-            exported = get_entity(instance, 'e_tra_in')
+            exported = _timeseries_entity(instance, cube, 'e_tra_in',
+                                          stf, com)
             # avoid negative value export for DCPF transmissions
             if instance.mode['dpf']:
                 # -0.01 to avoid numerical errors such as -0
@@ -207,8 +275,8 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
     # STORAGE
     # group storage energies by commodity
     # select all entries with desired commodity co
-    stored = get_entities(instance, ['e_sto_con', 'e_sto_in', 'e_sto_out'])
     try:
+        stored = _timeseries_entity(instance, cube, 'storage', stf, com)
         stored = stored.loc[timesteps].xs([stf, com], level=['stf', 'com'])
         stored = stored.groupby(level=['t', 'sit']).sum()
         stored = stored.loc[(slice(None), sites), :].sum(level='t')
@@ -218,8 +286,10 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
                               columns=['Level', 'Stored', 'Retrieved'])
 
     # DEMAND SIDE MANAGEMENT (load shifting)
-    dsmup = get_entity(instance, 'dsm_up')
-    dsmdo = get_entity(instance, 'dsm_down')
+    if cube is not None:
+        dsmup = cube.entity('dsm_up')
+    else:
+        dsmup = get_entity(instance, 'dsm_up', copy=False)
 
     if dsmup.empty:
         # if no DSM happened, the demand is not modified (delta = 0)
@@ -231,6 +301,9 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
         # DSM down uses
         # for sit in m.dsm_site_tuples:
         try:
+            dsmup = _timeseries_entity(instance, cube, 'dsm_up', stf, com)
+            dsmdo = _timeseries_entity(instance, cube, 'dsm_down', stf, com)
+
             # select commodity
             dsmup = dsmup.xs([stf, com], level=['stf', 'com'])
             dsmdo = dsmdo.xs([stf, com], level=['stf', 'com'])
@@ -263,7 +336,11 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
     # VOLTAGE ANGLE of sites
 
     try:
-        voltage_angle = get_entity(instance, 'voltage_angle')
+        if cube is not None:
+            voltage_angle = cube.entity('voltage_angle')
+        else:
+            voltage_angle = get_entity(instance, 'voltage_angle',
+                                       copy=False)
         voltage_angle = voltage_angle.xs([stf], level=['stf']).loc[timesteps]
         voltage_angle = voltage_angle.unstack(level='sit')[sites]
     except (KeyError, AttributeError):
@@ -0,0 +1,281 @@
+import copy
+import pyomo.core as pyomo
+from pyomo.opt.base import SolverFactory
+from .features.BuySellPrice import res_buy_step_rule, res_buy_total_rule, \
+                                   res_sell_step_rule, res_sell_total_rule
+from .features.storage import res_storage_capacity_rule, \
+                              res_storage_power_rule
+from .features.transmission import res_transmission_capacity_rule
+from .input import pyomo_model_prep
+from .model import create_model, def_costs_rule, res_env_step_rule, \
+                   res_env_total_rule, res_global_co2_budget_rule, \
+                   res_global_co2_limit_rule, res_global_cost_limit_rule, \
+                   res_process_capacity_rule, res_stock_step_rule, \
+                   res_stock_total_rule
+
+# solvers that keep the model loaded between solves
+PERSISTENT_SOLVERS = ['gurobi_persistent', 'cplex_persistent']
+
+# input values that can be changed in a built model, and the constraints
+# that depend on them
+UPDATABLE_COLUMNS = {
+    'commodity': {
+        'price': ['def_costs'],
+        'max': ['res_stock_total', 'res_env_total',
+                'res_sell_total', 'res_buy_total'],
+        'maxperhour': ['res_stock_step', 'res_env_step',
+                       'res_sell_step', 'res_buy_step']},
+    'process': {
+        'cap-lo': ['res_process_capacity'],
+        'cap-up': ['res_process_capacity']},
+    'transmission': {
+        'cap-lo': ['res_transmission_capacity'],
+        'cap-up': ['res_transmission_capacity']},
+    'storage': {
+        'cap-lo-c': ['res_storage_capacity'],
+        'cap-up-c': ['res_storage_capacity'],
+        'cap-lo-p': ['res_storage_power'],
+        'cap-up-p': ['res_storage_power']},
+}
+UPDATABLE_GLOBAL_PROPS = {
+    'CO2 limit': ['res_global_co2_limit'],
+    'CO2 budget': ['res_global_co2_budget'],
+    'Cost limit': ['res_global_cost_limit'],
+}
+
+CONSTRAINT_RULES = {
+    'def_costs': def_costs_rule,
+    'res_stock_step': res_stock_step_rule,
+    'res_stock_total': res_stock_total_rule,
+    'res_env_step': res_env_step_rule,
+    'res_env_total': res_env_total_rule,
+    'res_sell_step': res_sell_step_rule,
+    'res_sell_total': res_sell_total_rule,
+    'res_buy_step': res_buy_step_rule,
+    'res_buy_total': res_buy_total_rule,
+    'res_process_capacity': res_process_capacity_rule,
+    'res_transmission_capacity': res_transmission_capacity_rule,
+    'res_storage_capacity': res_storage_capacity_rule,
+    'res_storage_power': res_storage_power_rule,
+    'res_global_co2_limit': res_global_co2_limit_rule,
+    'res_global_co2_budget': res_global_co2_budget_rule,
+    'res_global_cost_limit': res_global_cost_limit_rule,
+}
+
+# constraints that are not indexed by the keys of the input they depend on
+# and are therefore always rebuilt as a whole
+REBUILT_WHOLE = ['def_costs', 'res_global_co2_budget',
+                 'res_global_cost_limit']
+
+
+def _changed_rows(old, new):
+    """Return the index entries where two Series differ (NaN == NaN)."""
+    old, new = old.align(new)
+    same = (old == new) | (old.isnull() & new.isnull())
+    return old.index[~same].tolist()
+
+
+def diff_input(old, new):
+    """Find the model updates needed to go from one input data dict to
+    another.
+
+    Only the values listed in UPDATABLE_COLUMNS and UPDATABLE_GLOBAL_PROPS
+    may differ; all other input must be identical.
+
+    Args:
+        - old: input data dict the model was built from
+        - new: modified input data dict
+
+    Returns:
+        dict of constraint name: set of changed input keys; a value of None
+        means the whole constraint must be rebuilt
+    """
+    updates = {}
+
+    def mark(names, keys):
+        for name in names:
+            if (name in REBUILT_WHOLE or
+                    updates.get(name, set()) is None):
+                updates[name] = None
+            else:
+                updates.setdefault(name, set()).update(keys)
+
+    for key in new:
+        if key not in old:
+            raise ValueError("Input table '{}' was added; the model must be "
+                             "rebuilt.".format(key))
+        a, b = old[key], new[key]
+        if not a.index.equals(b.index) or not a.columns.equals(b.columns):
+            raise ValueError("Index or columns of input table '{}' changed; "
+                             "the model must be rebuilt.".format(key))
+
+        if key == 'global_prop':
+            rows = _changed_rows(a['value'], b['value'])
+            for stf, prop in rows:
+                if prop not in UPDATABLE_GLOBAL_PROPS:
+                    raise ValueError("Global property '{}' cannot be updated "
+                                     "in a built model.".format(prop))
+            for prop, names in UPDATABLE_GLOBAL_PROPS.items():
+                stfs = [(stf,) for stf, p in rows if p == prop]
+                if stfs:
+                    mark(names, stfs)
+            continue
+
+        columns = UPDATABLE_COLUMNS.get(key, {})
+        for column in a.columns:
+            rows = _changed_rows(a[column], b[column])
+            if not rows:
+                continue
+            if column not in columns:
+                raise ValueError("Column '{}' of input table '{}' cannot be "
+                                 "updated in a built model.".format(
+                                     column, key))
+            mark(columns[column], rows)
+    return updates
+
+
+class ScenarioSession(object):
+    """Keep one urbs model loaded in a solver across related scenarios.
+
+    The model is built once. With a persistent solver interface
+    (gurobi_persistent, cplex_persistent), it is also passed to the solver
+    only once; scenario updates then remove and re-add just the affected
+    constraints, and the solver re-optimises from the basis of the previous
+    solution. With other solvers, the model is updated the same way but
+    passed to the solver anew on every solve.
+
+    Supported updates are commodity price, max and maxperhour, the global
+    properties 'CO2 limit', 'CO2 budget' and 'Cost limit' and the capacity
+    bounds cap-lo/cap-up of processes, transmission lines and storages
+    (as long as no capacity changes between fixed and expandable).
+    """
+
+    def __init__(self, data, dt, timesteps, objective, solver,
+                 logfile='solver.log', dual=True):
+        """Build the model and load it into the solver.
+
+        Args:
+            - data: input data dict as returned by read_input
+            - dt: length of each time step (unit: hours)
+            - timesteps: a list of timesteps, e.g. range(0,8761)
+            - objective: objective function chosen (either "cost" or "CO2")
+            - solver: the user specified solver, e.g. 'gurobi_persistent'
+            - logfile: solver log filename
+            - dual: set True to add dual variables to model output
+        """
+        # imported here, as runfunctions itself imports this module
+        from .runfunctions import create_solver, setup_solver
+
+        self.timesteps = timesteps
+        self.logfile = logfile
+        self.data = copy.deepcopy(data)
+        self.prob = create_model(data, dt, timesteps, objective, dual=dual)
+
+        self.persistent = solver in PERSISTENT_SOLVERS
+        if self.persistent:
+            self.optim = SolverFactory(solver)
+            self.optim.set_instance(self.prob)
+        else:
+            self.optim = setup_solver(create_solver(solver), logfile=logfile)
+
+    def update(self, data):
+        """Apply a modified input data dict to the built model.
+
+        Args:
+            - data: modified copy of the input data dict of the session
+
+        Returns:
+            list of the names of the updated constraints
+        """
+        updates = diff_input(self.data, data)
+        if not updates:
+            return []
+
+        # pyomo_model_prep adds derived columns to the tables in place
+        prepared = copy.deepcopy(data)
+        prep = pyomo_model_prep(prepared, self.timesteps)
+        m = self.prob
+        for name in ['pro_const_cap_dict', 'tra_const_cap_dict',
+                     'sto_const_cap_c_dict', 'sto_const_cap_p_dict']:
+            if (set(getattr(prep, name, {})) !=
+                    set(getattr(m, name, {}))):
+                raise ValueError('A capacity changed between fixed and '
+                                 'expandable ({}); the model must be '
+                                 'rebuilt.'.format(name))
+
+        # swap in the derived parameter dicts of the new input
+        m.global_prop = prep.global_prop
+        for name in dir(prep):
+            if name.endswith('_dict') and hasattr(m, name):
+                setattr(m, name, getattr(prep, name))
+
+        for name, keys in updates.items():
+            if hasattr(m, name):
+                self._rebuild(name, keys)
+
+        m._data = prepared
+        self.data = copy.deepcopy(data)
+        return sorted(name for name in updates if hasattr(m, name))
+
+    def _rebuild(self, name, keys=None):
+        """Regenerate the rows of a constraint from its rule.
+
+        Args:
+            - name: constraint name, must be listed in CONSTRAINT_RULES
+            - keys: (optional) set of input keys; only rows whose index
+              (without a leading time step) is among them are rebuilt
+        """
+        m = self.prob
+        con = getattr(m, name)
+        rule = CONSTRAINT_RULES[name]
+
+        if not con.is_indexed():
+            expr = rule(m)
+            if self.persistent and con.active and len(con):
+                self.optim.remove_constraint(con)
+            if expr is pyomo.Constraint.Skip:
+                con.deactivate()
+                return
+            con.set_value(expr)
+            con.activate()
+            if self.persistent:
+                self.optim.add_constraint(con)
+            return
+
+        for index in con.index_set():
+            key = index if isinstance(index, tuple) else (index,)
+            if keys is not None and key not in keys and key[1:] not in keys:
+                continue
+            if index in con:
+                if self.persistent:
+                    self.optim.remove_constraint(con[index])
+            expr = rule(m, *key)
+            if expr is pyomo.Constraint.Skip:
+                if index in con:
+                    del con[index]
+                continue
+            con[index] = expr
+            if self.persistent:
+                self.optim.add_constraint(con[index])
+
+    def solve(self, tee=False):
+        """Solve the model in its current state.
+
+        Args:
+            - tee: if True, print the solver log
+
+        Returns:
+            the Pyomo solver results object
+        """
+        prob = self.prob
+        # drop results cached by a previous save
+        if hasattr(prob, '_result'):
+            del prob._result
+
+        if self.persistent:
+            result = self.optim.solve(tee=tee, logfile=self.logfile)
+            if hasattr(prob, 'dual'):
+                self.optim.load_duals()
+        else:
+            result = self.optim.solve(prob, tee=tee)
+        return result
@@ -1,14 +1,20 @@
+import itertools
 import matplotlib.pyplot as plt
+import multiprocessing
 import numpy as np
 import os
 import pandas as pd
 from random import random
 from .colorcodes import COLORS
 from .input import get_input
-from .output import get_constants, get_timeseries
+from .output import TIMESERIES_ENTITIES, TimeseriesCube, get_constants, \
+                    get_timeseries
 from .pyomoio import get_entity
 from .util import is_string
 
+# result entities read by plot and result_figures
+PLOT_ENTITIES = ['dt'] + TIMESERIES_ENTITIES
+
 
 def sort_plot_elements(elements):
     """Sort timeseries for plotting
@@ -27,79 +33,68 @@ def sort_plot_elements(elements):
     if len(elements.columns) < 2:
         return elements
 
-    # calculate standard deviation
-    std = pd.DataFrame(np.zeros_like(elements.tail(1)),
-                       index=elements.index[-1:] + 1,
-                       columns=elements.columns)
-    # calculate mean
-    mean = pd.DataFrame(np.zeros_like(elements.tail(1)),
-                        index=elements.index[-1:] + 1,
-                        columns=elements.columns)
-    # calculate quotient
-    quotient = pd.DataFrame(
-        np.zeros_like(elements.tail(1)),
-        index=elements.index[-1:] + 1,
-        columns=elements.columns)
-
-    for col in std.columns:
-        std[col] = np.std(elements[col])
-        mean[col] = np.mean(elements[col])
-        quotient[col] = std[col] / mean[col]
-    # fill nan values (due to division by 0)
-    quotient = quotient.fillna(0)
+    # coefficient of variation (population std / mean) of each column;
+    # nan values (due to division by 0) count as 0
+    quotient = (elements.std(ddof=0) / elements.mean()).fillna(0)
     # sort created/consumed ascencing with quotient i.e. base load first
-    elements = elements.append(quotient)
-    new_columns = elements.columns[elements.ix[elements.last_valid_index()]
-                                           .argsort()]
-    elements_sorted = elements[new_columns][:-1]
+    elements_sorted = elements.iloc[:, np.argsort(quotient.values)]
 
     return elements_sorted
 
 
-def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
-         power_name='Power', energy_name='Energy',
-         power_unit='MW', energy_unit='MWh', time_unit='h',
-         figure_size=(16, 12)):
-    """Plot a stacked timeseries of commodity balance and storage.
+def downsample(elements, points):
+    """Reduce a timeseries to about the given number of points for plotting.
 
-    Creates a stackplot of the energy balance of a given commodity, together
-    with stored energy in a second subplot.
+    Min/max bucketing: the timeseries is split into points/2 buckets of
+    consecutive timesteps, of which the rows with the minimum and maximum
+    value are kept (for a DataFrame, of the row sum, so that stacked
+    columns stay aligned). Peaks and valleys are thus preserved at pixel
+    resolution.
 
     Args:
-        - prob: urbs model instance
-        - stf: support timeframe
-        - com: commodity name to plot
-        - sit: site name to plot
-        - dt: length of each time step (unit: hours)
-        - timesteps: modelled timesteps
-        - timesteps_plot: timesteps to be plotted
-        - power_name: optional string for 'power' label; default: 'Power'
-        - power_unit: optional string for unit; default: 'MW'
-        - energy_name: optional string for 'energy' label; default: 'Energy'
-        - energy_unit: optional string for storage plot; default: 'MWh'
-        - time_unit: optional string for time unit label; default: 'h'
-        - figure_size: optional (width, height) tuple in inch; default: (16, 12)
+        elements: timeseries (Series or DataFrame) indexed by timestep
+        points: maximum number of points to keep
 
     Returns:
-        fig: figure handle
+        elements_downsampled: the kept rows of elements, in original order
     """
-    import matplotlib.pyplot as plt
-    import matplotlib as mpl
+    n = len(elements)
+    buckets = int(points) // 2
+    if buckets < 1 or n <= 2 * buckets:
+        return elements
 
-    if timesteps is None:
-        # default to all simulated timesteps
-        timesteps = sorted(get_entity(prob, 'tm').index)
+    if isinstance(elements, pd.DataFrame):
+        values = elements.values.sum(axis=1)
+    else:
+        values = elements.values
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    # rows sorted by value within each bucket: first is min, last is max
+    order = np.lexsort((values, bucket))
+    keep = np.unique(np.concatenate([order[edges[:-1]],
+                                     order[edges[1:] - 1],
+                                     [0, n - 1]]))
+    return elements.iloc[keep]
 
-    # convert timesteps to hour series for the plots
-    hoursteps = timesteps * dt[0]
-    hoursteps_plot = timesteps_plot * dt[0]
 
-    if is_string(sit):
-        # wrap single site in 1-element list for consistent behaviour
-        sit = [sit]
+def _plot_data(prob, stf, com, sit, timesteps, cube=None):
+    """Prepare the timeseries of one commodity balance plot.
+
+    Args:
+        - prob: urbs model instance
+        - stf: support timeframe
+        - com: commodity name to plot
+        - sit: list of site names to plot
+        - timesteps: modelled timesteps
+        - cube: optional TimeseriesCube of prob
 
+    Returns:
+        dict of the plotted timeseries (created, consumed, stored, demand,
+        original, deltademand) and the flag plot_dsm
+    """
     (created, consumed, stored, imported, exported,
-     dsm, voltage_angle) = get_timeseries(prob, stf, com, sit, timesteps)
+     dsm, voltage_angle) = get_timeseries(prob, stf, com, sit, timesteps,
+                                          cube=cube)
 
     # move retrieved/stored storage timeseries to created/consumed and
     # rename storage columns back to 'storage' for color mapping
@@ -147,8 +142,119 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
     created = sort_plot_elements(created)
     consumed = sort_plot_elements(consumed)
 
+    return {'created': created, 'consumed': consumed, 'stored': stored,
+            'demand': demand, 'original': original,
+            'deltademand': deltademand, 'plot_dsm': plot_dsm}
+
+
+def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
+         power_name='Power', energy_name='Energy',
+         power_unit='MW', energy_unit='MWh', time_unit='h',
+         figure_size=(16, 12), cube=None, decimate=False, rasterize=False):
+    """Plot a stacked timeseries of commodity balance and storage.
+
+    Creates a stackplot of the energy balance of a given commodity, together
+    with stored energy in a second subplot.
+
+    Args:
+        - prob: urbs model instance
+        - stf: support timeframe
+        - com: commodity name to plot
+        - sit: site name to plot
+        - dt: length of each time step (unit: hours)
+        - timesteps: modelled timesteps
+        - timesteps_plot: timesteps to be plotted
+        - power_name: optional string for 'power' label; default: 'Power'
+        - power_unit: optional string for unit; default: 'MW'
+        - energy_name: optional string for 'energy' label; default: 'Energy'
+        - energy_unit: optional string for storage plot; default: 'MWh'
+        - time_unit: optional string for time unit label; default: 'h'
+        - figure_size: optional (width, height) tuple in inch; default: (16, 12)
+        - cube: optional TimeseriesCube of prob, to be shared among plots
+        - decimate: optional; if True, reduce the plotted timeseries to the
+          pixel width of the figure (c.f. downsample); default: False
+        - rasterize: optional; if True, embed the area and line plots as
+          bitmap in vector outputs (e.g. pdf); default: False
+
+    Returns:
+        fig: figure handle
+    """
+    if timesteps is None:
+        # default to all simulated timesteps
+        timesteps = sorted(get_entity(prob, 'tm', copy=False).index)
+
+    if is_string(sit):
+        # wrap single site in 1-element list for consistent behaviour
+        sit = [sit]
+
+    data = _plot_data(prob, stf, com, sit, timesteps, cube=cube)
+    return _draw(data, com, sit, dt, timesteps_plot,
+                 power_name=power_name, energy_name=energy_name,
+                 power_unit=power_unit, energy_unit=energy_unit,
+                 time_unit=time_unit, figure_size=figure_size,
+                 decimate=decimate, rasterize=rasterize)
+
+
+def _slice_plot_data(data, timesteps_plot):
+    """Restrict prepared plot data (c.f. _plot_data) to a plot period.
+
+    Args:
+        - data: dict returned by _plot_data
+        - timesteps_plot: timesteps to be plotted
+
+    Returns:
+        dict like data, with all timeseries restricted to the time span of
+        timesteps_plot
+    """
+    first, last = min(timesteps_plot), max(timesteps_plot)
+    return {key: value.loc[first:last]
+            if isinstance(value, (pd.Series, pd.DataFrame)) else value
+            for key, value in data.items()}
+
+
+def _draw(data, com, sit, dt, timesteps_plot,
+          power_name='Power', energy_name='Energy',
+          power_unit='MW', energy_unit='MWh', time_unit='h',
+          figure_size=(16, 12), decimate=False, rasterize=False):
+    """Draw a commodity balance plot from prepared data (c.f. _plot_data).
+
+    Only the part of the timeseries within timesteps_plot is drawn.
+
+    Args: c.f. plot; data is the dict returned by _plot_data, sit a list of
+    site names.
+
+    Returns:
+        fig: figure handle
+    """
+    import matplotlib.pyplot as plt
+    import matplotlib as mpl
+
+    data = _slice_plot_data(data, timesteps_plot)
+    created = data['created']
+    consumed = data['consumed']
+    stored = data['stored']
+    demand = data['demand']
+    original = data['original']
+    deltademand = data['deltademand']
+    plot_dsm = data['plot_dsm']
+
+    # convert timesteps to hour series for the plots
+    def hours(series):
+        return np.asarray(series.index) * dt[0]
+
+    hoursteps_plot = timesteps_plot * dt[0]
+
     # FIGURE
     fig = plt.figure(figsize=figure_size)
+
+    if decimate:
+        # at most one min/max pair per horizontal pixel
+        points = 2 * int(figure_size[0] * fig.dpi)
+        created = downsample(created, points)
+        consumed = downsample(consumed, points)
+        demand = downsample(demand, points)
+        original = downsample(original, points)
+        stored = downsample(stored, points)
     all_axes = []
     if plot_dsm:
         gs = mpl.gridspec.GridSpec(3, 1, height_ratios=[3, 1, 1], hspace=0.05)
@@ -162,7 +268,7 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
     # PLOT CONSUMED
 
     # stack plot for consumed commodities (divided by dt for power)
-    sp00 = ax0.stackplot(hoursteps[1:],
+    sp00 = ax0.stackplot(hours(consumed),
                          -consumed.values.T / dt[0],
                          labels=tuple(consumed.columns),
                          linewidth=0.15)
@@ -172,11 +278,12 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
 
         sp00[k].set_facecolor(commodity_color)
         sp00[k].set_edgecolor((.5, .5, .5))
+        sp00[k].set_rasterized(rasterize)
 
     # PLOT CREATED
 
     # stack plot for created commodities (divided by dt for power)
-    sp0 = ax0.stackplot(hoursteps[1:],
+    sp0 = ax0.stackplot(hours(created),
                         created.values.T / dt[0],
                         labels=tuple(created.columns),
                         linewidth=0.15)
@@ -186,6 +293,7 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
 
         sp0[k].set_facecolor(commodity_color)
         sp0[k].set_edgecolor(to_color('Decoration'))
+        sp0[k].set_rasterized(rasterize)
 
     # label
     ax0.set_title('Commodity balance of {} in {}'.format(com, ', '.join(sit)))
@@ -223,13 +331,13 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
 
     # PLOT DEMAND
     # line plot for demand (unshifted) commodities (divided by dt for power)
-    ax0.plot(hoursteps, original.values / dt[0], linewidth=0.8,
-             color=to_color('Unshifted'))
+    ax0.plot(hours(original), original.values / dt[0], linewidth=0.8,
+             color=to_color('Unshifted'), rasterized=rasterize)
 
     # line plot for demand (in case of DSM mode: shifted) commodities
     # (divided by dt for power)
-    ax0.plot(hoursteps[1:], demand.values / dt[0], linewidth=1.0,
-             color=to_color('Shifted'))
+    ax0.plot(hours(demand), demand.values / dt[0], linewidth=1.0,
+             color=to_color('Shifted'), rasterized=rasterize)
 
     # PLOT STORAGE
     ax1 = plt.subplot(gs[1], sharex=ax0)
@@ -237,10 +345,10 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
 
     # stack plot for stored commodities
     try:
-        sp1 = ax1.stackplot(hoursteps, stored.values, linewidth=0.15)
+        sp1 = ax1.stackplot(hours(stored), stored.values, linewidth=0.15)
     except BaseException:
-        stored = pd.Series(0, index=hoursteps)
-        sp1 = ax1.stackplot(hoursteps, stored.values, linewidth=0.15)
+        stored = pd.Series(0, index=original.index)
+        sp1 = ax1.stackplot(hours(stored), stored.values, linewidth=0.15)
     if plot_dsm:
         # hide xtick labels only if DSM plot follows
         plt.setp(ax1.get_xticklabels(), visible=False)
@@ -251,6 +359,7 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
     # color & labels
     sp1[0].set_facecolor(to_color('Storage'))
     sp1[0].set_edgecolor(to_color('Decoration'))
+    sp1[0].set_rasterized(rasterize)
     ax1.set_ylabel('{} ({})'.format(energy_name, energy_unit))
 
     # try:
@@ -264,7 +373,7 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
         all_axes.append(ax2)
 
         # bar plot for DSM up-/downshift power (bar width depending on dt)
-        ax2.bar(hoursteps,
+        ax2.bar(hours(deltademand),
                 deltademand.values / dt[0], width=0.8 * dt[0],
                 color=to_color('Delta'),
                 edgecolor='none')
@@ -316,11 +425,32 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
     return fig
 
 
+def _init_worker():
+    # figures are only saved to files; no display needed in worker processes
+    plt.switch_backend('Agg')
+
+
+def _render_figure(job):
+    """Draw one figure, set its title and save it to all given filenames;
+    worker function for result_figures."""
+    data, com, sit, dt, timesteps_plot, title, filenames, kwds = job
+    fig = _draw(data, com, sit, dt, timesteps_plot, **kwds)
+    fig.get_axes()[0].set_title(title)
+    for fig_filename in filenames:
+        fig.savefig(fig_filename, bbox_inches='tight')
+    plt.close(fig)
+
+
 def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
                    plot_tuples=None, plot_sites_name={},
-                   periods=None, extensions=None, **kwds):
+                   periods=None, extensions=None, processes=1, **kwds):
     """Create plots for multiple periods and sites and save them to files.
 
+    The timeseries of each plot tuple are computed once for all its periods,
+    right before its figures are drawn. With processes > 1, the figures are
+    drawn and saved by a pool of worker processes using the non-interactive
+    Agg backend.
+
     Args:
         - prob: urbs model instance
         - figure_basename: relative filename prefix that is shared;
@@ -334,11 +464,13 @@ def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
           default: one period 'all' with all timesteps is assumed;
         - extensions: (optional) list of file extensions for plot images,
           default: png, pdf;
+        - processes: (optional) number of worker processes drawing the
+          figures, default: 1 (draw in this process)
         - ``**kwds: (optional) keyword arguments are forwarded to urbs.plot()``
     """
 
     # retrieve parameter 'dt' from the model
-    dt = get_entity(prob, 'dt')
+    dt = get_entity(prob, 'dt', copy=False)
 
     # default to all demand (sit, com) tuples if none are specified
     if plot_tuples is None:
@@ -346,13 +478,48 @@ def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
 
     # default to all timesteps if no periods are given
     if periods is None:
-        periods = {'all': sorted(get_entity(prob, 'tm').index)}
+        periods = {'all': sorted(get_entity(prob, 'tm',
+                                            copy=False).index)}
 
     # default to PNG and PDF plots if no filetypes are specified
     if extensions is None:
         extensions = ['png', 'pdf']
 
-    # create timeseries plot for each demand (site, commodity) timeseries
+    if timesteps is None:
+        timesteps = sorted(get_entity(prob, 'tm', copy=False).index)
+
+    # if no custom title prefix is specified, use the figure_basename
+    if not plot_title_prefix:
+        plot_title_prefix = os.path.basename(figure_basename)
+
+    # split all timeseries once for all plots
+    cube = TimeseriesCube(prob)
+
+    jobs = _plot_jobs(prob, figure_basename, timesteps, plot_title_prefix,
+                      plot_tuples, plot_sites_name, periods, extensions, dt,
+                      cube, kwds)
+
+    if processes > 1:
+        # feed the pool a few jobs per worker at a time, so that only their
+        # plot data is held in memory (Pool.imap would consume all jobs)
+        with multiprocessing.Pool(processes,
+                                  initializer=_init_worker) as pool:
+            while True:
+                batch = list(itertools.islice(jobs, 2 * processes))
+                if not batch:
+                    break
+                pool.map(_render_figure, batch)
+    else:
+        for job in jobs:
+            _render_figure(job)
+
+
+def _plot_jobs(prob, figure_basename, timesteps, plot_title_prefix,
+               plot_tuples, plot_sites_name, periods, extensions, dt, cube,
+               kwds):
+    """Generate one drawing job per (plot tuple, period), c.f.
+    _render_figure. The plot data of a tuple is only computed when its first
+    job is requested."""
     for stf, sit, com in plot_tuples:
         # wrap single site name in 1-element list for consistent behaviour
         if is_string(sit):
@@ -366,28 +533,18 @@ def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
         except BaseException:
             plot_sites_name[sit] = str(sit)
 
+        data = _plot_data(prob, stf, com, help_sit, timesteps, cube=cube)
+        title = '{}: {} in {}, {}'.format(
+            plot_title_prefix, com, plot_sites_name[sit], stf)
+
         for period, periodrange in periods.items():
-            # do the plotting
-            fig = plot(prob, stf, com, help_sit, dt, timesteps, periodrange,
-                       **kwds)
-
-            # change the figure title
-            ax0 = fig.get_axes()[0]
-            # if no custom title prefix is specified, use the figure_basename
-            if not plot_title_prefix:
-                plot_title_prefix = os.path.basename(figure_basename)
-
-            new_figure_title = '{}: {} in {}, {}'.format(
-                plot_title_prefix, com, plot_sites_name[sit], stf)
-            ax0.set_title(new_figure_title)
-
-            # save plot to files
-            for ext in extensions:
-                fig_filename = '{}-{}-{}-{}-{}.{}'.format(
-                    figure_basename, stf, com, ''.join(
-                        plot_sites_name[sit]), period, ext)
-                fig.savefig(fig_filename, bbox_inches='tight')
-            plt.close(fig)
+            filenames = ['{}-{}-{}-{}-{}.{}'.format(
+                             figure_basename, stf, com,
+                             ''.join(plot_sites_name[sit]), period, ext)
+                         for ext in extensions]
+            # only the period slice is passed on to the drawing
+            yield (_slice_plot_data(data, periodrange), com, help_sit, dt,
+                   periodrange, title, filenames, kwds)
 
 
 def to_color(obj=None):
@@ -0,0 +1,266 @@
+import collections
+import contextlib
+import inspect
+import json
+import os
+import threading
+import time
+import warnings
+import pandas as pd
+import pyomo.core as pyomo
+from datetime import datetime
+from pyomo.core.expr.current import identify_variables
+
+
+class _PeakSampler(threading.Thread):
+    """Background thread sampling the resident set size (RSS) of this
+    process, keeping its maximum."""
+
+    def __init__(self, process, interval):
+        super(_PeakSampler, self).__init__()
+        self.daemon = True
+        self.process = process
+        self.interval = interval
+        self.peak = process.memory_info().rss
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+        return self.peak
+
+
+class Telemetry(object):
+    """Record wall time, CPU time and memory use of the phases of a run.
+
+    Each phase records its wall and CPU time (of this process) and the
+    resident set size (RSS) at its start and end as well as its peak, which
+    is sampled by a background thread. Phases may be nested; sub-phases are
+    named with a dotted prefix, e.g. 'create_model.storage'.
+
+    Usage:
+        telemetry = Telemetry()
+        with telemetry.phase('read_input'):
+            data = read_input(...)
+        telemetry.write('result/scenario_base.telemetry.json')
+    """
+
+    def __init__(self, interval=0.05):
+        """Args:
+            - interval: (optional) RSS sampling interval in seconds
+        """
+        import psutil
+
+        self.interval = interval
+        self.process = psutil.Process()
+        self.created = datetime.now().isoformat()
+        self.phases = []
+        self.info = {}
+        self._running = []
+
+    def start(self, name):
+        """Start timing phase name (c.f. stop)."""
+        sampler = _PeakSampler(self.process, self.interval)
+        sampler.start()
+        self._running.append((name, time.perf_counter(), time.process_time(),
+                              sampler.peak, sampler))
+
+    def stop(self):
+        """Stop the most recently started phase and record it.
+
+        Returns:
+            dict of the recorded phase
+        """
+        name, wall, cpu, rss_start, sampler = self._running.pop()
+        record = {
+            'name': name,
+            'wall': time.perf_counter() - wall,
+            'cpu': time.process_time() - cpu,
+            'rss_start': rss_start,
+            'rss_peak': sampler.stop(),
+            'rss_end': self.process.memory_info().rss,
+        }
+        self.phases.append(record)
+        return record
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager timing the enclosed block as phase name."""
+        self.start(name)
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    def to_dict(self):
+        """Return all recorded phases and info as a JSON serialisable dict."""
+        return {'created': self.created,
+                'pid': self.process.pid,
+                'info': self.info,
+                'phases': self.phases}
+
+    def write(self, filename):
+        """Write the telemetry to a JSON file."""
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+
+def telemetry_filename(logfile):
+    """Return the telemetry JSON filename belonging to a solver log file."""
+    return os.path.splitext(logfile)[0] + '.telemetry.json'
+
+
+def phase(telemetry, name):
+    """Return a context manager timing a phase, or doing nothing if
+    telemetry is None.
+
+    Args:
+        - telemetry: a Telemetry object or None
+        - name: phase name
+
+    Returns:
+        a context manager
+    """
+    if telemetry is None:
+        return _no_phase()
+    return telemetry.phase(name)
+
+
+@contextlib.contextmanager
+def _no_phase():
+    yield None
+
+
+class RuleProfiler(object):
+    """Profile the construction of Pyomo Constraints and Expressions.
+
+    While active (as context manager), the rule passed to each new
+    Constraint and Expression is wrapped to count its calls and its
+    Constraint.Skip returns, and the construction of these components is
+    timed. For each component, the calls, skips, generated rows, their
+    nonzeros (variables per row) and the construction time are recorded.
+    Components of the same name are accumulated.
+
+    Usage:
+        with RuleProfiler() as profiler:
+            prob = create_model(data, dt, timesteps, objective)
+        print(profiler.format_table())
+    """
+
+    # profiled component classes
+    COMPONENTS = [pyomo.Constraint, pyomo.Expression]
+
+    def __init__(self, nonzeros=True):
+        """Args:
+            - nonzeros: (optional) if False, skip counting nonzeros, which
+              takes a walk over all generated expressions
+        """
+        self.nonzeros = nonzeros
+        self.stats = collections.OrderedDict()
+        self._counts = {}
+        self._originals = []
+
+    def __enter__(self):
+        for cls in self.COMPONENTS:
+            for method, wrap in [('__init__', self._wrap_init),
+                                 ('construct', self._wrap_construct)]:
+                original = cls.__dict__[method]
+                self._originals.append((cls, method, original))
+                setattr(cls, method, wrap(original, cls.__name__))
+        return self
+
+    def __exit__(self, *exc):
+        while self._originals:
+            cls, method, original = self._originals.pop()
+            setattr(cls, method, original)
+        self._counts.clear()
+
+    def _wrap_init(self, original, kind):
+        profiler = self
+
+        def __init__(component, *args, **kwds):
+            rule = kwds.get('rule')
+            # generator rules (ConstraintList) must stay recognisable
+            if callable(rule) and not inspect.isgeneratorfunction(rule):
+                counts = {'calls': 0, 'skips': 0}
+
+                def counted_rule(*rule_args, **rule_kwds):
+                    counts['calls'] += 1
+                    value = rule(*rule_args, **rule_kwds)
+                    if value is pyomo.Constraint.Skip:
+                        counts['skips'] += 1
+                    return value
+                kwds['rule'] = counted_rule
+                profiler._counts[id(component)] = counts
+            original(component, *args, **kwds)
+
+        return __init__
+
+    def _wrap_construct(self, original, kind):
+        profiler = self
+
+        def construct(component, data=None):
+            if component.is_constructed():
+                return original(component, data)
+
+            start = time.perf_counter()
+            try:
+                return original(component, data)
+            finally:
+                elapsed = time.perf_counter() - start
+                counts = profiler._counts.pop(id(component), None)
+                profiler._record(component, kind, counts, elapsed)
+
+        return construct
+
+    def _record(self, component, kind, counts, elapsed):
+        rows = len(component)
+        if counts is None:
+            # no rule, e.g. Expression(expr=...)
+            counts = {'calls': 0, 'skips': 0}
+        elif rows and not counts['calls']:
+            warnings.warn("RuleProfiler: the rule of {} '{}' was not called "
+                          "through its wrapper; calls and skips are not "
+                          "counted.".format(kind, component.name))
+        nonzeros = 0
+        if self.nonzeros:
+            for data in component.values():
+                expr = data.body if kind == 'Constraint' else data.expr
+                if expr is not None:
+                    nonzeros += sum(1 for _ in identify_variables(
+                        expr, include_fixed=False))
+
+        stats = self.stats.setdefault(component.name, {
+            'name': component.name, 'type': kind, 'calls': 0, 'skips': 0,
+            'rows': 0, 'nonzeros': 0, 'time': 0.0})
+        stats['calls'] += counts['calls']
+        stats['skips'] += counts['skips']
+        stats['rows'] += rows
+        stats['nonzeros'] += nonzeros
+        stats['time'] += elapsed
+
+    def table(self):
+        """Return the recorded statistics, slowest component first.
+
+        Returns:
+            a DataFrame indexed by component name with the columns type,
+            calls, skips, rows, nonzeros, time (seconds) and skip_share
+        """
+        columns = ['type', 'calls', 'skips', 'rows', 'nonzeros', 'time']
+        if not self.stats:
+            return pd.DataFrame(columns=columns + ['skip_share'])
+        table = pd.DataFrame(list(self.stats.values())).set_index('name')
+        table = table[columns]
+        table['skip_share'] = (table['skips'] /
+                               table['calls'].where(table['calls'] > 0))
+        return table.sort_values('time', ascending=False)
+
+    def format_table(self):
+        """Format the recorded statistics, slowest component first, as
+        readable text."""
+        return self.table().to_string(float_format='{:.3f}'.format)
@@ -1,13 +1,19 @@
+import numpy as np
 import pandas as pd
 import pyomo.core as pyomo
+from pyomo.core.expr.numvalue import native_numeric_types
+from pyomo.repn import generate_standard_repn
 
 
-def get_entity(instance, name):
+def get_entity(instance, name, copy=True):
     """ Retrieve values (or duals) for an entity in a model instance.
 
     Args:
         instance: a Pyomo ConcreteModel instance
         name: name of a Set, Param, Var, Constraint or Objective
+        copy: (optional) if False, an entity from the result cache is
+              returned without copying it; the caller must not modify it
+              in place, default: True
 
     Returns:
         a Pandas Series with domain as index and values (or 1's, for sets) of
@@ -15,6 +21,8 @@ def get_entity(instance, name):
     """
     # magic: short-circuit if problem contains a result cache
     if hasattr(instance, '_result') and name in instance._result:
+        if not copy:
+            return instance._result[name]
         return instance._result[name].copy(deep=True)
 
     # retrieve entity, its type and its onset names
@@ -27,10 +35,10 @@ def get_entity(instance, name):
     # extract values
     if isinstance(entity, pyomo.Set):
         if entity.dimen > 1:
-            results = pd.DataFrame([v + (1,) for v in entity.value])
+            results = pd.DataFrame([v + (1,) for v in entity])
         else:
             # Pyomo sets don't have values, only elements
-            results = pd.DataFrame([(v, 1) for v in entity.value])
+            results = pd.DataFrame([(v, 1) for v in entity])
 
         # for unconstrained sets, the column label is identical to their index
         # hence, make index equal to entity name and append underscore to name
@@ -41,70 +49,39 @@ def get_entity(instance, name):
             name = name + '_'
 
     elif isinstance(entity, pyomo.Param):
-        if entity.dim() > 1:
-            results = pd.DataFrame(
-                [v[0] + (v[1],) for v in entity.iteritems()])
-        elif entity.dim() == 1:
-            results = pd.DataFrame(
-                [(v[0], v[1]) for v in entity.iteritems()])
-        else:
-            results = pd.DataFrame(
-                [(v[0], v[1].value) for v in entity.iteritems()])
+        keys = list(entity.keys())
+        values = [pyomo.value(entity[key]) for key in keys]
+        if entity.dim() == 0:
             labels = ['None']
+        results = None
 
     elif isinstance(entity, pyomo.Expression):
-        if entity.dim() > 1:
-            results = pd.DataFrame(
-                [v[0]+(v[1](),) for v in entity.iteritems()])
-        elif entity.dim() == 1:
-            results = pd.DataFrame(
-                [(v[0], v[1]()) for v in entity.iteritems()])
-        else:
-            results = pd.DataFrame(
-                [(v[0], v[1]()) for v in entity.iteritems()])
+        keys = list(entity.keys())
+        values = _expression_values(instance, name, entity)
+        if entity.dim() == 0:
             labels = ['None']
+        results = None
 
     elif isinstance(entity, pyomo.Constraint):
-        if entity.dim() > 1:
-            # check whether all entries of the constraint have
-            # an existing dual variable
-            # in that case add to results
-            results = pd.DataFrame(
-                [key + (instance.dual[entity.__getitem__(key)],)
-                 for (id, key) in entity.id_index_map().items()
-                 if id in instance.dual._dict.keys()])
-        elif entity.dim() == 1:
-            results = pd.DataFrame(
-                [(v[0], instance.dual[v[1]]) for v in entity.iteritems()])
-        else:
-            results = pd.DataFrame(
-                [(v[0], instance.dual[v[1]]) for v in entity.iteritems()])
+        keys, values = _constraint_duals(instance, [entity])[0]
+        if entity.dim() == 0:
             labels = ['None']
+        results = None
 
     else:
-        # create DataFrame
-        if entity.dim() > 1:
-            # concatenate index tuples with value if entity has
-            # multidimensional indices v[0]
-            results = pd.DataFrame(
-                [v[0] + (v[1].value,) for v in entity.iteritems()])
-        elif entity.dim() == 1:
-            # otherwise, create tuple from scalar index v[0]
-            results = pd.DataFrame(
-                [(v[0], v[1].value) for v in entity.iteritems()])
-        else:
-            # assert(entity.dim() == 0)
-            results = pd.DataFrame(
-                [(v[0], v[1].value) for v in entity.iteritems()])
+        # variables: gather values in index order in one float array
+        keys = list(entity.keys())
+        values = np.array([v.value for v in entity.values()], dtype=float)
+        if entity.dim() == 0:
             labels = ['None']
+        results = None
 
-    # check for duplicate onset names and append one to several "_" to make
-    # them unique, e.g. ['sit', 'sit', 'com'] becomes ['sit', 'sit_', 'com']
-    for k, label in enumerate(labels):
-        if label in labels[:k] or label == name:
-            labels[k] = labels[k] + "_"
+    labels = _unique_labels(labels, name)
 
-    if not results.empty:
+    if results is None:
+        # bulk path for params, variables, expressions and constraints
+        results = _bulk_series(keys, values, labels, name)
+    elif not results.empty:
         # name columns according to labels + entity name
         results.columns = labels + [name]
         results.set_index(labels, inplace=True)
@@ -117,7 +94,206 @@ def get_entity(instance, name):
     return results
 
 
-def get_entities(instance, names):
+def _unique_labels(labels, name):
+    """ Make onset names unique and different from the entity name.
+
+    Duplicates get one to several "_" appended, e.g. ['sit', 'sit', 'com']
+    becomes ['sit', 'sit_', 'com'].
+    """
+    labels = list(labels)
+    for k, label in enumerate(labels):
+        if label in labels[:k] or label == name:
+            labels[k] = labels[k] + "_"
+    return labels
+
+
+def _bulk_index(keys, labels):
+    """ Build a (Multi)Index from a list of entity keys.
+
+    The codes of each level are computed once with pd.factorize instead of
+    hashing every index tuple when creating the MultiIndex. Like
+    MultiIndex.from_arrays, the levels are sorted (unless their values are
+    not comparable), so that e.g. unstacked columns come out alphabetically.
+
+    Args:
+        keys: list of scalar keys or equally long key tuples
+        labels: list of index level names
+
+    Returns:
+        a Pandas Index or MultiIndex
+    """
+    if len(labels) > 1:
+        codes, levels = [], []
+        for level in zip(*keys):
+            try:
+                level_codes, uniques = pd.factorize(list(level), sort=True)
+            except TypeError:
+                # mixed, unorderable values keep their order of appearance
+                level_codes, uniques = pd.factorize(list(level))
+            codes.append(level_codes)
+            levels.append(uniques)
+        return pd.MultiIndex(levels=levels, codes=codes, names=labels,
+                             verify_integrity=False)
+    return pd.Index(keys, name=labels[0] if labels else None)
+
+
+def _bulk_series(keys, values, labels, name):
+    """ Wrap entity keys and values into a Series, c.f. get_entity. """
+    if not keys:
+        return pd.Series(name=name)
+    return pd.Series(values, index=_bulk_index(keys, labels), name=name)
+
+
+def _expression_values(instance, name, entity):
+    """ Evaluate all members of an Expression component in one batch.
+
+    The linear representation (sparse coefficient matrix A as row, column,
+    coefficient arrays, constant vector b and the variables x) of the
+    expressions is computed once per model and cached in
+    instance._expression_matrices; the values are A * x + b. Coefficients
+    and constants that depend on mutable params or fixed variables are kept
+    as Pyomo expressions and evaluated on each call, so that the cache stays
+    valid when these change. Nonlinear members are evaluated one by one.
+
+    Args:
+        instance: a Pyomo ConcreteModel instance
+        name: name of the Expression
+        entity: the Expression component
+
+    Returns:
+        a float array with the values of the expression members in the
+        order of entity.keys()
+    """
+    if not hasattr(instance, '_expression_matrices'):
+        instance._expression_matrices = {}
+
+    if name not in instance._expression_matrices:
+        columns = {}
+        variables = []
+        rows, cols, coefs = [], [], []
+        constant = []
+        symbolic = []  # (coefficient position, expression)
+        symbolic_constant = []  # (row, expression)
+        nonlinear = {}
+        for k, expr in enumerate(entity.values()):
+            repn = generate_standard_repn(expr.expr, compute_values=False)
+            if not repn.is_linear():
+                nonlinear[k] = expr
+                constant.append(0.0)
+                continue
+            for var, coef in zip(repn.linear_vars, repn.linear_coefs):
+                if id(var) not in columns:
+                    columns[id(var)] = len(variables)
+                    variables.append(var)
+                if type(coef) not in native_numeric_types:
+                    symbolic.append((len(coefs), coef))
+                    coef = 0.0
+                rows.append(k)
+                cols.append(columns[id(var)])
+                coefs.append(coef)
+            if type(repn.constant) not in native_numeric_types:
+                symbolic_constant.append((k, repn.constant))
+                constant.append(0.0)
+            else:
+                constant.append(repn.constant)
+        instance._expression_matrices[name] = (
+            np.array(rows, dtype=int), np.array(cols, dtype=int),
+            np.array(coefs, dtype=float), variables,
+            np.array(constant, dtype=float), symbolic, symbolic_constant,
+            nonlinear)
+
+    (rows, cols, coefs, variables, constant, symbolic,
+     symbolic_constant, nonlinear) = instance._expression_matrices[name]
+    if symbolic:
+        coefs = coefs.copy()
+        for i, coef in symbolic:
+            coefs[i] = pyomo.value(coef)
+    if symbolic_constant:
+        constant = constant.copy()
+        for k, expr in symbolic_constant:
+            constant[k] = pyomo.value(expr)
+    x = np.array([v.value for v in variables], dtype=float)
+    # sparse matrix-vector product A * x
+    values = np.bincount(rows, weights=coefs * x[cols],
+                         minlength=len(constant)) + constant
+    for k, expr in nonlinear.items():
+        values[k] = pyomo.value(expr)
+    return values
+
+
+def _constraint_duals(instance, entities):
+    """ Read the duals of several constraints in one pass over the suffix.
+
+    The dual suffix is iterated once; its values are sorted by constraint
+    component into arrays, in the order of the members of each component.
+    Members without a dual (e.g. deactivated ones) are dropped.
+
+    Args:
+        instance: a Pyomo ConcreteModel instance with a dual suffix
+        entities: list of Constraint components of instance
+
+    Returns:
+        list of (keys, values) tuples of the members with dual values, one
+        per entity
+    """
+    found = {id(entity): ([], []) for entity in entities}
+    for con, dual in instance.dual.items():
+        members = found.get(id(con.parent_component()))
+        if members is not None:
+            members[0].append(id(con))
+            members[1].append(dual)
+
+    duals = []
+    for entity in entities:
+        ids, values = found[id(entity)]
+        # id of member: key, in the order of the members
+        index = entity.id_index_map()
+        keys = list(index.values())
+        position = dict(zip(index, range(len(keys))))
+        positions = np.array([position[i] for i in ids], dtype=int)
+        rank = np.argsort(positions, kind='mergesort')
+        duals.append(([keys[k] for k in positions[rank]],
+                      np.array(values, dtype=float)[rank]))
+    return duals
+
+
+def get_duals(instance, names=None):
+    """ Retrieve the duals of several constraints.
+
+    The dual suffix is read only once for all constraints that are not
+    already in the result cache (c.f. get_entity).
+
+    Args:
+        instance: a Pyomo ConcreteModel instance with a dual suffix
+        names: (optional) list of constraint names, default: all constraints
+
+    Returns:
+        a dict of constraint name: Series of dual values (c.f. get_entity)
+    """
+    if names is None:
+        names = list_entities(instance, 'con').index.tolist()
+
+    result = {}
+    pending = []
+    for name in names:
+        if hasattr(instance, '_result') and name in instance._result:
+            result[name] = get_entity(instance, name)
+        elif isinstance(getattr(instance, name, None), pyomo.Constraint):
+            pending.append(name)
+        else:
+            result[name] = pd.Series(name=name)
+
+    entities = [getattr(instance, name) for name in pending]
+    for name, entity, (keys, values) in zip(
+            pending, entities, _constraint_duals(instance, entities)):
+        labels = ['None'] if entity.dim() == 0 else \
+            _get_onset_names(entity)
+        result[name] = _bulk_series(keys, values,
+                                    _unique_labels(labels, name), name)
+    return {name: result[name] for name in names}
+
+
+def get_entities(instance, names, copy=True):
     """ Return one DataFrame with entities in columns and a common index.
 
     Works only on entities that share a common domain (set or set_tuple), which
@@ -126,6 +302,8 @@ def get_entities(instance, names):
     Args:
         instance: a Pyomo ConcreteModel instance
         names: list of entity names (as returned by list_entities)
+        copy: (optional) passed to get_entity; with False, the returned
+              DataFrame may share data with the result cache, default: True
 
     Returns:
         a Pandas DataFrame with entities as columns and domains as index
@@ -133,7 +311,7 @@ def get_entities(instance, names):
 
     df = pd.DataFrame()
     for name in names:
-        other = get_entity(instance, name)
+        other = get_entity(instance, name, copy=copy)
 
         if df.empty:
             df = other.to_frame()
@@ -0,0 +1,190 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+import pyomo.version
+from datetime import datetime
+from .benchmark import BENCHMARK_GRID
+
+# fixed workloads: name, problem size, solver, measured phases; the solve
+# workload uses CBC instead of GLPK, the default solver of the run scripts,
+# as the committed baseline was measured with CBC and solve times of
+# different solvers are not comparable
+REGRESSION_WORKLOADS = [
+    ('build', BENCHMARK_GRID['small'], None,
+     ['pyomo_model_prep', 'create_model']),
+    ('solve', BENCHMARK_GRID['small'], 'cbc',
+     ['create_model', 'solve']),
+    ('extract_report', BENCHMARK_GRID['small'], 'cbc',
+     ['create_result_cache', 'report']),
+]
+
+# allowed relative increase of the median per metric, and absolute slack
+# below which differences are ignored as noise (seconds resp. bytes); the
+# slack only matters for phases shorter than a few tenths of a second
+REGRESSION_TOLERANCES = {
+    'wall': (0.25, 0.05),
+    'rss_increase': (0.25, 4 * 2 ** 20),
+}
+
+# directory containing the urbs package, put on the path of the workers
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _isolated_case(size, solver):
+    """Run benchmark_case in a fresh Python process, so that memory held by
+    earlier runs does not distort the measurement."""
+    code = ('import json, sys\n'
+            'from urbs.benchmark import benchmark_case\n'
+            'result = benchmark_case(json.loads(sys.argv[1]),\n'
+            '                        solver=sys.argv[2] or None)\n'
+            'with open(sys.argv[3], "w") as f:\n'
+            '    json.dump(result, f)\n')
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        path for path in [_PACKAGE_ROOT, env.get('PYTHONPATH')] if path)
+
+    handle, filename = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    try:
+        subprocess.check_call([sys.executable, '-c', code, json.dumps(size),
+                               solver or '', filename],
+                              env=env, stdout=subprocess.DEVNULL)
+        with open(filename) as f:
+            return json.load(f)
+    finally:
+        os.remove(filename)
+
+
+def run_regression(workloads=None, repeat=5):
+    """Measure the regression workloads.
+
+    Each workload is run repeat times, each run in a fresh Python process;
+    per phase, the median wall time and memory increase are kept to reduce
+    noise. Workloads with the same size and solver share their runs.
+
+    Args:
+        - workloads: (optional) list of (name, size, solver, phases) tuples,
+          default: REGRESSION_WORKLOADS
+        - repeat: (optional) number of runs per workload
+
+    Returns:
+        dict with machine information and, per workload and phase, the
+        metrics wall (seconds) and rss_increase (peak resident set size
+        during the phase minus that at its start, in bytes)
+    """
+    if workloads is None:
+        workloads = REGRESSION_WORKLOADS
+
+    runs = {}
+    results = {}
+    for name, size, solver, phases in workloads:
+        key = (json.dumps(size, sort_keys=True), solver)
+        if key not in runs:
+            runs[key] = [_isolated_case(size, solver) for _ in range(repeat)]
+            if solver is not None and not all(run['solved']
+                                              for run in runs[key]):
+                raise ValueError("Workload '{}' could not be solved with "
+                                 "solver '{}'.".format(name, solver))
+        results[name] = {}
+        for phase in phases:
+            records = [record for run in runs[key]
+                       for record in run['phases'] if record['name'] == phase]
+            if not records:
+                raise KeyError("Phase '{}' not recorded for workload "
+                               "'{}'.".format(phase, name))
+            results[name][phase] = {
+                'wall': statistics.median(
+                    record['wall'] for record in records),
+                'rss_increase': statistics.median(
+                    record['rss_peak'] - record['rss_start']
+                    for record in records)}
+
+    return {'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'pyomo': pyomo.version.version,
+            'repeat': repeat,
+            'results': results}
+
+
+def compare_regression(current, baseline, tolerances=None):
+    """Compare regression measurements against a baseline.
+
+    A metric regresses if it exceeds the baseline by more than its relative
+    tolerance and its absolute slack (c.f. REGRESSION_TOLERANCES).
+
+    Args:
+        - current: dict as returned by run_regression
+        - baseline: dict as returned by run_regression, e.g. loaded from
+          the baseline file
+        - tolerances: (optional) dict of metric: (relative, absolute)
+
+    Returns:
+        a DataFrame indexed by (workload, phase, metric) with the columns
+        baseline, current, change (relative), limit and status ('ok',
+        'faster', 'REGRESSION', or 'new'/'missing' if only in one result)
+    """
+    if tolerances is None:
+        tolerances = REGRESSION_TOLERANCES
+
+    rows = []
+    names = sorted(set(current['results']) | set(baseline['results']))
+    for name in names:
+        cur = current['results'].get(name, {})
+        base = baseline['results'].get(name, {})
+        for phase in sorted(set(cur) | set(base)):
+            for metric, (relative, absolute) in sorted(tolerances.items()):
+                value = cur.get(phase, {}).get(metric)
+                reference = base.get(phase, {}).get(metric)
+                if value is None or reference is None:
+                    status = 'new' if reference is None else 'missing'
+                    rows.append((name, phase, metric, reference, value,
+                                 None, None, status))
+                    continue
+                limit = max(reference * (1 + relative), reference + absolute)
+                if value > limit:
+                    status = 'REGRESSION'
+                elif value < reference / (1 + relative) and \
+                        reference - value > absolute:
+                    status = 'faster'
+                else:
+                    status = 'ok'
+                change = value / reference - 1 if reference else None
+                rows.append((name, phase, metric, reference, value, change,
+                             limit, status))
+
+    return pd.DataFrame(rows, columns=[
+        'workload', 'phase', 'metric', 'baseline', 'current', 'change',
+        'limit', 'status']).set_index(['workload', 'phase', 'metric'])
+
+
+def format_regression(comparison):
+    """Format the result of compare_regression as readable text."""
+    lines = []
+    for (name, phase, metric), row in comparison.iterrows():
+        if metric == 'wall':
+            def fmt(x):
+                return '-' if x is None or pd.isnull(x) else \
+                    '{:.3f} s'.format(x)
+        else:
+            def fmt(x):
+                return '-' if x is None or pd.isnull(x) else \
+                    '{:.1f} MB'.format(x / 2 ** 20)
+        change = '' if pd.isnull(row['change']) else \
+            '{:+.1%}'.format(row['change'])
+        lines.append('{:<16} {:<20} {:<13} {:>12} -> {:>12} {:>8}  {}'.format(
+            name, phase, metric, fmt(row['baseline']), fmt(row['current']),
+            change, row['status']))
+    return '\n'.join(lines)
+
+
+def write_regression(result, filename):
+    """Write a regression result, e.g. as new baseline, to a JSON file."""
+    with open(filename, 'w') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
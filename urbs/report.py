@@ -1,10 +1,84 @@
+import numbers
+import warnings
+import numpy as np
 import pandas as pd
 from .input import get_input
-from .output import get_constants, get_timeseries
+from .output import CONSTANT_ENTITIES, TIMESERIES_ENTITIES, \
+                    TimeseriesCube, get_constants, get_timeseries
 from .util import is_string
 
+# result entities read by report
+REPORT_ENTITIES = CONSTANT_ENTITIES + TIMESERIES_ENTITIES
 
-def report(instance, filename, report_tuples=None, report_sites_name={}):
+
+def _report_tuples(report_tuples, report_sites_name):
+    """Normalise report tuples to (stf, sit, sites, com) tuples.
+
+    sit is the site name or tuple of site names used as key of
+    report_sites_name (defaults are added in place), sites the list of
+    sites whose timeseries are summed up.
+    """
+    for stf, sit, com in report_tuples:
+        # wrap single site name in 1-element list for consistent behavior
+        if is_string(sit):
+            help_sit = [sit]
+        else:
+            help_sit = sit
+            sit = tuple(sit)
+
+        # check existence of predefined names, else define them
+        try:
+            report_sites_name[sit]
+        except BaseException:
+            report_sites_name[sit] = str(sit)
+
+        yield stf, sit, help_sit, com
+
+
+def _timeseries_tableau(instance, stf, com, site, cube=None):
+    """Return the timeseries tableau and its sums for one site.
+
+    Returns:
+        (tableau, sums) tuple; tableau is a DataFrame with the timeseries of
+        get_timeseries plus the balance in (group, name) columns, sums a
+        Series of their totals
+    """
+    (created, consumed, stored, imported, exported,
+     dsm, voltage_angle) = get_timeseries(instance, stf, com, site,
+                                          cube=cube)
+
+    overprod = pd.DataFrame(
+        columns=['Overproduction'],
+        data=created.sum(axis=1) - consumed.sum(axis=1) +
+        imported.sum(axis=1) - exported.sum(axis=1) +
+        stored['Retrieved'] - stored['Stored'])
+
+    tableau = pd.concat(
+        [created, consumed, stored, imported, exported, overprod,
+         dsm, voltage_angle],
+        axis=1,
+        keys=['Created', 'Consumed', 'Storage', 'Import from',
+              'Export to', 'Balance', 'DSM', 'Voltage Angle'])
+
+    # timeseries sums
+    sums = pd.concat([created.sum(), consumed.sum(),
+                      stored.sum().drop('Level'),
+                      imported.sum(), exported.sum(),
+                      overprod.sum(), dsm.sum()],
+                     axis=0,
+                     keys=['Created', 'Consumed', 'Storage',
+                           'Import', 'Export', 'Balance',
+                           'DSM'])
+    return tableau, sums
+
+
+def _sheet_name(stf, name, com):
+    # sheet names cannot be longer than 31 characters...
+    return "{}.{}.{} timeseries".format(stf, name, com)[:31]
+
+
+def report(instance, filename, report_tuples=None, report_sites_name={},
+           cube=None, streaming=False):
     """Write result summary to a spreadsheet file
 
     Args:
@@ -14,12 +88,26 @@ def report(instance, filename, report_tuples=None, report_sites_name={}):
           create detailed timeseries sheets;
         - report_sites_name: (optional) dict of names for created timeseries
           sheets
+        - cube: (optional) TimeseriesCube of instance, default: created once
+          for all report tuples
+        - streaming: (optional) if True, write with the constant memory
+          mode of xlsxwriter, each timeseries sheet as soon as it is
+          computed; tuples with the same sheet name are then written only
+          once, default: False
     """
 
     # default to all demand (sit, com) tuples if none are specified
     if report_tuples is None:
         report_tuples = get_input(instance, 'demand').columns
 
+    if cube is None:
+        cube = TimeseriesCube(instance)
+
+    if streaming:
+        _report_streaming(instance, filename, report_tuples,
+                          report_sites_name, cube)
+        return
+
     costs, cpro, ctra, csto = get_constants(instance)
 
     # create spreadsheet writer object
@@ -34,69 +122,21 @@ def report(instance, filename, report_tuples=None, report_sites_name={}):
         # initialize timeseries tableaus
         energies = []
         timeseries = {}
-        help_ts = {}
 
         # collect timeseries data
-        for stf, sit, com in report_tuples:
-
-            # wrap single site name in 1-element list for consistent behavior
-            if is_string(sit):
-                help_sit = [sit]
-            else:
-                help_sit = sit
-                sit = tuple(sit)
-
-            # check existence of predefined names, else define them
-            try:
-                report_sites_name[sit]
-            except BaseException:
-                report_sites_name[sit] = str(sit)
-
+        for stf, sit, help_sit, com in _report_tuples(report_tuples,
+                                                      report_sites_name):
+            key = (stf, report_sites_name[sit], com)
             for lv in help_sit:
-                (created, consumed, stored, imported, exported,
-                 dsm, voltage_angle) = get_timeseries(instance, stf, com, lv)
-
-                overprod = pd.DataFrame(
-                    columns=['Overproduction'],
-                    data=created.sum(axis=1) - consumed.sum(axis=1) +
-                    imported.sum(axis=1) - exported.sum(axis=1) +
-                    stored['Retrieved'] - stored['Stored'])
-
-                tableau = pd.concat(
-                    [created, consumed, stored, imported, exported, overprod,
-                     dsm, voltage_angle],
-                    axis=1,
-                    keys=['Created', 'Consumed', 'Storage', 'Import from',
-                          'Export to', 'Balance', 'DSM', 'Voltage Angle'])
-                help_ts[(stf, lv, com)] = tableau.copy()
-
-                # timeseries sums
-                help_sums = pd.concat([created.sum(), consumed.sum(),
-                                       stored.sum().drop('Level'),
-                                       imported.sum(), exported.sum(),
-                                       overprod.sum(), dsm.sum()],
-                                      axis=0,
-                                      keys=['Created', 'Consumed', 'Storage',
-                                            'Import', 'Export', 'Balance',
-                                            'DSM'])
-                try:
-                    timeseries[(stf, report_sites_name[sit], com)] = \
-                        timeseries[(stf, report_sites_name[sit], com)].add(
-                        help_ts[(stf, lv, com)], axis=1, fill_value=0)
-                    sums = sums.add(help_sums, fill_value=0)
-                except BaseException:
-                    timeseries[(stf, report_sites_name[sit], com)] = help_ts[
-                        (stf, lv, com)]
-                    sums = help_sums
-
-            # timeseries sums
-            sums = pd.concat([created.sum(), consumed.sum(),
-                              stored.sum().drop('Level'),
-                              imported.sum(), exported.sum(), overprod.sum(),
-                              dsm.sum()],
-                             axis=0,
-                             keys=['Created', 'Consumed', 'Storage', 'Import',
-                                   'Export', 'Balance', 'DSM'])
+                tableau, sums = _timeseries_tableau(instance, stf, com, lv,
+                                                    cube)
+                if key in timeseries:
+                    timeseries[key] = timeseries[key].add(
+                        tableau, axis=1, fill_value=0)
+                else:
+                    timeseries[key] = tableau
+
+            # commodity sums of a multi-site tuple are those of its last site
             energies.append(sums.to_frame("{}.{}.{}".format(stf, sit, com)))
 
         # write timeseries data (if any)
@@ -109,8 +149,188 @@ def report(instance, filename, report_tuples=None, report_sites_name={}):
             for stf, sit, com in report_tuples:
                 if isinstance(sit, list):
                     sit = tuple(sit)
-                # sheet names cannot be longer than 31 characters...
-                sheet_name = "{}.{}.{} timeseries".format(
-                    stf, report_sites_name[sit], com)[:31]
-                timeseries[(stf, report_sites_name[sit], com)].to_excel(
-                    writer, sheet_name)
+                key = (stf, report_sites_name[sit], com)
+                timeseries[key].to_excel(writer, _sheet_name(*key))
+
+
+def _write_cell(worksheet, row, col, value):
+    """Write a number or string cell; skip empty (None/NaN) values and
+    write infinite ones as 'inf'/'-inf' like DataFrame.to_excel."""
+    if value is None:
+        return
+    if isinstance(value, (numbers.Number, np.number)) and \
+            not isinstance(value, (bool, np.bool_)):
+        if np.isnan(value):
+            return
+        if np.isinf(value):
+            worksheet.write_string(row, col, 'inf' if value > 0 else '-inf')
+            return
+        worksheet.write_number(row, col, float(value))
+    else:
+        worksheet.write_string(row, col, str(value))
+
+
+def _sparse_labels(labels):
+    """Blank the repeated labels of all but the last level of MultiIndex
+    tuples, as they appear in the merged cells of DataFrame.to_excel."""
+    previous = None
+    for label in labels:
+        yield tuple(None if previous is not None and
+                    label[:k + 1] == previous[:k + 1] else value
+                    for k, value in enumerate(label[:-1])) + label[-1:]
+        previous = label
+
+
+def _write_frame(worksheet, df):
+    """Write a DataFrame row by row, as required by constant memory mode.
+
+    The layout follows DataFrame.to_excel: for simple columns one header row
+    starting with the index names; for MultiIndex columns one header row per
+    column level (level names left of the labels) and an index name row.
+    Then the data rows with the index values in the first columns; repeated
+    labels of MultiIndexes are left blank instead of merged.
+    """
+    index_levels = df.index.nlevels
+    row = 0
+    if df.columns.nlevels > 1:
+        header = zip(*_sparse_labels(list(df.columns)))
+        for level, labels in enumerate(header):
+            _write_cell(worksheet, row, index_levels - 1,
+                        df.columns.names[level])
+            for col, value in enumerate(labels):
+                _write_cell(worksheet, row, index_levels + col, value)
+            row += 1
+        for col, name in enumerate(df.index.names):
+            _write_cell(worksheet, row, col, name)
+        row += 1
+    else:
+        for col, name in enumerate(df.index.names):
+            _write_cell(worksheet, row, col, name)
+        for col, value in enumerate(df.columns):
+            _write_cell(worksheet, row, index_levels + col, value)
+        row += 1
+
+    if index_levels > 1:
+        index = _sparse_labels(list(df.index))
+    else:
+        index = ((value,) for value in df.index)
+    for labels, values in zip(index, df.itertuples(index=False, name=None)):
+        for col, value in enumerate(labels + values):
+            _write_cell(worksheet, row, col, value)
+        row += 1
+
+
+def _report_streaming(instance, filename, report_tuples, report_sites_name,
+                      cube):
+    """Write the report with xlsxwriter in constant memory mode."""
+    import xlsxwriter
+
+    costs, cpro, ctra, csto = get_constants(instance)
+
+    workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+    try:
+        for sheet, df in [('Costs', costs.to_frame()),
+                          ('Process caps', cpro),
+                          ('Transmission caps', ctra),
+                          ('Storage caps', csto)]:
+            _write_frame(workbook.add_worksheet(sheet), df)
+
+        # sheet is filled last, but must precede the timeseries sheets
+        if len(report_tuples):
+            sums_sheet = workbook.add_worksheet('Commodity sums')
+
+        energies = []
+        written = set()
+        for stf, sit, help_sit, com in _report_tuples(report_tuples,
+                                                      report_sites_name):
+            timeseries = None
+            for lv in help_sit:
+                tableau, sums = _timeseries_tableau(instance, stf, com, lv,
+                                                    cube)
+                if timeseries is None:
+                    timeseries = tableau
+                else:
+                    timeseries = timeseries.add(tableau, axis=1,
+                                                fill_value=0)
+
+            # commodity sums of a multi-site tuple are those of its last site
+            energies.append(sums.to_frame("{}.{}.{}".format(stf, sit, com)))
+
+            sheet_name = _sheet_name(stf, report_sites_name[sit], com)
+            if sheet_name in written:
+                warnings.warn("Sheet '{}' already written, skipping "
+                              "duplicate report tuple.".format(sheet_name))
+                continue
+            _write_frame(workbook.add_worksheet(sheet_name), timeseries)
+            written.add(sheet_name)
+
+        if energies:
+            _write_frame(sums_sheet,
+                         pd.concat(energies, axis=1).fillna(0))
+    finally:
+        workbook.close()
+
+
+def report_tables(instance, basename, report_tuples=None,
+                  report_sites_name={}, format='csv', cube=None):
+    """Write the report tables to CSV or Parquet files instead of Excel.
+
+    Writes one file per table of report (costs, process/transmission/
+    storage caps, commodity sums and one per timeseries tableau), each as
+    soon as it is computed. Column levels are joined with '.' for Parquet.
+
+    Args:
+        - instance: a urbs model instance
+        - basename: filename prefix, e.g. 'result/scenario_base'
+        - report_tuples: (optional) c.f. report
+        - report_sites_name: (optional) c.f. report
+        - format: (optional) 'csv' or 'parquet', default: 'csv'
+        - cube: (optional) TimeseriesCube of instance
+
+    Returns:
+        list of the written filenames
+    """
+    if format not in ('csv', 'parquet'):
+        raise ValueError("Unknown report table format '{}'".format(format))
+    if report_tuples is None:
+        report_tuples = get_input(instance, 'demand').columns
+    if cube is None:
+        cube = TimeseriesCube(instance)
+
+    filenames = []
+
+    def write(df, name):
+        filename = '{}-{}.{}'.format(basename, name, format)
+        if format == 'csv':
+            df.to_csv(filename)
+        else:
+            df = df.copy()
+            df.columns = ['.'.join(str(c) for c in column)
+                          if isinstance(column, tuple) else str(column)
+                          for column in df.columns]
+            df.to_parquet(filename)
+        filenames.append(filename)
+
+    costs, cpro, ctra, csto = get_constants(instance)
+    write(costs.to_frame(), 'costs')
+    write(cpro, 'process-caps')
+    write(ctra, 'transmission-caps')
+    write(csto, 'storage-caps')
+
+    energies = []
+    for stf, sit, help_sit, com in _report_tuples(report_tuples,
+                                                  report_sites_name):
+        timeseries = None
+        for lv in help_sit:
+            tableau, sums = _timeseries_tableau(instance, stf, com, lv, cube)
+            if timeseries is None:
+                timeseries = tableau
+            else:
+                timeseries = timeseries.add(tableau, axis=1, fill_value=0)
+        energies.append(sums.to_frame("{}.{}.{}".format(stf, sit, com)))
+        write(timeseries, '{}.{}.{}-timeseries'.format(
+            stf, report_sites_name[sit], com))
+
+    if energies:
+        write(pd.concat(energies, axis=1).fillna(0), 'commodity-sums')
+    return filenames
@@ -1,8 +1,14 @@
+import copy
 import os
 import pyomo.environ
 from pyomo.opt.base import SolverFactory
 from datetime import datetime, date
 from .model import create_model
+from .decomposition import is_decomposable, solve_islands
+from .admm import solve_admm
+from .highs import HighsSolver
+from .persistent import ScenarioSession
+from .profiling import Telemetry, phase, telemetry_filename
 from .report import *
 from .plot import *
 from .input import *
@@ -31,6 +37,22 @@ def prepare_result_directory(result_name):
     return result_dir
 
 
+def create_solver(name):
+    """ return a solver object for the given solver name
+
+    Args:
+        name: 'highs' for the in-memory HiGHS solver from SciPy (>= 1.7,
+              else a ValueError is raised), otherwise any name known to
+              Pyomo's SolverFactory (glpk, cplex, ...)
+
+    Returns:
+        a solver object with set_options and solve methods
+    """
+    if name == 'highs':
+        return HighsSolver()
+    return SolverFactory(name)
+
+
 def setup_solver(optim, logfile='solver.log'):
     """ """
     if optim.name == 'gurobi':
@@ -47,6 +69,10 @@ def setup_solver(optim, logfile='solver.log'):
         # optim.set_options("mipgap=.0005")
     elif optim.name == 'cplex':
         optim.set_options("log={}".format(logfile))
+    elif optim.name == 'highs':
+        # in-memory HiGHS via scipy; its log is printed with tee=True
+        # optim.set_options("time_limit=7200")  # seconds
+        pass
     else:
         print("Warning from setup_solver: no options set for solver "
               "'{}'!".format(optim.name))
@@ -56,7 +82,9 @@ def setup_solver(optim, logfile='solver.log'):
 def run_scenario(input_files, Solver, timesteps, scenario, result_dir, dt,
                  objective, plot_tuples=None,  plot_sites_name=None,
                  plot_periods=None, report_tuples=None,
-                 report_sites_name=None):
+                 report_sites_name=None, parallel_islands=False,
+                 admm_regions=None, duals=True, result_profile='full',
+                 result_store=None, telemetry=False, file_determinism=None):
     """ run an urbs model for given input, time steps and scenario
 
     Args:
@@ -75,6 +103,29 @@ def run_scenario(input_files, Solver, timesteps, scenario, result_dir, dt,
           (c.f. urbs.report)
         - report_sites_name: (optional) dict of names for sites in
           report_tuples
+        - parallel_islands: (optional) if True and the sites form several
+          islands without global coupling, solve each island as an
+          independent model in parallel (c.f. urbs.solve_islands)
+        - admm_regions: (optional) list or dict of site groups; if given,
+          solve by ADMM decomposition across these regions, each in its own
+          process; needs a QP capable solver, e.g. gurobi or cplex (c.f.
+          urbs.solve_admm)
+        - duals: (optional) True to import the duals of all constraints,
+          False for none, or a list of constraint names whose duals are kept
+          in the result, e.g. ['res_vertex'], default: True
+        - result_profile: (optional) result cache profile saved to the HDF5
+          file, e.g. 'reporting' (c.f. urbs.create_result_cache),
+          default: 'full'
+        - result_store: (optional) filename of a consolidated multi-scenario
+          HDF5 store (c.f. urbs.save_scenario); if given, the scenario is
+          appended there instead of being saved to its own HDF5 file
+        - telemetry: (optional) if True, record wall time, CPU time and
+          memory use of each phase of the run and write them to a JSON file
+          next to the solver log (c.f. urbs.Telemetry), default: False
+        - file_determinism: (optional) row and column ordering of the problem
+          file written for the solver: 1 sorts by index, 2 also by name;
+          makes solver runs reproducible across Python processes (ignored
+          for HiGHS), default: None (Pyomo default)
 
     Returns:
         the urbs model instance
@@ -84,45 +135,163 @@ def run_scenario(input_files, Solver, timesteps, scenario, result_dir, dt,
     # (necessary for consitency)
     year = date.today().year
 
-    # scenario name, read and modify data for scenario
+    # scenario name and filename for logfile
     sce = scenario.__name__
-    data = read_input(input_files, year)
-    data = scenario(data)
-    validate_input(data)
-    validate_dc_objective(data, objective)
+    log_filename = os.path.join(result_dir, '{}.log').format(sce)
+    telemetry = Telemetry() if telemetry else None
 
-    # create model
-    prob = create_model(data, dt, timesteps, objective)
-    # prob.write('model.lp', io_options={'symbolic_solver_labels':True})
+    # read and modify data for scenario
+    with phase(telemetry, 'read_input'):
+        data = read_input(input_files, year)
+    with phase(telemetry, 'scenario'):
+        data = scenario(data)
+    with phase(telemetry, 'validate_input'):
+        validate_input(data)
+        validate_dc_objective(data, objective)
 
-    # refresh time stamp string and create filename for logfile
-    log_filename = os.path.join(result_dir, '{}.log').format(sce)
+    if admm_regions is not None:
+        # distributed solve; prob is a result container holding the merged
+        # result cache of all regions
+        with phase(telemetry, 'solve'):
+            prob = solve_admm(data, admm_regions, dt, timesteps, objective,
+                              Solver, logfile=log_filename, duals=duals,
+                              result_profile=result_profile)
+    elif parallel_islands and is_decomposable(data, objective):
+        # solve independent site groups separately; prob is a result
+        # container holding the merged result cache
+        with phase(telemetry, 'solve'):
+            prob = solve_islands(data, dt, timesteps, objective, Solver,
+                                 logfile=log_filename, duals=duals,
+                                 result_profile=result_profile)
+    else:
+        # create the solver first, so that an unavailable solver fails
+        # before the model is built
+        optim = create_solver(Solver)  # cplex, glpk, gurobi, highs, ...
+
+        # create model
+        with phase(telemetry, 'create_model'):
+            prob = create_model(data, dt, timesteps, objective,
+                                dual=bool(duals), telemetry=telemetry)
+        # prob.write('model.lp', io_options={'symbolic_solver_labels':True})
+
+        # solve model and read results
+        optim = setup_solver(optim, logfile=log_filename)
+        solve_options = {}
+        if file_determinism is not None and \
+                not isinstance(optim, HighsSolver):
+            solve_options['file_determinism'] = file_determinism
+        if telemetry is not None and not isinstance(optim, HighsSolver):
+            # time writing/solving separately from loading the solution
+            with phase(telemetry, 'solve'):
+                result = optim.solve(prob, tee=True, load_solutions=False,
+                                     **solve_options)
+            with phase(telemetry, 'load'):
+                prob.solutions.load_from(result)
+            telemetry.info['solver_time'] = result.solver.time
+        else:
+            with phase(telemetry, 'solve'):
+                result = optim.solve(prob, tee=True, **solve_options)
+        assert str(result.solver.termination_condition) == 'optimal'
 
-    # solve model and read results
-    optim = SolverFactory(Solver)  # cplex, glpk, gurobi, ...
-    optim = setup_solver(optim, logfile=log_filename)
-    result = optim.solve(prob, tee=True)
-    assert str(result.solver.termination_condition) == 'optimal'
+        # extract the selected entities into the result cache
+        with phase(telemetry, 'create_result_cache'):
+            prob._result = create_result_cache(prob, duals=duals,
+                                               profile=result_profile)
 
     # save problem solution (and input data) to HDF5 file
-    save(prob, os.path.join(result_dir, '{}.h5'.format(sce)))
+    with phase(telemetry, 'save'):
+        if result_store is not None:
+            save_scenario(prob, result_store, sce)
+        else:
+            save(prob, os.path.join(result_dir, '{}.h5'.format(sce)))
 
     # write report to spreadsheet
-    report(
-        prob,
-        os.path.join(result_dir, '{}.xlsx').format(sce),
-        report_tuples=report_tuples,
-        report_sites_name=report_sites_name)
+    with phase(telemetry, 'report'):
+        report(
+            prob,
+            os.path.join(result_dir, '{}.xlsx').format(sce),
+            report_tuples=report_tuples,
+            report_sites_name=report_sites_name)
 
     # result plots
-    result_figures(
-        prob,
-        os.path.join(result_dir, '{}'.format(sce)),
-        timesteps,
-        plot_title_prefix=sce.replace('_', ' '),
-        plot_tuples=plot_tuples,
-        plot_sites_name=plot_sites_name,
-        periods=plot_periods,
-        figure_size=(24, 9))
+    with phase(telemetry, 'result_figures'):
+        result_figures(
+            prob,
+            os.path.join(result_dir, '{}'.format(sce)),
+            timesteps,
+            plot_title_prefix=sce.replace('_', ' '),
+            plot_tuples=plot_tuples,
+            plot_sites_name=plot_sites_name,
+            periods=plot_periods,
+            figure_size=(24, 9))
+
+    if telemetry is not None:
+        telemetry.info['scenario'] = sce
+        telemetry.write(telemetry_filename(log_filename))
 
     return prob
+
+
+def run_scenarios(input_files, Solver, timesteps, scenarios, result_dir, dt,
+                  objective, plot_tuples=None, plot_sites_name=None,
+                  plot_periods=None, report_tuples=None,
+                  report_sites_name=None):
+    """ run a series of related scenarios on one persistent model
+
+    The model is built once for the first scenario. All further scenarios
+    may only change commodity prices and limits, the global CO2 and cost
+    limits and capacity bounds (c.f. urbs.ScenarioSession); they are pushed
+    into the loaded model and re-solved from the previous solution, which is
+    fastest with Solver='gurobi_persistent' or 'cplex_persistent'.
+
+    Args:
+        - input_files: filenames of input Excel spreadsheets
+        - Solver: the user specified solver
+        - timesteps: a list of timesteps, e.g. range(0,8761)
+        - scenarios: a list of scenario functions that modify the input data
+        - result_dir: directory name for result spreadsheet and plots
+        - dt: length of each time step (unit: hours)
+        - objective: objective function chosen (either "cost" or "CO2")
+        - plot_tuples, plot_sites_name, plot_periods, report_tuples,
+          report_sites_name: (optional) c.f. run_scenario
+
+    Returns:
+        the model instance of the session, holding the last scenario
+    """
+    year = date.today().year
+    base = read_input(input_files, year)
+    log_filename = os.path.join(result_dir, 'session.log')
+
+    session = None
+    for scenario in scenarios:
+        sce = scenario.__name__
+        data = scenario(copy.deepcopy(base))
+        validate_input(data)
+        validate_dc_objective(data, objective)
+
+        if session is None:
+            session = ScenarioSession(data, dt, timesteps, objective, Solver,
+                                      logfile=log_filename)
+        else:
+            session.update(data)
+        result = session.solve(tee=True)
+        assert str(result.solver.termination_condition) == 'optimal'
+        prob = session.prob
+
+        save(prob, os.path.join(result_dir, '{}.h5'.format(sce)))
+        report(
+            prob,
+            os.path.join(result_dir, '{}.xlsx').format(sce),
+            report_tuples=report_tuples,
+            report_sites_name=report_sites_name)
+        result_figures(
+            prob,
+            os.path.join(result_dir, '{}'.format(sce)),
+            timesteps,
+            plot_title_prefix=sce.replace('_', ' '),
+            plot_tuples=plot_tuples,
+            plot_sites_name=plot_sites_name,
+            periods=plot_periods,
+            figure_size=(24, 9))
+
+    return session.prob if session else None
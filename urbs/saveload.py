@@ -1,65 +1,300 @@
+import collections
+import collections.abc
+import hashlib
 import pandas as pd
-from .pyomoio import get_entity, list_entities
+from .pyomoio import get_duals, get_entity, list_entities
 
 
-def create_result_cache(prob):
-    entity_types = ['set', 'par', 'var']
-    if hasattr(prob, 'dual'):
-        entity_types.append('con')
+# names of the result cache profiles of create_result_cache
+RESULT_PROFILES = ['capacities', 'reporting', 'full', 'duals']
 
-    entities = []
-    for entity_type in entity_types:
-        entities.extend(list_entities(prob, entity_type).index.tolist())
+
+def profile_entities(profile):
+    """Return the entity names extracted by a result cache profile.
+
+    Args:
+        - profile: 'capacities' (costs and capacities, c.f. get_constants)
+          or 'reporting' (everything read by report and result_figures)
+
+    Returns:
+        list of entity names
+    """
+    # imported here, as plot pulls in matplotlib
+    from .output import CONSTANT_ENTITIES
+    from .plot import PLOT_ENTITIES
+    from .report import REPORT_ENTITIES
+
+    if profile == 'capacities':
+        return list(CONSTANT_ENTITIES)
+    elif profile == 'reporting':
+        return REPORT_ENTITIES + [name for name in PLOT_ENTITIES
+                                  if name not in REPORT_ENTITIES]
+    else:
+        raise ValueError("Unknown result profile '{}'; choose one of "
+                         "{}".format(profile, RESULT_PROFILES))
+
+
+def create_result_cache(prob, duals=True, profile='full', entities=None):
+    """Extract the results of a solved model into a dict of Series.
+
+    Args:
+        - prob: a solved urbs model instance
+        - duals: (optional) True to include the duals of all constraints
+          (if the model has a dual suffix), False for none, or a list of
+          constraint names, e.g. ['res_vertex']; only used by the profiles
+          'full' and 'duals', default: True
+        - profile: (optional) 'full' for all sets, params, variables and
+          duals, 'duals' for duals only, or 'capacities'/'reporting' (c.f.
+          profile_entities), default: 'full'
+        - entities: (optional) explicit list of entity names to extract;
+          overrides profile
+
+    Returns:
+        a dict of entity name: Series
+    """
+    if entities is None:
+        if profile == 'full':
+            entities = []
+            for entity_type in ['set', 'par', 'var']:
+                entities.extend(
+                    list_entities(prob, entity_type).index.tolist())
+        elif profile == 'duals':
+            entities = []
+        else:
+            entities = profile_entities(profile)
+            duals = False
+    else:
+        duals = False
 
     result_cache = {}
     for entity in entities:
-        result_cache[entity] = get_entity(prob, entity)
+        if hasattr(prob, entity):
+            result_cache[entity] = get_entity(prob, entity)
+
+    if hasattr(prob, 'dual') and duals:
+        result_cache.update(
+            get_duals(prob, None if duals is True else list(duals)))
     return result_cache
 
 
-def save(prob, filename):
+# index levels that are stored as queryable data columns in table format
+DATA_COLUMNS = ['stf', 'sit', 'com', 't']
+
+
+def _ignore_store_warnings():
+    import warnings
+    import tables
+    warnings.filterwarnings('ignore',
+                            category=pd.io.pytables.PerformanceWarning)
+    warnings.filterwarnings('ignore',
+                            category=tables.NaturalNameWarning)
+
+
+def _put(store, key, value, format):
+    """Write one node in fixed or table format.
+
+    Result entities in table format get their index levels stf, sit, com
+    and t as data columns. Objects that cannot be stored as a table (e.g.
+    empty Series) fall back to fixed format.
+    """
+    # pandas silently skips empty objects in table format
+    if format == 'table' and 'result/' in key and not value.empty:
+        data_columns = [level for level in value.index.names
+                        if level in DATA_COLUMNS]
+        try:
+            store.put(key, value, format='table',
+                      data_columns=data_columns or None)
+            return
+        except (TypeError, ValueError, NotImplementedError):
+            if key in store:
+                store.remove(key)
+    store.put(key, value, format='fixed')
+
+
+def save(prob, filename, format='fixed', complevel=None, complib=None):
     """Save urbs model input and result cache to a HDF5 store file.
 
     Args:
         - prob: a urbs model instance containing a solution
         - filename: HDF5 store file to be written
+        - format: (optional) 'fixed' (fast to write and read as a whole) or
+          'table' (result entities can be queried with read_entity),
+          default: 'fixed'
+        - complevel: (optional) compression level 0-9, default: none
+        - complib: (optional) compression library, e.g. 'blosc' or 'zlib'
 
     Returns:
         Nothing
     """
-    import warnings
-    import tables
-    warnings.filterwarnings('ignore',
-                            category=pd.io.pytables.PerformanceWarning)
-    warnings.filterwarnings('ignore',
-                            category=tables.NaturalNameWarning)
+    _ignore_store_warnings()
 
     if not hasattr(prob, '_result'):
         prob._result = create_result_cache(prob)
 
-    with pd.HDFStore(filename, mode='w') as store:
+    with pd.HDFStore(filename, mode='w', complevel=complevel,
+                     complib=complib) as store:
         for name in prob._data.keys():
-            store['data/'+name] = prob._data[name]
+            _put(store, 'data/'+name, prob._data[name], format)
         for name in prob._result.keys():
-            store['result/'+name] = prob._result[name]
+            _put(store, 'result/'+name, prob._result[name], format)
+
+
+def read_entity(filename, name, where=None):
+    """Read one result entity from a HDF5 store file.
+
+    Args:
+        - filename: an existing HDF5 store file
+        - name: entity name, e.g. 'e_pro_out'
+        - where: (optional) query on the index levels stf, sit, com and t,
+          e.g. "sit == 'Mid' & com == 'Elec' & t < 100"; requires a store
+          saved with format='table'
+
+    Returns:
+        a Pandas Series of the (selected) entity values
+    """
+    with pd.HDFStore(filename, mode='r') as store:
+        return _select(store, name, where)
+
+
+def _select(store, name, where):
+    key = 'result/' + name
+    if where is None:
+        return store[key]
+    if not store.get_storer(key).is_table:
+        raise ValueError("Entity '{}' is stored in fixed format and cannot "
+                         "be queried; convert the file with "
+                         "migrate_store.".format(name))
+    return store.select(key, where=where)
+
+
+def migrate_store(source, target, format='table', complevel=9,
+                  complib='blosc'):
+    """Rewrite an existing HDF5 result store in another format.
+
+    Args:
+        - source: an existing HDF5 store file, e.g. written by save
+        - target: HDF5 store file to be written
+        - format: (optional) 'table' or 'fixed', default: 'table'
+        - complevel: (optional) compression level 0-9, default: 9
+        - complib: (optional) compression library, default: 'blosc'
+
+    Returns:
+        Nothing
+    """
+    _ignore_store_warnings()
+
+    with pd.HDFStore(source, mode='r') as src, \
+            pd.HDFStore(target, mode='w', complevel=complevel,
+                        complib=complib) as dst:
+        for group in ['data', 'result']:
+            if '/' + group not in src:
+                continue
+            for node in src.get_node(group):
+                key = '{}/{}'.format(group, node._v_name)
+                _put(dst, key, src[key], format)
+
+
+class StoreCache(collections.abc.Mapping):
+    """ Read-only mapping of the nodes of one group in an open HDF5 store.
+
+    Nodes are only read on first access and kept in a least recently used
+    cache of at most cache_size entries (unbounded if None).
+    """
+    def __init__(self, store, group, cache_size=None):
+        self._store = store
+        self._group = group
+        self._cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        if '/' + group in store:
+            self._names = [node._v_name for node in store.get_node(group)]
+        else:
+            self._names = []
+
+    def __getitem__(self, name):
+        if name in self._cache:
+            self._cache.move_to_end(name)
+            return self._cache[name]
+        if name not in self._names:
+            raise KeyError(name)
+        if not self._store.is_open:
+            raise ValueError('Result store is closed.')
+
+        value = self._store['{}/{}'.format(self._group, name)]
+        self._cache[name] = value
+        if (self._cache_size is not None and
+                len(self._cache) > self._cache_size):
+            self._cache.popitem(last=False)
+        return value
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
 
 
 class ResultContainer(object):
-    """ Result/input data container for reporting functions. """
-    def __init__(self, data, result):
+    """ Result/input data container for reporting functions.
+
+    If created by load(filename, lazy=True), the container keeps the HDF5
+    store open until close() is called; use it as a context manager to
+    release the file handle deterministically.
+    """
+    def __init__(self, data, result, store=None):
         self._data = data
         self._result = result
+        self._store = store
+
+    def select(self, name, where=None):
+        """ Read (part of) a result entity from the underlying HDF5 store.
+
+        Args:
+            name: entity name, e.g. 'e_pro_out'
+            where: (optional) query, c.f. read_entity
 
+        Returns:
+            a Pandas Series of the (selected) entity values
+        """
+        if self._store is None:
+            raise ValueError('select needs a container created by '
+                             'load(filename, lazy=True).')
+        return _select(self._store, name, where)
 
-def load(filename):
+    def close(self):
+        """ Close the underlying HDF5 store, if any. """
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load(filename, lazy=False, cache_size=32):
     """Load a urbs model result container from a HDF5 store file.
 
     Args:
         filename: an existing HDF5 store file
+        lazy: (optional) if True, keep the store open and read input tables
+              and result entities on first access only, default: False
+        cache_size: (optional) number of result entities kept in memory by
+                    a lazy container, default: 32
 
     Returns:
         prob: the modified instance containing the result cache
     """
+    if lazy:
+        store = pd.HDFStore(filename, mode='r')
+        return ResultContainer(StoreCache(store, 'data'),
+                               StoreCache(store, 'result', cache_size),
+                               store)
+
     with pd.HDFStore(filename, mode='r') as store:
         data_cache = {}
         for group in store.get_node('data'):
@@ -70,3 +305,171 @@ def load(filename):
             result_cache[group._v_name] = store[group._v_pathname]
 
     return ResultContainer(data_cache, result_cache)
+
+
+# CONSOLIDATED MULTI-SCENARIO STORE
+# Layout: input/<table>/h<hash> holds each distinct input table once,
+# scenario/<name>/inputs maps table names to these keys and
+# scenario/<name>/result/<entity> holds the result cache of a scenario.
+
+def _table_hash(df):
+    """Return a hex digest of the content of an input DataFrame."""
+    digest = hashlib.sha1()
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(repr(list(df.index.names)).encode())
+    if not df.empty:
+        digest.update(pd.util.hash_pandas_object(df, index=True).values
+                      .tobytes())
+    return digest.hexdigest()[:16]
+
+
+def save_scenario(prob, filename, scenario, format='fixed', complevel=None,
+                  complib=None):
+    """Append the input and results of one scenario to a consolidated store.
+
+    Input tables that are identical to those of a previously saved scenario
+    are stored only once. An existing scenario of the same name is
+    replaced.
+
+    Args:
+        - prob: a urbs model instance containing a solution
+        - filename: HDF5 store file, created if missing
+        - scenario: scenario name, e.g. 'scenario_base'
+        - format, complevel, complib: (optional) c.f. save
+
+    Returns:
+        Nothing
+    """
+    from .output import CONSTANT_ENTITIES
+    _ignore_store_warnings()
+
+    if not hasattr(prob, '_result'):
+        prob._result = create_result_cache(prob)
+    result = dict(prob._result)
+    # capacity expressions are needed by get_scenario_capacities
+    for name in CONSTANT_ENTITIES:
+        if name not in result and hasattr(prob, name):
+            result[name] = get_entity(prob, name)
+
+    prefix = 'scenario/{}'.format(scenario)
+    with pd.HDFStore(filename, mode='a', complevel=complevel,
+                     complib=complib) as store:
+        if prefix in store:
+            store.remove(prefix)
+
+        inputs = {}
+        for name in prob._data.keys():
+            key = 'input/{}/h{}'.format(name, _table_hash(prob._data[name]))
+            if key not in store:
+                _put(store, key, prob._data[name], 'fixed')
+            inputs[name] = key
+        store.put(prefix + '/inputs', pd.Series(inputs))
+
+        for name, entity in result.items():
+            _put(store, '{}/result/{}'.format(prefix, name), entity, format)
+
+
+def list_scenarios(filename):
+    """List the scenarios in a consolidated store.
+
+    Args:
+        - filename: an existing HDF5 store file written by save_scenario
+
+    Returns:
+        list of scenario names
+    """
+    with pd.HDFStore(filename, mode='r') as store:
+        if '/scenario' not in store:
+            return []
+        return [node._v_name for node in store.get_node('scenario')]
+
+
+def load_scenario(filename, scenario):
+    """Load one scenario of a consolidated store as a result container.
+
+    Args:
+        - filename: an existing HDF5 store file written by save_scenario
+        - scenario: scenario name
+
+    Returns:
+        a ResultContainer with the input and results of the scenario
+    """
+    prefix = 'scenario/{}'.format(scenario)
+    with pd.HDFStore(filename, mode='r') as store:
+        if prefix not in store:
+            raise KeyError("Unknown scenario '{}'".format(scenario))
+        data_cache = {name: store[key]
+                      for name, key in store[prefix + '/inputs'].items()}
+        result_cache = {}
+        for node in store.get_node(prefix + '/result'):
+            result_cache[node._v_name] = store[node._v_pathname]
+    return ResultContainer(data_cache, result_cache)
+
+
+def get_scenario_entity(filename, name, scenarios=None, where=None):
+    """Read one result entity of several scenarios at once.
+
+    Args:
+        - filename: an existing HDF5 store file written by save_scenario
+        - name: entity name, e.g. 'costs'
+        - scenarios: (optional) list of scenario names, default: all
+        - where: (optional) query on stf, sit, com and t (c.f. read_entity)
+
+    Returns:
+        a Series with an additional first index level 'scenario'
+    """
+    if scenarios is None:
+        scenarios = list_scenarios(filename)
+
+    parts = []
+    with pd.HDFStore(filename, mode='r') as store:
+        for scenario in scenarios:
+            key = 'scenario/{}/result/{}'.format(scenario, name)
+            if key not in store:
+                continue
+            if where is None:
+                part = store[key]
+            else:
+                part = store.select(key, where=where)
+            parts.append((scenario, part))
+
+    if not parts:
+        return pd.Series(name=name)
+    return pd.concat([part for _, part in parts],
+                     keys=[scenario for scenario, _ in parts],
+                     names=['scenario'])
+
+
+def get_scenario_costs(filename, scenarios=None):
+    """Return the costs of several scenarios.
+
+    Args:
+        - filename: an existing HDF5 store file written by save_scenario
+        - scenarios: (optional) list of scenario names, default: all
+
+    Returns:
+        a DataFrame with scenarios as rows and cost types as columns
+    """
+    costs = get_scenario_entity(filename, 'costs', scenarios)
+    if costs.empty:
+        return pd.DataFrame()
+    return costs.unstack()
+
+
+def get_scenario_capacities(filename, scenarios=None, entity='cap_pro'):
+    """Return the capacities of several scenarios.
+
+    Args:
+        - filename: an existing HDF5 store file written by save_scenario
+        - scenarios: (optional) list of scenario names, default: all
+        - entity: (optional) capacity entity, e.g. 'cap_pro', 'cap_tra',
+          'cap_sto_c' or 'cap_sto_p', default: 'cap_pro'
+
+    Returns:
+        a DataFrame with the entity index (e.g. stf, site, process) as rows
+        and scenarios as columns
+    """
+    caps = get_scenario_entity(filename, entity, scenarios)
+    if caps.empty:
+        return pd.DataFrame()
+    return caps.unstack('scenario')
@@ -0,0 +1,198 @@
+import copy
+import multiprocessing
+import os
+import pandas as pd
+import pyomo.core as pyomo
+from .output import get_constants
+from .persistent import ScenarioSession, diff_input
+from .pyomoio import get_entity
+
+
+# PARAMETER SETTERS
+# A setter takes an input data dict and a parameter value and returns the
+# modified data dict, like the scenario functions in scenarios.py.
+
+def _set_global_prop(data, prop, value):
+    # set a global property in all support timeframes; missing rows would
+    # be added, which changes the model structure, so they are an error
+    global_prop = data['global_prop']
+    for stf in global_prop.index.get_level_values(0).unique().tolist():
+        if (stf, prop) not in global_prop.index:
+            raise ValueError("Global property '{}' is missing for support "
+                             "timeframe {}; add it to the input to sweep "
+                             "it.".format(prop, stf))
+        global_prop.loc[(stf, prop), 'value'] = value
+    return data
+
+
+def set_co2_limit(data, value):
+    # set global CO2 limit (all support timeframes)
+    return _set_global_prop(data, 'CO2 limit', value)
+
+
+def set_co2_budget(data, value):
+    # set global CO2 budget (intertemporal models only)
+    return _set_global_prop(data, 'CO2 budget', value)
+
+
+def scale_stock_prices(data, factor):
+    # scale all stock commodity prices by factor
+    co = data['commodity']
+    stock_commodities_only = (co.index.get_level_values('Type') == 'Stock')
+    co.loc[stock_commodities_only, 'price'] *= factor
+    return data
+
+
+def serpentine_grid(value_lists):
+    """List all points of a parameter grid in serpentine order.
+
+    Consecutive points differ in one parameter only, by one grid step, so
+    that each solution is a good starting point for the next solve.
+
+    Args:
+        - value_lists: list of value lists, one per parameter
+
+    Returns:
+        list of value tuples
+    """
+    if not value_lists:
+        return [()]
+    inner = serpentine_grid(value_lists[1:])
+    points = []
+    for k, value in enumerate(value_lists[0]):
+        order = inner if k % 2 == 0 else inner[::-1]
+        points.extend((value,) + point for point in order)
+    return points
+
+
+def sweep_results(prob):
+    """Summarise costs, capacities and emissions of a solved model.
+
+    Args:
+        - prob: a solved urbs model instance
+
+    Returns:
+        a DataFrame with columns category, stf, site, name and value
+    """
+    rows = []
+    costs, cpro, ctra, csto = get_constants(prob)
+    for cost_type, value in costs.items():
+        rows.append(('cost', None, None, cost_type, value))
+    if not cpro.empty:
+        for (stf, sit, pro), value in cpro['Total'].items():
+            rows.append(('capacity', stf, sit, pro, value))
+
+    # environmental commodities: process output - process input, annualised
+    env = list(prob.com_env)
+    weight = pyomo.value(prob.weight)
+    flows = []
+    for name, sign in [('e_pro_out', 1), ('e_pro_in', -1)]:
+        flow = get_entity(prob, name)
+        if flow.empty:
+            continue
+        # index: (t, stf, sit, pro, com)
+        flow = flow[flow.index.get_level_values(4).isin(env)]
+        flows.append(sign * flow.groupby(level=[1, 2, 4]).sum())
+    if flows:
+        emissions = pd.concat(flows).groupby(level=[0, 1, 2]).sum() * weight
+        for (stf, sit, com), value in emissions.items():
+            rows.append(('emission', stf, sit, com, value))
+
+    return pd.DataFrame(rows,
+                        columns=['category', 'stf', 'site', 'name', 'value'])
+
+
+def _point_data(data, setters, point):
+    """Apply the setters with the values of one grid point to a copy of
+    the input data dict."""
+    point_data = copy.deepcopy(data)
+    for setter, value in zip(setters, point):
+        point_data = setter(point_data, value)
+    return point_data
+
+
+def _sweep_chunk(args):
+    """Solve a contiguous chunk of grid points in one ScenarioSession;
+    worker function for sweep.
+
+    Returns:
+        list of (point, result table) tuples
+    """
+    (data, setters, points, dt, timesteps, objective, solver,
+     logfile) = args
+
+    session = None
+    results = []
+    for point in points:
+        if session is None:
+            session = ScenarioSession(_point_data(data, setters, point), dt,
+                                      timesteps, objective, solver,
+                                      logfile=logfile, dual=False)
+        else:
+            session.update(_point_data(data, setters, point))
+        result = session.solve(tee=False)
+        assert str(result.solver.termination_condition) == 'optimal'
+        results.append((point, sweep_results(session.prob)))
+    return results
+
+
+def sweep(data, parameters, dt, timesteps, objective, solver,
+          logfile='solver.log', processes=1):
+    """Solve a model for every point of a parameter grid.
+
+    The grid is walked in serpentine order (c.f. serpentine_grid) and split
+    into contiguous chunks, one per process. Each chunk builds the model
+    once and re-solves it for each of its points from the previous solution
+    (c.f. ScenarioSession); use 'gurobi_persistent' or 'cplex_persistent'
+    to keep the model loaded in the solver.
+
+    The setters may only change input values that a ScenarioSession can
+    update (c.f. urbs.persistent.UPDATABLE_COLUMNS), e.g. set_co2_limit
+    needs a 'CO2 limit' row for every support timeframe. All grid points
+    are checked before the first solve; a ValueError is raised otherwise.
+
+    Args:
+        - data: input data dict as returned by read_input
+        - parameters: dict of parameter name: (setter, values), e.g.
+          {'CO2 limit': (set_co2_limit, [1e8, 5e7, 2e7])}; a setter is
+          called as setter(data, value) and returns the modified data; it
+          must be a module level function if processes > 1
+        - dt: length of each time step (unit: hours)
+        - timesteps: a list of timesteps, e.g. range(0,8761)
+        - objective: objective function chosen (either "cost" or "CO2")
+        - solver: the user specified solver
+        - logfile: solver log filename; chunk number is appended
+        - processes: (optional) number of worker processes, default: 1
+
+    Returns:
+        a DataFrame with one column per parameter and the columns category,
+        stf, site, name and value (c.f. sweep_results)
+    """
+    names = list(parameters.keys())
+    setters = [parameters[name][0] for name in names]
+    # sorted values keep neighbouring grid points close to each other
+    points = serpentine_grid([sorted(parameters[name][1]) for name in names])
+    for point in points:
+        diff_input(data, _point_data(data, setters, point))
+
+    processes = max(1, min(processes, len(points)))
+    size = -(-len(points) // processes)
+    log_base, log_ext = os.path.splitext(logfile)
+    jobs = [(data, setters, points[k:k + size], dt, list(timesteps),
+             objective, solver,
+             '{}-chunk{}{}'.format(log_base, k // size, log_ext))
+            for k in range(0, len(points), size)]
+
+    if len(jobs) > 1:
+        with multiprocessing.Pool(len(jobs)) as pool:
+            chunks = pool.map(_sweep_chunk, jobs)
+    else:
+        chunks = [_sweep_chunk(job) for job in jobs]
+
+    tables = []
+    for chunk in chunks:
+        for point, table in chunk:
+            for name, value in reversed(list(zip(names, point))):
+                table.insert(0, name, value)
+            tables.append(table)
+    return pd.concat(tables, ignore_index=True)
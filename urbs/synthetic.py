@@ -0,0 +1,220 @@
+import numpy as np
+import os
+import pandas as pd
+
+
+def _stf_frame(rows, columns, index, stfs):
+    """Build an input table with a leading support_timeframe index level
+    from rows that are the same for all support timeframes."""
+    frame = pd.DataFrame(rows, columns=index + columns).set_index(index)
+    frame = pd.concat([frame] * len(stfs), keys=stfs,
+                      names=['support_timeframe'])
+    return frame.sort_index()
+
+
+def synthetic_input(sites=3, processes=4, commodities=2, storages=1,
+                    transmissions=2, dsm=0, support_timeframes=1,
+                    timesteps=168, seed=0):
+    """Create a valid urbs input data dict of configurable size.
+
+    Every site has an electricity demand, the intermittent commodities Wind
+    and Solar, the environmental commodity CO2 and the stock commodities
+    Fuel1..FuelN. Processes alternate between renewable plants (Wind,
+    Solar) and fuel plants (emitting CO2); storages store Elec. The
+    timeseries are daily profiles with seeded noise, so that the same
+    arguments always give the same data.
+
+    Args:
+        - sites: number of sites
+        - processes: number of processes per site
+        - commodities: number of stock commodities (fuels)
+        - storages: number of storages per site
+        - transmissions: number of site pairs connected by a (bidirectional)
+          transmission line, at most sites * (sites - 1) / 2
+        - dsm: number of sites with demand side management
+        - support_timeframes: number of support timeframes (5 years apart);
+          more than one makes the model intertemporal
+        - timesteps: number of modelled timesteps (plus the initial one)
+        - seed: seed of the random timeseries noise
+
+    Returns:
+        a dict of DataFrames like read_input
+    """
+    rng = np.random.RandomState(seed)
+    stfs = [2020 + 5 * k for k in range(support_timeframes)]
+    site_names = ['Site{}'.format(k + 1) for k in range(sites)]
+    fuels = ['Fuel{}'.format(k + 1) for k in range(max(commodities, 1))]
+
+    # global properties
+    props = [('CO2 limit', np.inf), ('Cost limit', np.inf)]
+    if support_timeframes > 1:
+        props += [('Discount rate', 0.03), ('CO2 budget', np.inf)]
+    global_prop = _stf_frame(props, ['value'], ['Property'], stfs)
+    if support_timeframes > 1:
+        # the last support timeframe stands for the 5 years it is repeated
+        global_prop.loc[(stfs[-1], 'Weight'), 'value'] = 5
+        global_prop = global_prop.sort_index()
+
+    site = _stf_frame([(s, np.nan) for s in site_names], ['area'],
+                      ['Name'], stfs)
+
+    # commodities
+    rows = []
+    for s in site_names:
+        rows.append((s, 'Elec', 'Demand', np.nan, np.nan, np.nan))
+        rows.append((s, 'Wind', 'SupIm', np.nan, np.nan, np.nan))
+        rows.append((s, 'Solar', 'SupIm', np.nan, np.nan, np.nan))
+        rows.append((s, 'CO2', 'Env', 0.0, np.inf, np.inf))
+        for k, fuel in enumerate(fuels):
+            rows.append((s, fuel, 'Stock', 20.0 + 5 * k, np.inf, np.inf))
+    commodity = _stf_frame(rows, ['price', 'max', 'maxperhour'],
+                           ['Site', 'Commodity', 'Type'], stfs)
+
+    # processes: renewables and fuel plants, alternating
+    rows = []
+    pro_com = []
+    for k in range(processes):
+        name = 'Plant{}'.format(k + 1)
+        if k % 2 == 0:
+            source = ['Wind', 'Solar'][(k // 2) % 2]
+            pro_com += [(name, source, 'In', 1.0, np.nan),
+                        (name, 'Elec', 'Out', 1.0, np.nan)]
+            costs = (1500000.0, 30000.0, 0.0)
+        else:
+            fuel = fuels[(k // 2) % len(fuels)]
+            pro_com += [(name, fuel, 'In', 1.0, np.nan),
+                        (name, 'Elec', 'Out', 0.4, np.nan),
+                        (name, 'CO2', 'Out', 0.3, np.nan)]
+            costs = (800000.0, 15000.0, 1.0)
+        for s in site_names:
+            rows.append((s, name, 0.0, 0.0, 100000.0, np.inf, 0.0) + costs +
+                        (0.07, 30, np.nan))
+    process = _stf_frame(rows, ['inst-cap', 'cap-lo', 'cap-up', 'max-grad',
+                                'min-fraction', 'inv-cost', 'fix-cost',
+                                'var-cost', 'wacc', 'depreciation',
+                                'area-per-cap'],
+                         ['Site', 'Process'], stfs)
+    process_commodity = _stf_frame(pro_com, ['ratio', 'ratio-min'],
+                                   ['Process', 'Commodity', 'Direction'],
+                                   stfs)
+
+    # transmission lines between the first site pairs, both directions
+    pairs = [(a, b) for i, a in enumerate(site_names)
+             for b in site_names[i + 1:]][:transmissions]
+    rows = []
+    for a, b in pairs:
+        for sin, sout in [(a, b), (b, a)]:
+            rows.append((sin, sout, 'hvac', 'Elec', 0.9, 1650000.0, 16500.0,
+                         0.0, 0.0, 0.0, np.inf, 0.07, 40))
+    columns = ['eff', 'inv-cost', 'fix-cost', 'var-cost', 'inst-cap',
+               'cap-lo', 'cap-up', 'wacc', 'depreciation']
+    if rows:
+        transmission = _stf_frame(rows, columns,
+                                  ['Site In', 'Site Out', 'Transmission',
+                                   'Commodity'], stfs)
+    else:
+        transmission = pd.DataFrame()
+
+    rows = [(s, 'Storage{}'.format(k + 1), 'Elec', 0.0, 0.0, np.inf, 0.0,
+             0.0, np.inf, 0.9, 0.9, 100000.0, 50.0, 1000.0, 1.0, 0.02, 0.0,
+             0.07, 50, 0.5, 0.0, np.nan)
+            for s in site_names for k in range(storages)]
+    if rows:
+        storage = _stf_frame(rows, ['inst-cap-c', 'cap-lo-c', 'cap-up-c',
+                                    'inst-cap-p', 'cap-lo-p', 'cap-up-p',
+                                    'eff-in', 'eff-out', 'inv-cost-p',
+                                    'inv-cost-c', 'fix-cost-p', 'fix-cost-c',
+                                    'var-cost-p', 'var-cost-c', 'wacc',
+                                    'depreciation', 'init', 'discharge',
+                                    'ep-ratio'],
+                             ['Site', 'Storage', 'Commodity'], stfs)
+    else:
+        storage = pd.DataFrame()
+
+    rows = [(s, 'Elec', 4, 0.95, 1, 500.0, 500.0)
+            for s in site_names[:dsm]]
+    if rows:
+        dsm_frame = _stf_frame(rows, ['delay', 'eff', 'recov', 'cap-max-do',
+                                      'cap-max-up'],
+                               ['Site', 'Commodity'], stfs)
+    else:
+        dsm_frame = pd.DataFrame()
+
+    # timeseries: daily profiles with noise, initial timestep 0
+    t = np.arange(timesteps + 1)
+    hour = t % 24
+    demand = {}
+    supim = {}
+    for k, s in enumerate(site_names):
+        base = 1000.0 * (1 + k % 3)
+        demand[s, 'Elec'] = base * (1 + 0.3 * np.sin(
+            2 * np.pi * (hour - 8) / 24)) * (1 + 0.05 * rng.randn(len(t)))
+        supim[s, 'Wind'] = np.clip(0.4 + 0.2 * rng.randn(len(t)), 0, 1)
+        supim[s, 'Solar'] = np.clip(np.sin(np.pi * (hour - 6) / 12), 0, 1)
+    demand = pd.DataFrame(demand, index=pd.Index(t, name='t'))
+    supim = pd.DataFrame(supim, index=pd.Index(t, name='t'))
+    demand.iloc[0] = 0
+    supim.iloc[0] = 0
+    demand = pd.concat([demand] * len(stfs), keys=stfs,
+                       names=['support_timeframe'])
+    supim = pd.concat([supim] * len(stfs), keys=stfs,
+                      names=['support_timeframe'])
+
+    return {
+        'global_prop': global_prop,
+        'site': site,
+        'commodity': commodity,
+        'process': process,
+        'process_commodity': process_commodity,
+        'demand': demand,
+        'supim': supim,
+        'transmission': transmission,
+        'storage': storage,
+        'dsm': dsm_frame,
+        'buy_sell_price': pd.DataFrame(),
+        'eff_factor': pd.DataFrame()
+    }
+
+
+# input tables and the spreadsheet names read_input expects
+SHEETS = [('site', 'Site'), ('commodity', 'Commodity'),
+          ('process', 'Process'), ('process_commodity', 'Process-Commodity'),
+          ('transmission', 'Transmission'), ('storage', 'Storage'),
+          ('dsm', 'DSM'), ('demand', 'Demand'), ('supim', 'SupIm')]
+
+
+def write_input(data, directory):
+    """Write an input data dict to Excel spreadsheets readable by
+    read_input, one per support timeframe.
+
+    Args:
+        - data: input data dict, e.g. from synthetic_input
+        - directory: output directory, created if not existent
+
+    Returns:
+        the list of written filenames
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    filenames = []
+    for stf in data['global_prop'].index.levels[0]:
+        filename = os.path.join(directory, '{}.xlsx'.format(stf))
+        with pd.ExcelWriter(filename) as writer:
+            global_prop = data['global_prop'].loc[stf].copy()
+            global_prop.loc['Support timeframe', 'value'] = stf
+            global_prop['description'] = ''
+            global_prop.reset_index().to_excel(writer, 'Global', index=False)
+
+            for key, sheet in SHEETS:
+                table = data[key]
+                if table.empty:
+                    continue
+                table = table.loc[stf].copy()
+                if isinstance(table.columns, pd.MultiIndex):
+                    # ('Site', 'Commodity') columns become 'Site.Commodity'
+                    table.columns = ['.'.join(map(str, column))
+                                     for column in table.columns]
+                table.reset_index().to_excel(writer, sheet, index=False)
+        filenames.append(filename)
+    return filenames
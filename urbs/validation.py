@@ -16,21 +16,15 @@ def validate_input(data):
     """
 
     # Ensure correct formation of vertex rule
-    for (stf, sit, pro) in data['process'].index:
-        for com in data['commodity'].index.get_level_values('Commodity'):
-            simplified_pro_com_index = ([(st, p, c) for st, p, c, d in
-                                         data['process_commodity'].index
-                                         .tolist()])
-            simplified_com_index = ([(st, s, c) for st, s, c, t in
-                                     data['commodity'].index.tolist()])
-            if ((stf, pro, com) in simplified_pro_com_index and
-                    (stf, sit, com) not in simplified_com_index):
-                raise ValueError('Commodities used in a process at a site must'
-                                 ' be specified in the commodity input sheet'
-                                 '! The tuple (' + str(stf) + ',' + sit + ',' +
+    missing = _missing_process_commodities(data)
+    if missing:
+        raise ValueError('Commodities used in a process at a site must'
+                         ' be specified in the commodity input sheet!' +
+                         ''.join(' The tuple (' + str(stf) + ',' + sit + ',' +
                                  com + ') is not in commodity input sheet.'
                                  '! The pair (' + sit + ',' + com + ')'
-                                 ' is not in commodity input sheet.')
+                                 ' is not in commodity input sheet.'
+                                 for stf, sit, com in missing))
 
     # Find ducplicate index
     for key in data:
@@ -45,51 +39,58 @@ def validate_input(data):
 
     # Identify infeasible process, transmission and storage capacity
     # constraints before solving
-    for index in data['process'].index:
-        if not (data['process'].loc[index]['cap-lo'] <=
-                data['process'].loc[index]['cap-up'] and
-                data['process'].fillna(0).loc[index]['inst-cap'] <=
-                data['process'].loc[index]['cap-up']):
-            raise ValueError('Ensure cap_lo <= cap_up and inst_cap <= cap_up'
-                             ' for all processes.')
+    pro = data['process']
+    invalid = ~((pro['cap-lo'] <= pro['cap-up']) &
+                (pro['inst-cap'].fillna(0) <= pro['cap-up']))
+    if invalid.any():
+        raise ValueError('Ensure cap_lo <= cap_up and inst_cap <= cap_up'
+                         ' for all processes.' + _rows(invalid))
 
     if not data['transmission'].empty:
-        for index in data['transmission'].index:
-            if not (data['transmission'].loc[index]['cap-lo'] <=
-                    data['transmission'].loc[index]['cap-up'] and
-                    data['transmission'].fillna(0).loc[index]['inst-cap'] <=
-                    data['transmission'].loc[index]['cap-up']):
-                raise ValueError('Ensure cap_lo <= cap_up and'
-                                 'inst_cap <= cap_up for all transmissions.')
+        tra = data['transmission']
+        invalid = ~((tra['cap-lo'] <= tra['cap-up']) &
+                    (tra['inst-cap'].fillna(0) <= tra['cap-up']))
+        if invalid.any():
+            raise ValueError('Ensure cap_lo <= cap_up and'
+                             'inst_cap <= cap_up for all transmissions.' +
+                             _rows(invalid))
         # Validate input for DCPF
-        if 'reactance' in data['transmission'].keys():
-            for index in data['transmission'].index:
-                if data['transmission'].loc[index]['reactance'] < 0:
-                    raise ValueError('Ensure for DCPF transmission lines: reactance > 0 ')
-                if data['transmission'].loc[index]['reactance'] > 0:
-                    if data['transmission'].loc[index]['eff'] != 1:
-                        raise ValueError('Ensure efficiency of DCPF Transmission Lines are 1')
-                    if not data['transmission'].loc[index]['base_voltage'] > 0:
-                        raise ValueError('Ensure base voltage of DCPF transmission lines are greater than 0')
-                    if not (0 < data['transmission'].loc[index]['difflimit'] <= 90):
-                        raise ValueError('Ensure angle difference of DCPF transmission lines are between 90 and 0 '
-                                         'degrees')
+        if 'reactance' in tra.keys():
+            if (tra['reactance'] < 0).any():
+                raise ValueError('Ensure for DCPF transmission lines: '
+                                 'reactance > 0 ' +
+                                 _rows(tra['reactance'] < 0))
+            dc = tra['reactance'] > 0
+            if (dc & (tra['eff'] != 1)).any():
+                raise ValueError('Ensure efficiency of DCPF Transmission '
+                                 'Lines are 1' +
+                                 _rows(dc & (tra['eff'] != 1)))
+            if (dc & ~(tra['base_voltage'] > 0)).any():
+                raise ValueError('Ensure base voltage of DCPF transmission '
+                                 'lines are greater than 0' +
+                                 _rows(dc & ~(tra['base_voltage'] > 0)))
+            invalid = dc & ~((tra['difflimit'] > 0) &
+                             (tra['difflimit'] <= 90))
+            if invalid.any():
+                raise ValueError('Ensure angle difference of DCPF '
+                                 'transmission lines are between 90 and 0 '
+                                 'degrees' + _rows(invalid))
 
     if not data['storage'].empty:
-        for index in data['storage'].index:
-            if not (data['storage'].loc[index]['cap-lo-p'] <=
-                    data['storage'].loc[index]['cap-up-p'] and
-                    data['storage'].fillna(0).loc[index]['inst-cap-p'] <=
-                    data['storage'].loc[index]['cap-up-p']):
-                raise ValueError('Ensure cap_lo <= cap_up and'
-                                 'inst_cap <= cap_up for all storage powers.')
-
-            elif not (data['storage'].loc[index]['cap-lo-c'] <=
-                      data['storage'].loc[index]['cap-up-c'] and
-                      data['storage'].fillna(0).loc[index]['inst-cap-c'] <=
-                      data['storage'].loc[index]['cap-up-c']):
-                raise ValueError('Ensure cap_lo <= cap_up and inst_cap <= '
-                                 'cap_up for all storage capacities.')
+        sto = data['storage']
+        invalid = ~((sto['cap-lo-p'] <= sto['cap-up-p']) &
+                    (sto['inst-cap-p'].fillna(0) <= sto['cap-up-p']))
+        if invalid.any():
+            raise ValueError('Ensure cap_lo <= cap_up and'
+                             'inst_cap <= cap_up for all storage powers.' +
+                             _rows(invalid))
+
+        invalid = ~((sto['cap-lo-c'] <= sto['cap-up-c']) &
+                    (sto['inst-cap-c'].fillna(0) <= sto['cap-up-c']))
+        if invalid.any():
+            raise ValueError('Ensure cap_lo <= cap_up and inst_cap <= '
+                             'cap_up for all storage capacities.' +
+                             _rows(invalid))
 
     # Identify SupIm values larger than 1, which lead to an infeasible model
     if (data['supim'] > 1).sum().sum() > 0:
@@ -113,31 +114,63 @@ def validate_input(data):
                        "correspondingly.")
 
     # Identify inconsistencies in site names throughout worksheets
-    for site in data['commodity'].index.levels[1].tolist():
-        if site not in data['site'].index.levels[1].tolist():
-            raise KeyError("All names in the column 'Site' in input worksheet "
-                           "'Commodity' must be from the list of site names "
-                           "specified in the worksheet 'Site'.")
-
-    for site in data['process'].index.levels[1].tolist():
-        if site not in data['site'].index.levels[1].tolist():
-            raise KeyError("All names in the column 'Site' in input worksheet "
-                           "'Process' must be from the list of site names "
-                           "specified in the worksheet 'Site'.")
+    sites = set(data['site'].index.levels[1])
+    for key, sheet in [('commodity', 'Commodity'), ('process', 'Process'),
+                       ('storage', 'Storage'), ('dsm', 'DSM')]:
+        if key in ('storage', 'dsm') and data[key].empty:
+            continue
+        unknown = sorted(set(data[key].index.levels[1]) - sites, key=str)
+        if unknown:
+            raise KeyError("All names in the column 'Site' in input "
+                           "worksheet '{}' must be from the list of site "
+                           "names specified in the worksheet 'Site'. "
+                           "Unknown: {}".format(
+                               sheet, ', '.join(map(str, unknown))))
+
+
+def _rows(mask):
+    """List the index entries where mask is True, for error messages."""
+    return ' Affected rows: {}'.format(
+        ', '.join(str(index) for index in mask.index[mask.values]))
+
+
+def _missing_process_commodities(data):
+    """Find (stf, site, commodity) tuples used by a process at a site but
+    missing from the commodity input sheet.
+
+    Only commodities that appear in the commodity sheet at all are checked.
+
+    Returns:
+        list of (stf, sit, com) tuples, in order of the process sheet
+    """
+    pro = data['process'].index
+    pro_com = data['process_commodity'].index
+    com = data['commodity'].index
+
+    processes = pd.DataFrame({'stf': pro.get_level_values(0),
+                              'sit': pro.get_level_values(1),
+                              'pro': pro.get_level_values(2),
+                              'pro_pos': range(len(pro))})
+    inputs = pd.DataFrame({'stf': pro_com.get_level_values(0),
+                           'pro': pro_com.get_level_values(1),
+                           'com': pro_com.get_level_values(2)})
+    # position of the first occurrence of each commodity name
+    com_pos = pd.Series(range(len(com)), index=com.get_level_values(2))
+    com_pos = com_pos[~com_pos.index.duplicated()]
+    inputs = inputs[inputs['com'].isin(com_pos.index)]
+    used = processes.merge(inputs.drop_duplicates(), on=['stf', 'pro'])
+    # order of the process sheet, then of the commodity sheet
+    used['com_pos'] = used['com'].map(com_pos)
+    used = used.sort_values(['pro_pos', 'com_pos'], kind='mergesort')
+
+    available = pd.MultiIndex.from_arrays([com.get_level_values(0),
+                                           com.get_level_values(1),
+                                           com.get_level_values(2)])
+    used_index = pd.MultiIndex.from_arrays([used['stf'], used['sit'],
+                                            used['com']])
+    missing = used_index[~used_index.isin(available)]
+    return list(missing.drop_duplicates())
 
-    if not data['storage'].empty:
-        for site in data['storage'].index.levels[1].tolist():
-            if site not in data['site'].index.levels[1].tolist():
-                raise KeyError("All names in the column 'Site' in input "
-                               "worksheet 'Storage' must be from the list of "
-                               "site names specified in the worksheet 'Site'.")
-
-    if not data['dsm'].empty:
-        for site in data['dsm'].index.levels[1].tolist():
-            if site not in data['site'].index.levels[1].tolist():
-                raise KeyError("All names in the column 'Site' in input "
-                               "worksheet 'DSM' must be from the list of site "
-                               "names specified in the worksheet 'Site'.")
 
 # report that variable costs may have error if used with CO2 minimization and DCPF
 def validate_dc_objective(data, objective):